@@ -20,6 +20,7 @@ from deals_engine import DealsEngine
 from telegram_bot import TelegramBot
 from channel_manager import ChannelManager
 from database import DatabaseManager
+from near_duplicates import NearDuplicateDetector
 
 class AmazonDealsBot:
     """النظام الرئيسي لبوت عروض أمازون"""
@@ -40,6 +41,7 @@ class AmazonDealsBot:
         self.deals_engine = None
         self.telegram_bot = None
         self.channel_manager = None
+        self.duplicate_detector = None
         
         # حالة النظام
         self.is_running = False
@@ -107,6 +109,12 @@ class AmazonDealsBot:
             self.logger.info("📱 تهيئة مدير القنوات...")
             self.channel_manager = ChannelManager(self.db_manager)
             
+            # كاشف العروض شبه المكررة مع العروض المبثوثة مؤخراً
+            self.duplicate_detector = NearDuplicateDetector(
+                self.db_manager, self.config['deals'].get('near_duplicates')
+            )
+            self.duplicate_detector.load_recent()
+            
             # تهيئة بوت التليجرام
             self.logger.info("🤖 تهيئة بوت التليجرام...")
             self.telegram_bot = TelegramBot(self.config, self.db_manager, self.deals_engine)
@@ -134,7 +142,8 @@ class AmazonDealsBot:
                 asyncio.create_task(self._run_deals_monitoring(), name="deals_monitoring"),
                 asyncio.create_task(self._run_telegram_bot(), name="telegram_bot"),
                 asyncio.create_task(self._run_scheduled_tasks(), name="scheduled_tasks"),
-                asyncio.create_task(self._run_system_monitoring(), name="system_monitoring")
+                asyncio.create_task(self._run_system_monitoring(), name="system_monitoring"),
+                asyncio.create_task(self._run_deal_sweeper(), name="deal_sweeper")
             ]
             
             self.scheduled_tasks = tasks
@@ -249,6 +258,17 @@ class AmazonDealsBot:
         except Exception as e:
             self.logger.error(f"خطأ في مراقبة النظام: {e}")
     
+    async def _run_deal_sweeper(self):
+        """إنهاء العروض منتهية الصلاحية في الخلفية"""
+        self.logger.info("⏳ بدء منهي العروض منتهية الصلاحية...")
+        
+        try:
+            await self.deals_engine.deal_sweeper.run()
+        except asyncio.CancelledError:
+            self.logger.info("تم إيقاف منهي العروض")
+        except Exception as e:
+            self.logger.error(f"خطأ في منهي العروض: {e}")
+    
     def _get_monitoring_interval(self) -> int:
         """الحصول على فترة المراقبة حسب الوقت"""
         current_hour = datetime.now().hour
@@ -266,9 +286,14 @@ class AmazonDealsBot:
             # فلترة العروض عالية الجودة فقط
             quality_deals = [deal for deal in deals if deal.get('quality_score', 0) >= 6.0]
             
+            # إبقاء أفضل نسخة من كل منتج (ألوان ومقاسات) واستبعاد ما بُث مؤخراً
+            quality_deals = self.duplicate_detector.filter(quality_deals)
+            
             if quality_deals:
                 # إرسال العروض عبر التليجرام
                 broadcast_stats = await self.telegram_bot.broadcast_deals(quality_deals)
+                # تذكّر ما وصل فعلاً فقط كي لا يُحجب عرض فشل إرساله في الدورات القادمة
+                self.duplicate_detector.remember(broadcast_stats.get('sent_deals', []))
                 
                 self.logger.info(
                     f"📤 تم بث {len(quality_deals)} عرض - "
@@ -352,9 +377,21 @@ class AmazonDealsBot:
                 metadata=stats
             )
             
+            # حفظ إحصائيات الاستعلامات لأمر query-stats
+            self._dump_query_stats()
+            
         except Exception as e:
             self.logger.error(f"خطأ في تحديث الإحصائيات: {e}")
     
+    def _dump_query_stats(self):
+        """حفظ إحصائيات أداء الاستعلامات في ملف"""
+        try:
+            if self.db_manager.query_stats.enabled:
+                path = self.db_manager.query_stats.dump()
+                self.logger.debug(f"تم حفظ إحصائيات الاستعلامات في {path}")
+        except Exception as e:
+            self.logger.error(f"خطأ في حفظ إحصائيات الاستعلامات: {e}")
+    
     async def _check_system_health(self):
         """فحص صحة النظام"""
         try:
@@ -425,6 +462,7 @@ class AmazonDealsBot:
             
             # إغلاق قاعدة البيانات
             if self.db_manager:
+                self._dump_query_stats()
                 self.db_manager.close()
             
             self.is_running = False
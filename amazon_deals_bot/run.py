@@ -7,6 +7,7 @@
 
 import asyncio
 import argparse
+import json
 import sys
 import os
 from pathlib import Path
@@ -15,6 +16,8 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent / 'src'))
 
 from main import AmazonDealsBot, setup_database
+from database import DatabaseManager
+import yaml
 
 def print_banner():
     """طباعة شعار النظام"""
@@ -124,6 +127,76 @@ async def test_system():
     
     return True
 
+async def run_backfill(config_path: str, days=None):
+    """إعادة بناء ملخص الأسعار اليومي من سجل الأسعار"""
+    print("📈 بدء بناء ملخص الأسعار اليومي...")
+    
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file)
+        
+        db_manager = DatabaseManager(config)
+        try:
+            rows = db_manager.backfill_price_daily(days=days)
+        finally:
+            db_manager.close()
+        
+        print(f"✅ تم بناء ملخص الأسعار اليومي ({rows} سجل)")
+        
+    except Exception as e:
+        print(f"❌ خطأ في بناء ملخص الأسعار: {e}")
+        return False
+    
+    return True
+
+def run_export(config_path: str, tables=None):
+    """تصدير جداول الأسعار والعروض والمنتجات إلى ملفات Parquet/Arrow"""
+    from columnar_export import ColumnarExporter
+    
+    print("📦 بدء التصدير العمودي...")
+    
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file)
+        
+        export_config = config.get('maintenance', {}).get('export', {})
+        db_manager = DatabaseManager(config)
+        try:
+            report = ColumnarExporter(db_manager, export_config).export(tables)
+        finally:
+            db_manager.close()
+        
+        for table, table_report in report.items():
+            print(f"✅ {table}: {table_report['rows']} سجل في {table_report['files']} ملف "
+                  f"(آخر معرف {table_report['last_id']})")
+        
+    except ImportError:
+        print("❌ أمر التصدير يتطلب مكتبة pyarrow: pip install pyarrow")
+        return False
+    except Exception as e:
+        print(f"❌ خطأ في التصدير: {e}")
+        return False
+    
+    return True
+
+def show_query_stats(config_path: str, top: int, order_by: str):
+    """عرض أعلى الاستعلامات من آخر ملف إحصائيات محفوظ"""
+    from query_stats import format_top_statements
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    
+    instrumentation_config = config.get('database', {}).get('instrumentation', {})
+    dump_path = Path(instrumentation_config.get('dump_path', 'logs/query_stats.json'))
+    if not dump_path.exists():
+        print(f"❌ لا توجد إحصائيات استعلامات بعد: {dump_path}")
+        return False
+    
+    data = json.loads(dump_path.read_text(encoding='utf-8'))
+    print(f"📈 أعلى {top} استعلامات حسب {order_by} (حتى {data['generated_at']}):")
+    print(format_top_statements(data['statements'], limit=top, order_by=order_by))
+    return True
+
 def show_status():
     """عرض حالة النظام"""
     print("📊 حالة النظام:")
@@ -160,12 +233,18 @@ def show_help():
   start     - تشغيل النظام
   test      - اختبار النظام
   status    - عرض حالة النظام
+  backfill  - بناء ملخص الأسعار اليومي من السجل الحالي
+  query-stats - عرض أبطأ الاستعلامات المقاسة
+  export    - تصدير الأسعار والعروض والمنتجات إلى Parquet/Arrow (تزايدي)
   help      - عرض هذه المساعدة
 
 أمثلة:
   python run.py setup    # إعداد النظام
   python run.py start    # تشغيل النظام
   python run.py test     # اختبار النظام
+  python run.py backfill --days 90  # بناء ملخص آخر 90 يوماً
+  python run.py query-stats --top 20 --sort avg_ms  # أعلى 20 استعلاماً حسب متوسط الزمن
+  python run.py export --tables price_history deals  # تصدير السجلات الجديدة منذ آخر تشغيل
 
 متطلبات التشغيل:
   - Python 3.8+
@@ -186,7 +265,7 @@ async def main():
     
     parser.add_argument(
         'command',
-        choices=['setup', 'start', 'test', 'status', 'help'],
+        choices=['setup', 'start', 'test', 'status', 'backfill', 'query-stats', 'export', 'help'],
         help='الأمر المطلوب تنفيذه'
     )
     
@@ -196,6 +275,35 @@ async def main():
         help='مسار ملف الإعدادات'
     )
     
+    parser.add_argument(
+        '--days',
+        type=int,
+        default=None,
+        help='عدد الأيام لأمر backfill (الافتراضي: كامل السجل)'
+    )
+    
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=10,
+        help='عدد الاستعلامات لأمر query-stats'
+    )
+    
+    parser.add_argument(
+        '--sort',
+        default='total_ms',
+        choices=['total_ms', 'avg_ms', 'max_ms', 'calls', 'rows', 'pool_wait_ms'],
+        help='مقياس الترتيب لأمر query-stats'
+    )
+    
+    parser.add_argument(
+        '--tables',
+        nargs='+',
+        choices=['price_history', 'deals', 'products'],
+        default=None,
+        help='الجداول لأمر export (الافتراضي: جميعها)'
+    )
+    
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -223,6 +331,18 @@ async def main():
     elif args.command == 'status':
         show_status()
         
+    elif args.command == 'backfill':
+        success = await run_backfill(args.config, args.days)
+        sys.exit(0 if success else 1)
+        
+    elif args.command == 'query-stats':
+        success = show_query_stats(args.config, args.top, args.sort)
+        sys.exit(0 if success else 1)
+        
+    elif args.command == 'export':
+        success = run_export(args.config, args.tables)
+        sys.exit(0 if success else 1)
+        
     elif args.command == 'help':
         show_help()
         
@@ -49,20 +49,78 @@ CREATE TABLE IF NOT EXISTS products (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- جدول تاريخ الأسعار
+-- مقسم شهرياً حسب recorded_at: حذف شهر كامل يتم بـ DROP PARTITION بدلاً من DELETE
+-- الأقسام الشهرية تُنشأ وتُحذف تلقائياً بواسطة PartitionManager
+-- ملاحظة: الجداول المقسمة لا تدعم FOREIGN KEY، لذا يجب أن يتضمن المفتاح الأساسي recorded_at
 CREATE TABLE IF NOT EXISTS price_history (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     product_id INT NOT NULL,
     price DECIMAL(10,2) NOT NULL,
     currency VARCHAR(3) DEFAULT 'SAR',
     availability_status VARCHAR(50),
     seller_name VARCHAR(255),
     is_prime BOOLEAN DEFAULT FALSE,
-    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
+    PRIMARY KEY (id, recorded_at),
     INDEX idx_price_product (product_id),
     INDEX idx_price_recorded (recorded_at),
     INDEX idx_price_availability (availability_status),
-    INDEX idx_price_prime (is_prime),
+    INDEX idx_price_prime (is_prime)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE (UNIX_TIMESTAMP(recorded_at)) (
+    PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2025-07-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- جدول ملخص الأسعار اليومي (يُحدّث تراكمياً مع كل سجل سعر)
+CREATE TABLE IF NOT EXISTS price_daily (
+    product_id INT NOT NULL,
+    price_date DATE NOT NULL,
+    min_price DECIMAL(10,2) NOT NULL,
+    max_price DECIMAL(10,2) NOT NULL,
+    avg_price DECIMAL(10,2) NOT NULL,
+    price_sum DECIMAL(14,2) NOT NULL,
+    close_price DECIMAL(10,2) NOT NULL,
+    close_at TIMESTAMP NULL,
+    sample_count INT NOT NULL DEFAULT 0,
+    
+    PRIMARY KEY (product_id, price_date),
+    INDEX idx_price_daily_date (price_date),
+    
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- جدول إحصائيات الأسعار التراكمية لكل منتج (تمثيل ثنائي مضغوط، انظر PriceStats)
+CREATE TABLE IF NOT EXISTS price_stats (
+    asin VARCHAR(20) NOT NULL,
+    stats_data VARBINARY(255) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (asin)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- بصمات مدخلات التحليل لكل منتج (المنتجات غير المتغيرة لا يُعاد تحليلها، انظر ProductChangeDetector)
+CREATE TABLE IF NOT EXISTS product_fingerprints (
+    asin VARCHAR(20) NOT NULL,
+    fingerprint CHAR(16) NOT NULL,
+    analyzed_at TIMESTAMP NOT NULL,
+    last_seen_at TIMESTAMP NOT NULL,
+    
+    PRIMARY KEY (asin)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- أرشيف الأسعار طويل المدى: فترات تغير السعر لكل منتج (تمثيل ثنائي مضغوط، انظر PriceRuns)
+CREATE TABLE IF NOT EXISTS price_archive (
+    product_id INT NOT NULL,
+    runs_data MEDIUMBLOB NOT NULL,
+    run_count INT NOT NULL DEFAULT 0,
+    all_time_low DECIMAL(10,2) NOT NULL,
+    first_seen_at TIMESTAMP NULL,
+    last_seen_at TIMESTAMP NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (product_id),
     
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -74,18 +132,23 @@ CREATE TABLE IF NOT EXISTS deals (
     deal_type VARCHAR(50) NOT NULL,
     original_price DECIMAL(10,2) NOT NULL,
     deal_price DECIMAL(10,2) NOT NULL,
+    opening_price DECIMAL(10,2) NULL,  -- سعر فتح العرض (أساس المقارنة في دورة الحياة)
     discount_percentage DECIMAL(5,2) NOT NULL,
     discount_amount DECIMAL(10,2) NOT NULL,
     start_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     end_date TIMESTAMP NULL,
+    last_seen_at TIMESTAMP NULL,  -- آخر تأكيد لوجود العرض (لتقدير أعمار العروض)
+    expiry_reason VARCHAR(20) NULL,  -- سبب الإنهاء: ended (اختفى عند الفحص)، replaced (سعر جديد)، timeout (انقضى موعده المقدر)
     deal_status VARCHAR(20) DEFAULT 'active',
     max_quantity INT,
     deal_url VARCHAR(500),
-    quality_score DECIMAL(4,2) DEFAULT 0,
+    quality_score DECIMAL(4,2) NOT NULL DEFAULT 0,  -- غير فارغ حتى يخدم idx_deal_active_rank البحث والترتيب
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     
     INDEX idx_deal_product (product_id),
+    INDEX idx_deal_product_status (product_id, deal_status),
+    INDEX idx_deal_active_rank (deal_status, quality_score, discount_percentage, id),
     INDEX idx_deal_status (deal_status),
     INDEX idx_deal_type (deal_type),
     INDEX idx_deal_discount (discount_percentage),
@@ -153,6 +216,7 @@ CREATE TABLE IF NOT EXISTS sent_messages (
     INDEX idx_message_status (delivery_status),
     INDEX idx_message_type (message_type),
     INDEX idx_message_sent (sent_at),
+    INDEX idx_message_status_sent (delivery_status, sent_at),
     
     FOREIGN KEY (deal_id) REFERENCES deals(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -171,6 +235,8 @@ CREATE TABLE IF NOT EXISTS activity_log (
     INDEX idx_activity_type (activity_type),
     INDEX idx_activity_severity (severity),
     INDEX idx_activity_created (created_at),
+    INDEX idx_activity_severity_created (severity, created_at),
+    INDEX idx_activity_type_created (activity_type, created_at),
     INDEX idx_activity_related (related_table, related_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -282,35 +348,19 @@ BEGIN
     SET NEW.last_updated = CURRENT_TIMESTAMP;
 END //
 
-CREATE TRIGGER log_new_deal 
-AFTER INSERT ON deals
-FOR EACH ROW
-BEGIN
-    INSERT INTO activity_log (activity_type, description, related_table, related_id, metadata)
-    VALUES ('deal_created', CONCAT('تم إنشاء عرض جديد بخصم ', NEW.discount_percentage, '%'), 'deals', NEW.id, 
-            JSON_OBJECT('deal_type', NEW.deal_type, 'discount', NEW.discount_percentage, 'quality_score', NEW.quality_score));
-END //
-
 DELIMITER ;
 
+-- العروض الجديدة تُسجل من التطبيق (deal_found) عبر مسجل النشاط المؤجل
+DROP TRIGGER IF EXISTS log_new_deal;
+
 -- إنشاء events للصيانة التلقائية
 SET GLOBAL event_scheduler = ON;
 
-DELIMITER //
+-- تنظيف price_history يتم عبر حذف الأقسام الشهرية (PartitionManager)
+-- والتنظيف على دفعات (CleanupEngine) بدلاً من DELETE بربط ذاتي
+DROP EVENT IF EXISTS cleanup_old_price_history;
 
-CREATE EVENT IF NOT EXISTS cleanup_old_price_history
-ON SCHEDULE EVERY 1 DAY
-STARTS CURRENT_TIMESTAMP
-DO
-BEGIN
-    -- حذف سجلات الأسعار الأقدم من 90 يوم (الاحتفاظ بسجل واحد يومياً)
-    DELETE ph1 FROM price_history ph1
-    INNER JOIN price_history ph2 
-    WHERE ph1.product_id = ph2.product_id
-    AND ph1.recorded_at < DATE_SUB(NOW(), INTERVAL 90 DAY)
-    AND DATE(ph1.recorded_at) = DATE(ph2.recorded_at)
-    AND ph1.id < ph2.id;
-END //
+DELIMITER //
 
 CREATE EVENT IF NOT EXISTS cleanup_old_activity_log
 ON SCHEDULE EVERY 1 DAY
@@ -0,0 +1,215 @@
+-- إعداد قاعدة بيانات SQLite المدمجة لنظام Amazon Deals Bot
+-- مكافئ setup_database.sql للتثبيتات الصغيرة والاختبارات (database.engine: sqlite)
+-- تاريخ الإنشاء: 19 أكتوبر 2026
+-- ملاحظة: لا توجد أقسام لجدول price_history؛ التنظيف يتم عبر CleanupEngine
+
+-- جدول الفئات
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    name_ar VARCHAR(100),
+    description TEXT,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_category_active ON categories (is_active);
+
+-- جدول المنتجات
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asin VARCHAR(20) NOT NULL UNIQUE,
+    title VARCHAR(500) NOT NULL,
+    title_ar VARCHAR(500),
+    description TEXT,
+    brand VARCHAR(255),
+    category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL,
+    image_url VARCHAR(500),
+    amazon_url VARCHAR(500),
+    rating DECIMAL(3,2),
+    review_count INTEGER DEFAULT 0,
+    is_active BOOLEAN DEFAULT 1,
+    first_seen TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    last_updated TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_product_category ON products (category_id);
+CREATE INDEX IF NOT EXISTS idx_product_active ON products (is_active);
+CREATE INDEX IF NOT EXISTS idx_product_last_updated ON products (last_updated);
+
+-- جدول تاريخ الأسعار
+CREATE TABLE IF NOT EXISTS price_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    price DECIMAL(10,2) NOT NULL,
+    currency VARCHAR(3) DEFAULT 'SAR',
+    availability_status VARCHAR(50),
+    seller_name VARCHAR(255),
+    is_prime BOOLEAN DEFAULT 0,
+    recorded_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_price_product ON price_history (product_id, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_price_recorded ON price_history (recorded_at);
+
+-- جدول ملخص الأسعار اليومي
+CREATE TABLE IF NOT EXISTS price_daily (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    price_date DATE NOT NULL,
+    min_price DECIMAL(10,2) NOT NULL,
+    max_price DECIMAL(10,2) NOT NULL,
+    avg_price DECIMAL(10,2) NOT NULL,
+    price_sum DECIMAL(14,2) NOT NULL,
+    close_price DECIMAL(10,2) NOT NULL,
+    close_at TIMESTAMP NULL,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, price_date)
+);
+CREATE INDEX IF NOT EXISTS idx_price_daily_date ON price_daily (price_date);
+
+-- جدول إحصائيات الأسعار التراكمية لكل منتج
+CREATE TABLE IF NOT EXISTS price_stats (
+    asin VARCHAR(20) NOT NULL PRIMARY KEY,
+    stats_data BLOB NOT NULL,
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- بصمات مدخلات التحليل لكل منتج
+CREATE TABLE IF NOT EXISTS product_fingerprints (
+    asin VARCHAR(20) NOT NULL PRIMARY KEY,
+    fingerprint CHAR(16) NOT NULL,
+    analyzed_at TIMESTAMP NOT NULL,
+    last_seen_at TIMESTAMP NOT NULL
+);
+
+-- أرشيف الأسعار طويل المدى
+CREATE TABLE IF NOT EXISTS price_archive (
+    product_id INTEGER NOT NULL PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    runs_data BLOB NOT NULL,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    all_time_low DECIMAL(10,2) NOT NULL,
+    first_seen_at TIMESTAMP NULL,
+    last_seen_at TIMESTAMP NULL,
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- جدول العروض
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    deal_type VARCHAR(50) NOT NULL,
+    original_price DECIMAL(10,2) NOT NULL,
+    deal_price DECIMAL(10,2) NOT NULL,
+    opening_price DECIMAL(10,2) NULL,  -- سعر فتح العرض (أساس المقارنة في دورة الحياة)
+    discount_percentage DECIMAL(5,2) NOT NULL,
+    discount_amount DECIMAL(10,2) NOT NULL,
+    start_date TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    end_date TIMESTAMP NULL,
+    last_seen_at TIMESTAMP NULL,  -- آخر تأكيد لوجود العرض (لتقدير أعمار العروض)
+    expiry_reason VARCHAR(20) NULL,  -- سبب الإنهاء: ended (اختفى عند الفحص)، replaced (سعر جديد)، timeout (انقضى موعده المقدر)
+    deal_status VARCHAR(20) DEFAULT 'active',
+    max_quantity INTEGER,
+    deal_url VARCHAR(500),
+    quality_score DECIMAL(4,2) NOT NULL DEFAULT 0,  -- غير فارغ حتى يخدم idx_deal_active_rank البحث والترتيب
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_deal_product_status ON deals (product_id, deal_status);
+CREATE INDEX IF NOT EXISTS idx_deal_active_rank ON deals (deal_status, quality_score, discount_percentage, id);
+CREATE INDEX IF NOT EXISTS idx_deal_dates ON deals (start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_deal_created ON deals (created_at);
+
+-- جدول مستخدمي التليجرام
+CREATE TABLE IF NOT EXISTS telegram_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    telegram_id BIGINT NOT NULL UNIQUE,
+    username VARCHAR(50),
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    language_code VARCHAR(10) DEFAULT 'ar',
+    preferences JSON,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    last_interaction TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_user_active ON telegram_users (is_active);
+CREATE INDEX IF NOT EXISTS idx_user_last_interaction ON telegram_users (last_interaction);
+
+-- جدول قنوات التليجرام
+CREATE TABLE IF NOT EXISTS telegram_channels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    telegram_id VARCHAR(100) NOT NULL UNIQUE,
+    channel_name VARCHAR(200),
+    channel_type VARCHAR(20) DEFAULT 'channel',
+    admin_user_id BIGINT,
+    settings JSON,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_channel_active ON telegram_channels (is_active);
+
+-- جدول الرسائل المرسلة
+CREATE TABLE IF NOT EXISTS sent_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deal_id INTEGER REFERENCES deals(id) ON DELETE SET NULL,
+    recipient_id VARCHAR(100) NOT NULL,
+    message_id BIGINT,
+    message_type VARCHAR(50) DEFAULT 'deal_alert',
+    delivery_status VARCHAR(20) DEFAULT 'pending',
+    error_message TEXT,
+    sent_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_message_deal ON sent_messages (deal_id);
+CREATE INDEX IF NOT EXISTS idx_message_status_sent ON sent_messages (delivery_status, sent_at);
+
+-- جدول سجل النشاطات
+CREATE TABLE IF NOT EXISTS activity_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    activity_type VARCHAR(50) NOT NULL,
+    description TEXT NOT NULL,
+    related_table VARCHAR(50),
+    related_id INTEGER,
+    metadata JSON,
+    severity VARCHAR(20) DEFAULT 'info',
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_activity_created ON activity_log (created_at);
+CREATE INDEX IF NOT EXISTS idx_activity_severity_created ON activity_log (severity, created_at);
+CREATE INDEX IF NOT EXISTS idx_activity_type_created ON activity_log (activity_type, created_at);
+
+-- جدول إحصائيات النظام
+CREATE TABLE IF NOT EXISTS system_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stat_date DATE NOT NULL UNIQUE,
+    products_scraped INTEGER DEFAULT 0,
+    deals_found INTEGER DEFAULT 0,
+    messages_sent INTEGER DEFAULT 0,
+    active_users INTEGER DEFAULT 0,
+    active_channels INTEGER DEFAULT 0,
+    errors_count INTEGER DEFAULT 0,
+    runtime_hours DECIMAL(8,2) DEFAULT 0,
+    metadata JSON,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- إدراج الفئات الأساسية
+INSERT OR IGNORE INTO categories (name, name_ar, description) VALUES
+('electronics', 'الإلكترونيات', 'الأجهزة الإلكترونية والتقنية'),
+('computers', 'أجهزة الكمبيوتر', 'أجهزة الكمبيوتر واللابتوب والإكسسوارات'),
+('mobile-phones', 'الهواتف المحمولة', 'الهواتف الذكية والإكسسوارات'),
+('home-kitchen', 'المنزل والمطبخ', 'أدوات المنزل والمطبخ'),
+('fashion', 'الأزياء', 'الملابس والأحذية والإكسسوارات'),
+('books', 'الكتب', 'الكتب والمجلات'),
+('sports-outdoors', 'الرياضة والهواء الطلق', 'المعدات الرياضية وأدوات الهواء الطلق'),
+('beauty', 'الجمال', 'منتجات التجميل والعناية'),
+('automotive', 'السيارات', 'قطع غيار وإكسسوارات السيارات'),
+('health-household', 'الصحة والمنزل', 'المنتجات الصحية وأدوات المنزل');
+
+-- تحديث وقت آخر تعديل للمنتج (مكافئ ON UPDATE CURRENT_TIMESTAMP)
+CREATE TRIGGER IF NOT EXISTS update_product_timestamp
+AFTER UPDATE ON products
+FOR EACH ROW WHEN NEW.last_updated = OLD.last_updated
+BEGIN
+    UPDATE products SET last_updated = datetime('now', 'localtime') WHERE id = NEW.id;
+END;
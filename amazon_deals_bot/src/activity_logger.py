@@ -0,0 +1,144 @@
+"""
+وحدة تسجيل النشاط المؤجل (طابور في الذاكرة يُكتب على دفعات)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+import json
+import logging
+import queue
+import threading
+
+class ActivityLogger:
+    """مسجل نشاط بكتابة مؤجلة: طابور محدود وخيط خلفي يكتب الدفعات"""
+
+    INSERT_QUERY = """
+    INSERT INTO activity_log (activity_type, description, related_table,
+                            related_id, metadata, severity)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    def __init__(self, database_manager, activity_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة المسجل
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            activity_config: إعدادات المسجل (database.activity_log)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        activity_config = activity_config or {}
+        self.enabled = activity_config.get('write_behind', True)
+        self.batch_size = activity_config.get('batch_size', 200)
+        self.flush_interval = activity_config.get('flush_interval', 2.0)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=activity_config.get('queue_size', 10000))
+        # يمنع تداخل كتابة الدفعات بين الخيط الخلفي والتفريغ اليدوي
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'queued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0
+        }
+
+    def log(self, activity_type: str, description: str,
+            related_table: Optional[str] = None,
+            related_id: Optional[int] = None,
+            metadata: Optional[Dict] = None,
+            severity: str = 'info'):
+        """إضافة نشاط للطابور دون انتظار قاعدة البيانات"""
+        metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
+        row = (activity_type, description, related_table, related_id, metadata_json, severity)
+
+        if not self.enabled:
+            self._write([row])
+            return
+
+        self._ensure_started()
+
+        try:
+            self._queue.put_nowait(row)
+            self.stats['queued'] += 1
+        except queue.Full:
+            # تحت الضغط نفضل فقدان سجل على إبطاء مسار المعالجة
+            self.stats['dropped'] += 1
+            return
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        كتابة جميع السجلات المنتظرة
+
+        Returns:
+            عدد السجلات المكتوبة
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                written += self._write(batch)
+        return written
+
+    def close(self):
+        """إيقاف الخيط الخلفي وكتابة ما تبقى"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """إحصائيات المسجل"""
+        return dict(self.stats, pending=self._queue.qsize())
+
+    def _ensure_started(self):
+        """تشغيل الخيط الخلفي عند أول استخدام"""
+        if self._thread is None and not self._stop.is_set():
+            self._thread = threading.Thread(
+                target=self._run, name='activity-log-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """حلقة الخيط الخلفي: تفريغ عند امتلاء الدفعة أو انقضاء الفترة"""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"خطأ في كتابة سجل النشاط: {e}")
+
+    def _drain(self) -> List[Tuple]:
+        """سحب دفعة من الطابور"""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Tuple]) -> int:
+        """كتابة دفعة في قاعدة البيانات"""
+        try:
+            self.db.execute_many(self.INSERT_QUERY, batch)
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+            return len(batch)
+        except Exception as e:
+            self.logger.error(f"خطأ في تسجيل النشاط: {e}")
+            self.stats['failed'] += len(batch)
+            return 0
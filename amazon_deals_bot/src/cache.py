@@ -0,0 +1,94 @@
+"""
+وحدة التخزين المؤقت في الذاكرة
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, Optional, Any, Callable, Hashable
+from collections import OrderedDict
+import threading
+import time
+
+class TTLCache:
+    """ذاكرة مؤقتة بمدة صلاحية وحد أقصى للعناصر (إزالة الأقدم استخداماً)"""
+
+    def __init__(self, ttl: float = 60, max_entries: int = 256):
+        """
+        تهيئة الذاكرة المؤقتة
+
+        Args:
+            ttl: مدة صلاحية العنصر بالثواني
+            max_entries: الحد الأقصى لعدد العناصر
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # يزداد مع كل إبطال حتى لا تُخزن قيمة حُمّلت قبل الإبطال
+        self._generation = 0
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0
+        }
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """الحصول على قيمة صالحة أو None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """تخزين قيمة"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        قراءة عبر الذاكرة المؤقتة: تحميل القيمة عند عدم وجودها
+
+        Args:
+            key: المفتاح
+            loader: دالة تحميل القيمة
+
+        Returns:
+            القيمة المخزنة أو المحملة
+        """
+        value = self.get(key)
+        if value is None:
+            generation = self._generation
+            value = loader()
+            if generation == self._generation:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """إبطال عنصر محدد أو جميع العناصر"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._generation += 1
+            self.stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """إحصائيات الذاكرة المؤقتة"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries))
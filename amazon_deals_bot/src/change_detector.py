@@ -0,0 +1,206 @@
+"""
+وحدة كشف تغير المنتجات (إعادة التحليل للمنتجات المتغيرة فقط)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta
+import hashlib
+import logging
+import threading
+
+# مدخلات التحليل التي يتغير بتغيرها قرار العرض أو نقاطه
+FINGERPRINT_FIELDS = (
+    'current_price', 'original_price', 'discount_percentage', 'rating',
+    'review_count', 'availability', 'is_prime', 'title', 'brand'
+)
+
+class ProductChangeDetector:
+    """
+    بصمة لمدخلات التحليل لكل ASIN (في الذاكرة ومحفوظة في product_fingerprints)
+
+    المنتج الذي لم تتغير بصمته منذ آخر تحليل لا يُعاد تحليله ولا يُكتب؛ يُحدَّث
+    last_seen_at له ولعرضه النشط فقط بتحديث مجمع. البصمة تنتهي بعد max_age حتى يُعاد تحليل كل
+    منتج دورياً (تجديد العروض النشطة وملخص الأسعار اليومي).
+    """
+
+    def __init__(self, database_manager, change_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة الكاشف
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            change_config: الإعدادات (deals.change_detection)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        change_config = change_config or {}
+        self.enabled = change_config.get('enabled', True)
+        self.max_age = timedelta(hours=change_config.get('max_age_hours', 6))
+        self.batch_size = change_config.get('batch_size', 500)
+
+        # ASIN -> (البصمة، وقت آخر تحليل)
+        self._fingerprints: Dict[str, Tuple[str, datetime]] = {}
+        # بصمات المنتجات المتغيرة محسوبة قبل التحليل (التحليل يعدل بيانات المنتج)
+        self._pending: Dict[str, str] = {}
+        self._dirty = set()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(product: Dict[str, Any]) -> str:
+        """بصمة مدخلات التحليل لمنتج"""
+        values = '\x1f'.join(repr(product.get(field)) for field in FINGERPRINT_FIELDS)
+        return hashlib.blake2b(values.encode('utf-8'), digest_size=8).hexdigest()
+
+    def load(self) -> int:
+        """
+        تحميل البصمات غير المنتهية (بترقيم keyset على ASIN)
+
+        Returns:
+            عدد البصمات المحملة
+        """
+        if not self.enabled:
+            return 0
+
+        query = """
+        SELECT asin, fingerprint, analyzed_at FROM product_fingerprints
+        WHERE asin > %s AND analyzed_at >= %s
+        ORDER BY asin
+        LIMIT %s
+        """
+
+        cutoff = datetime.now() - self.max_age
+        last_asin = ''
+        loaded = 0
+
+        try:
+            while True:
+                rows = self.db.execute_query(query, (last_asin, cutoff, self.batch_size), fetch=True)
+                if not rows:
+                    break
+
+                with self._lock:
+                    for asin, fingerprint, analyzed_at in rows:
+                        self._fingerprints[asin] = (fingerprint, analyzed_at)
+                loaded += len(rows)
+
+                last_asin = rows[-1][0]
+                if len(rows) < self.batch_size:
+                    break
+
+            self.logger.info(f"تم تحميل بصمات {loaded} منتج")
+
+        except Exception as e:
+            self.logger.error(f"خطأ في تحميل بصمات المنتجات: {e}")
+
+        return loaded
+
+    def split(self, products: List[Dict[str, Any]],
+              now: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        فصل المنتجات المتغيرة عن غير المتغيرة
+
+        المنتج غير المتغير يُسجل للتحديث المجمع لـ last_seen_at. المنتج المتغير لا
+        تُحدَّث بصمته حتى يُستدعى record بعد نجاح معالجته.
+
+        Args:
+            products: المنتجات المستخرجة
+            now: الوقت الحالي
+
+        Returns:
+            (المنتجات المتغيرة، المنتجات غير المتغيرة)
+        """
+        if not self.enabled:
+            return products, []
+
+        cutoff = (now or datetime.now()) - self.max_age
+        changed, unchanged = [], []
+
+        with self._lock:
+            for product in products:
+                asin = product.get('asin')
+                if not asin:
+                    changed.append(product)
+                    continue
+                fingerprint = self.fingerprint(product)
+                known = self._fingerprints.get(asin)
+                if known and known[1] >= cutoff and known[0] == fingerprint:
+                    unchanged.append(product)
+                    self._seen.add(asin)
+                else:
+                    changed.append(product)
+                    self._pending[asin] = fingerprint
+
+        return changed, unchanged
+
+    def record(self, product: Dict[str, Any], analyzed_at: Optional[datetime] = None):
+        """تسجيل بصمة منتج بعد تحليله وحفظه"""
+        asin = product.get('asin')
+        if not self.enabled or not asin:
+            return
+
+        with self._lock:
+            fingerprint = self._pending.pop(asin, None) or self.fingerprint(product)
+            self._fingerprints[asin] = (fingerprint, analyzed_at or datetime.now())
+            self._dirty.add(asin)
+            self._seen.discard(asin)
+
+    def flush(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        حفظ البصمات الجديدة وتحديث last_seen_at للمنتجات غير المتغيرة وعروضها النشطة دفعة واحدة
+
+        Returns:
+            عدد البصمات المحفوظة وعدد المنتجات المحدثة
+        """
+        result = {'saved': 0, 'touched': 0}
+        if not self.enabled:
+            return result
+
+        now = now or datetime.now()
+        with self._lock:
+            rows = [(asin,) + self._fingerprints[asin] + (now,) for asin in self._dirty]
+            seen = list(self._seen)
+            self._dirty = set()
+            self._seen = set()
+
+        upsert_query = """
+        INSERT INTO product_fingerprints (asin, fingerprint, analyzed_at, last_seen_at)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            fingerprint = VALUES(fingerprint),
+            analyzed_at = VALUES(analyzed_at),
+            last_seen_at = VALUES(last_seen_at)
+        """
+
+        try:
+            self.db.execute_many(upsert_query, rows)
+            result['saved'] = len(rows)
+
+            for start in range(0, len(seen), self.batch_size):
+                batch = seen[start:start + self.batch_size]
+                placeholders = ', '.join(['%s'] * len(batch))
+                self.db.execute_query(
+                    f"UPDATE product_fingerprints SET last_seen_at = %s WHERE asin IN ({placeholders})",
+                    (now, *batch)
+                )
+                # العرض النشط لمنتج غير متغير لا يزال قائماً (أعمار العروض تُقاس بآخر تأكيد)
+                deals_query = f"""
+                UPDATE deals SET last_seen_at = %s
+                WHERE deal_status = 'active'
+                    AND product_id IN (SELECT id FROM products WHERE asin IN ({placeholders}))
+                """
+                self.db.execute_query(deals_query, (now, *batch))
+                result['touched'] += len(batch)
+
+        except Exception as e:
+            self.logger.error(f"خطأ في حفظ بصمات المنتجات: {e}")
+            with self._lock:
+                self._dirty.update(row[0] for row in rows)
+                self._seen.update(seen[result['touched']:])
+
+        return result
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
@@ -127,7 +127,7 @@ class ChannelManager:
             ORDER BY created_at DESC
             """
             
-            results = self.db.execute_query(query, fetch=True)
+            results = self.db.execute_read(query)
             
             channels = []
             for row in results:
@@ -154,7 +154,9 @@ class ChannelManager:
             WHERE telegram_id = %s AND is_active = 1
             """
             
-            results = self.db.execute_query(query, (user_id,), fetch=True)
+            # بعد تحديث التفضيلات تُقرأ من الخادم الرئيسي (read-your-writes)
+            results = self.db.execute_read(query, (user_id,),
+                                           consistency_key=('user_preferences', user_id))
             
             if results:
                 preferences = json.loads(results[0][0]) if results[0][0] else {}
@@ -185,6 +187,7 @@ class ChannelManager:
             
             preferences_json = json.dumps(preferences, ensure_ascii=False)
             self.db.execute_query(query, (preferences_json, user_id))
+            self.db.mark_written(('user_preferences', user_id))
             
             self.logger.info(f"تم تحديث تفضيلات المستخدم: {user_id}")
             return True
@@ -274,7 +277,7 @@ class ChannelManager:
             WHERE is_active = 1 AND preferences IS NOT NULL
             """
             
-            results = self.db.execute_query(query, fetch=True)
+            results = self.db.execute_read(query)
             
             interested_users = []
             
@@ -364,35 +367,7 @@ class ChannelManager:
     async def get_channel_stats(self) -> Dict[str, Any]:
         """الحصول على إحصائيات القنوات"""
         try:
-            stats = {}
-            
-            # عدد القنوات النشطة
-            query = "SELECT COUNT(*) FROM telegram_channels WHERE is_active = 1"
-            result = self.db.execute_query(query, fetch=True)
-            stats['active_channels'] = result[0][0] if result else 0
-            
-            # عدد المستخدمين النشطين
-            query = "SELECT COUNT(*) FROM telegram_users WHERE is_active = 1"
-            result = self.db.execute_query(query, fetch=True)
-            stats['active_users'] = result[0][0] if result else 0
-            
-            # عدد الرسائل المرسلة اليوم
-            query = """
-            SELECT COUNT(*) FROM sent_messages 
-            WHERE DATE(sent_at) = CURDATE() AND delivery_status = 'sent'
-            """
-            result = self.db.execute_query(query, fetch=True)
-            stats['messages_today'] = result[0][0] if result else 0
-            
-            # عدد الرسائل الفاشلة اليوم
-            query = """
-            SELECT COUNT(*) FROM sent_messages 
-            WHERE DATE(sent_at) = CURDATE() AND delivery_status = 'failed'
-            """
-            result = self.db.execute_query(query, fetch=True)
-            stats['failed_messages_today'] = result[0][0] if result else 0
-            
-            return stats
+            return self.db.stats_service.get_channel_stats()
             
         except Exception as e:
             self.logger.error(f"خطأ في الحصول على إحصائيات القنوات: {e}")
@@ -430,35 +405,7 @@ class ChannelManager:
     async def get_user_activity_stats(self, days: int = 7) -> Dict[str, Any]:
         """الحصول على إحصائيات نشاط المستخدمين"""
         try:
-            start_date = datetime.now() - timedelta(days=days)
-            
-            stats = {}
-            
-            # المستخدمين النشطين
-            query = """
-            SELECT COUNT(*) FROM telegram_users 
-            WHERE last_interaction >= %s AND is_active = 1
-            """
-            result = self.db.execute_query(query, (start_date,), fetch=True)
-            stats['active_users'] = result[0][0] if result else 0
-            
-            # المستخدمين الجدد
-            query = """
-            SELECT COUNT(*) FROM telegram_users 
-            WHERE created_at >= %s
-            """
-            result = self.db.execute_query(query, (start_date,), fetch=True)
-            stats['new_users'] = result[0][0] if result else 0
-            
-            # الاشتراكات الجديدة
-            query = """
-            SELECT COUNT(*) FROM activity_log 
-            WHERE activity_type = 'user_subscribed' AND created_at >= %s
-            """
-            result = self.db.execute_query(query, (start_date,), fetch=True)
-            stats['new_subscriptions'] = result[0][0] if result else 0
-            
-            return stats
+            return self.db.stats_service.get_user_activity_stats(days)
             
         except Exception as e:
             self.logger.error(f"خطأ في الحصول على إحصائيات النشاط: {e}")
@@ -0,0 +1,249 @@
+"""
+وحدة تنظيف البيانات القديمة على دفعات صغيرة
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple, Callable
+import logging
+import time
+from datetime import datetime, timedelta
+
+class CleanupEngine:
+    """محرك تنظيف البيانات القديمة بدفعات مرتبة حسب المفتاح الأساسي"""
+
+    def __init__(self, database_manager, cleanup_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة محرك التنظيف
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            cleanup_config: إعدادات التنظيف (maintenance.cleanup)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        cleanup_config = cleanup_config or {}
+        self.batch_size = cleanup_config.get('batch_size', 5000)
+        self.time_budget = cleanup_config.get('time_budget', 300)
+        self.pause = cleanup_config.get('pause', 0.05)
+
+        # نقطة الاستئناف إذا انتهت الميزانية الزمنية قبل اكتمال التنظيف
+        self._resume_from_id = None
+
+    def run(self, days: int = 30,
+            progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        تشغيل التنظيف الكامل ضمن الميزانية الزمنية
+
+        Args:
+            days: عدد الأيام للاحتفاظ بالبيانات الكاملة
+            progress_callback: دالة تستقبل تقدم التنظيف بعد كل دفعة
+
+        Returns:
+            إحصائيات التنظيف
+        """
+        cutoff_date = datetime.now() - timedelta(days=days)
+        deadline = time.monotonic() + self.time_budget
+
+        report = {
+            'price_history': self.cleanup_price_history(cutoff_date, deadline, progress_callback),
+            'activity_log': self._delete_in_batches(
+                'activity_log', "created_at < %s", (cutoff_date,), deadline
+            ),
+            'deals': self._delete_in_batches(
+                'deals', "deal_status = 'expired' AND updated_at < %s", (cutoff_date,), deadline
+            )
+        }
+
+        total_deleted = sum(part['deleted'] for part in report.values())
+        self.logger.info(f"تم حذف {total_deleted} سجل من البيانات القديمة")
+
+        return report
+
+    def cleanup_price_history(self, cutoff_date: datetime, deadline: float,
+                              progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+                              ) -> Dict[str, Any]:
+        """
+        حذف سجلات الأسعار المكررة قبل تاريخ القطع مع الاحتفاظ بآخر سجل
+        لكل منتج في كل يوم
+
+        يتم المسح بنطاقات متتالية من المفتاح الأساسي، وكل دفعة حذف
+        تُنفذ في معاملة قصيرة مستقلة حتى لا تتعطل عمليات الكتابة الجارية.
+
+        Args:
+            cutoff_date: تاريخ القطع
+            deadline: نهاية الميزانية الزمنية (time.monotonic)
+            progress_callback: دالة تستقبل تقدم التنظيف
+
+        Returns:
+            إحصائيات التنظيف
+        """
+        progress = {
+            'scanned': 0,
+            'deleted': 0,
+            'batches': 0,
+            'last_id': None,
+            'completed': False
+        }
+
+        bounds = self.db.execute_query(
+            "SELECT MIN(id), MAX(id) FROM price_history WHERE recorded_at < %s",
+            (cutoff_date,), fetch=True
+        )
+        if not bounds or bounds[0][0] is None:
+            progress['completed'] = True
+            return progress
+
+        min_id, max_id = bounds[0]
+
+        # آخر سجل محتفظ به لكل (منتج، يوم) في نطاق المسح الحالي
+        kept: Dict[Tuple[int, Any], int] = {}
+
+        if self._resume_from_id and self._resume_from_id > min_id:
+            min_id = self._resume_from_id
+            kept = self._load_kept(min_id, cutoff_date)
+
+        lower_id = min_id
+        while lower_id <= max_id:
+            if time.monotonic() >= deadline:
+                self._resume_from_id = lower_id
+                self.logger.warning(
+                    f"انتهت الميزانية الزمنية لتنظيف سجلات الأسعار عند المعرف {lower_id}"
+                )
+                return progress
+
+            upper_id = lower_id + self.batch_size
+            rows = self.db.execute_query(
+                """
+                SELECT id, product_id, DATE(recorded_at) FROM price_history
+                WHERE id >= %s AND id < %s AND recorded_at < %s
+                ORDER BY id
+                """,
+                (lower_id, upper_id, cutoff_date), fetch=True
+            ) or []
+
+            to_delete = self._select_duplicates(rows, kept)
+            if to_delete:
+                try:
+                    progress['deleted'] += self._delete_ids('price_history', to_delete)
+                except Exception as e:
+                    # نقطة الاستئناف لا تتقدم حتى يُعاد مسح الدفعة التي فشل حذفها
+                    self._resume_from_id = lower_id
+                    self.logger.error(f"خطأ في حذف سجلات الأسعار عند المعرف {lower_id}: {e}")
+                    return progress
+
+            progress['scanned'] += len(rows)
+            progress['batches'] += 1
+            progress['last_id'] = upper_id - 1
+
+            self.logger.debug(
+                f"تنظيف سجلات الأسعار: {progress['last_id']}/{max_id} - "
+                f"تم حذف {progress['deleted']}"
+            )
+            if progress_callback:
+                progress_callback(dict(progress, max_id=max_id))
+
+            lower_id = upper_id
+            if self.pause:
+                time.sleep(self.pause)
+
+        self._resume_from_id = None
+        progress['completed'] = True
+        return progress
+
+    def _load_kept(self, resume_id: int, cutoff_date: datetime) -> Dict[Tuple[int, Any], int]:
+        """
+        السجلات المحتفظ بها قبل نقطة الاستئناف في يوم آخر سجل ممسوح
+
+        الأيام الأقدم لن تتكرر بعد نقطة الاستئناف (المعرفات تتزايد مع الزمن)، وكل
+        (منتج، يوم) قبلها بقي له سجل واحد بعد حذف المكرر.
+        """
+        last = self.db.execute_query(
+            "SELECT recorded_at FROM price_history WHERE id < %s ORDER BY id DESC LIMIT 1",
+            (resume_id,), fetch=True
+        )
+        if not last:
+            return {}
+
+        recorded_at = last[0][0]
+        day_start = datetime.combine(recorded_at.date(), datetime.min.time())
+
+        rows = self.db.execute_query(
+            """
+            SELECT MAX(id), product_id, DATE(recorded_at) FROM price_history
+            WHERE id < %s AND recorded_at >= %s AND recorded_at < %s
+            GROUP BY product_id, DATE(recorded_at)
+            """,
+            (resume_id, day_start, cutoff_date), fetch=True
+        ) or []
+        return {(product_id, day): row_id for row_id, product_id, day in rows}
+
+    def _select_duplicates(self, rows: List[Tuple], kept: Dict[Tuple[int, Any], int]) -> List[int]:
+        """
+        تحديد السجلات المكررة في دفعة مرتبة تصاعدياً حسب المعرف
+
+        Args:
+            rows: سجلات (id, product_id, day)
+            kept: آخر سجل محتفظ به لكل (منتج، يوم) - يتم تحديثه
+
+        Returns:
+            معرفات السجلات المطلوب حذفها
+        """
+        to_delete = []
+
+        for row_id, product_id, day in rows:
+            key = (product_id, day)
+            previous_id = kept.get(key)
+            if previous_id is not None:
+                to_delete.append(previous_id)
+            kept[key] = row_id
+
+        # المعرفات تتزايد مع الزمن، لذا الأيام الأقدم من أول يوم في الدفعة لن تتكرر
+        if rows:
+            oldest_day = min(row[2] for row in rows)
+            for key in [key for key in kept if key[1] < oldest_day]:
+                del kept[key]
+
+        return to_delete
+
+    def _delete_ids(self, table: str, ids: List[int]) -> int:
+        """حذف سجلات محددة بالمعرف في معاملة واحدة قصيرة (الأخطاء تُمرر للمستدعي)"""
+        placeholders = ', '.join(['%s'] * len(ids))
+        query = f"DELETE FROM {table} WHERE id IN ({placeholders})"
+        return self.db.execute_query(query, tuple(ids)) or 0
+
+    def _delete_in_batches(self, table: str, condition: str, params: Tuple,
+                           deadline: float) -> Dict[str, Any]:
+        """
+        حذف السجلات المطابقة لشرط على دفعات محدودة الحجم
+
+        Args:
+            table: اسم الجدول
+            condition: شرط WHERE
+            params: معاملات الشرط
+            deadline: نهاية الميزانية الزمنية
+
+        Returns:
+            إحصائيات الحذف
+        """
+        progress = {'deleted': 0, 'batches': 0, 'completed': False}
+        query = f"DELETE FROM {table} WHERE {condition} ORDER BY id LIMIT %s"
+
+        while time.monotonic() < deadline:
+            try:
+                rows_affected = self.db.execute_query(query, params + (self.batch_size,)) or 0
+            except Exception as e:
+                self.logger.error(f"خطأ في تنظيف {table}: {e}")
+                return progress
+
+            progress['deleted'] += rows_affected
+            progress['batches'] += 1
+
+            if rows_affected < self.batch_size:
+                progress['completed'] = True
+                break
+
+            if self.pause:
+                time.sleep(self.pause)
+
+        return progress
@@ -0,0 +1,212 @@
+"""
+وحدة تصدير الجداول إلى ملفات عمودية (Parquet/Arrow) للتحليلات خارج قاعدة البيانات
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+import json
+import logging
+import os
+
+class ColumnarExporter:
+    """مصدّر تزايدي: يقرأ الجداول على دفعات حسب المفتاح الأساسي ويكتبها مقسمة يومياً"""
+
+    # الأعمدة وأنواعها في Arrow لكل جدول، وعمود التاريخ المستخدم للتقسيم اليومي
+    TABLES: Dict[str, Dict[str, Any]] = {
+        'price_history': {
+            'columns': [
+                ('id', 'int64'), ('product_id', 'int64'), ('price', 'float64'),
+                ('currency', 'string'), ('availability_status', 'string'),
+                ('seller_name', 'string'), ('is_prime', 'bool'), ('recorded_at', 'timestamp')
+            ],
+            'partition_by': 'recorded_at'
+        },
+        'deals': {
+            'columns': [
+                ('id', 'int64'), ('product_id', 'int64'), ('deal_type', 'string'),
+                ('original_price', 'float64'), ('deal_price', 'float64'),
+                ('discount_percentage', 'float64'), ('discount_amount', 'float64'),
+                ('start_date', 'timestamp'), ('end_date', 'timestamp'),
+                ('deal_status', 'string'), ('quality_score', 'float64'), ('created_at', 'timestamp')
+            ],
+            'partition_by': 'created_at'
+        },
+        'products': {
+            'columns': [
+                ('id', 'int64'), ('asin', 'string'), ('title', 'string'), ('brand', 'string'),
+                ('category_id', 'int64'), ('rating', 'float64'), ('review_count', 'int64'),
+                ('is_active', 'bool'), ('first_seen', 'timestamp'), ('last_updated', 'timestamp')
+            ],
+            'partition_by': 'first_seen'
+        }
+    }
+
+    STATE_FILE = '_export_state.json'
+
+    def __init__(self, database_manager, export_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة المصدّر
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            export_config: إعدادات التصدير (maintenance.export)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        export_config = export_config or {}
+        self.output_dir = Path(export_config.get('output_dir', 'data/export'))
+        self.file_format = export_config.get('format', 'parquet')
+        self.chunk_size = export_config.get('chunk_size', 50000)
+
+        if self.file_format not in ('parquet', 'arrow'):
+            raise ValueError(f"صيغة تصدير غير مدعومة: {self.file_format}")
+
+    def export(self, tables: Optional[List[str]] = None,
+               progress_callback: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+        """
+        تصدير الجداول من آخر معرف مُصدّر
+
+        Args:
+            tables: الجداول المطلوبة (الافتراضي: جميع الجداول المدعومة)
+            progress_callback: دالة تُستدعى بعد كل دفعة (اسم الجدول، آخر معرف)
+
+        Returns:
+            تقرير لكل جدول: عدد السجلات والملفات وآخر معرف
+        """
+        import pyarrow  # noqa: F401  اعتمادية اختيارية لأمر التصدير فقط
+
+        state = self._load_state()
+        report = {}
+
+        for table in tables or list(self.TABLES):
+            if table not in self.TABLES:
+                raise ValueError(f"جدول غير مدعوم للتصدير: {table}")
+
+            table_report = {'rows': 0, 'files': 0, 'last_id': state.get(table, 0)}
+            while True:
+                rows = self._fetch_chunk(table, table_report['last_id'])
+                if not rows:
+                    break
+
+                table_report['files'] += self._write_chunk(table, rows)
+                table_report['rows'] += len(rows)
+                table_report['last_id'] = rows[-1][0]
+
+                # حفظ التقدم بعد كل دفعة حتى تستأنف الإعادة من نفس النقطة
+                state[table] = table_report['last_id']
+                self._save_state(state)
+
+                if progress_callback:
+                    progress_callback(table, table_report['last_id'])
+
+                if len(rows) < self.chunk_size:
+                    break
+
+            report[table] = table_report
+            self.logger.info(f"تم تصدير {table_report['rows']} سجل من {table} "
+                             f"حتى المعرف {table_report['last_id']}")
+
+        return report
+
+    def _fetch_chunk(self, table: str, after_id: int) -> List[Tuple]:
+        """قراءة دفعة مرتبة بالمفتاح الأساسي بعد معرف محدد"""
+        columns = ', '.join(name for name, _ in self.TABLES[table]['columns'])
+        query = f"""
+        SELECT {columns} FROM {table}
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+        """
+        return self.db.execute_read(query, (after_id, self.chunk_size))
+
+    def _write_chunk(self, table: str, rows: List[Tuple]) -> int:
+        """
+        كتابة دفعة مقسمة حسب اليوم
+
+        اسم الملف مشتق من نطاق المعرفات، لذا إعادة تصدير نفس الدفعة بعد توقف
+        مفاجئ تستبدل الملف بدلاً من تكراره.
+
+        Returns:
+            عدد الملفات المكتوبة
+        """
+        spec = self.TABLES[table]
+        names = [name for name, _ in spec['columns']]
+        partition_index = names.index(spec['partition_by'])
+
+        by_day: Dict[str, List[Tuple]] = defaultdict(list)
+        for row in rows:
+            day = row[partition_index]
+            by_day[self._day_key(day)].append(row)
+
+        extension = 'parquet' if self.file_format == 'parquet' else 'arrow'
+        for day, day_rows in by_day.items():
+            directory = self.output_dir / table / f"date={day}"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{day_rows[0][0]:012d}-{day_rows[-1][0]:012d}.{extension}"
+            self._write_file(path, spec['columns'], day_rows)
+
+        return len(by_day)
+
+    def _write_file(self, path: Path, columns: List[Tuple[str, str]], rows: List[Tuple]):
+        """كتابة ملف واحد بشكل ذري (ملف مؤقت ثم إعادة تسمية)"""
+        import pyarrow as pa
+
+        arrow_types = {
+            'int64': pa.int64(),
+            'float64': pa.float64(),
+            'string': pa.string(),
+            'bool': pa.bool_(),
+            'timestamp': pa.timestamp('s')
+        }
+        converters = {
+            'int64': int,
+            'float64': float,
+            'string': str,
+            'bool': bool,
+            'timestamp': lambda value: value
+        }
+
+        arrays = []
+        for index, (name, column_type) in enumerate(columns):
+            convert = converters[column_type]
+            values = [None if row[index] is None else convert(row[index]) for row in rows]
+            arrays.append(pa.array(values, type=arrow_types[column_type]))
+
+        table = pa.Table.from_arrays(arrays, names=[name for name, _ in columns])
+
+        temporary_path = path.with_suffix(path.suffix + '.tmp')
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, temporary_path, compression='zstd')
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, temporary_path, compression='zstd')
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _day_key(value: Any) -> str:
+        """مفتاح قسم اليوم لقيمة تاريخ"""
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        if value:
+            return str(value)[:10]
+        return 'unknown'
+
+    def _load_state(self) -> Dict[str, int]:
+        """قراءة آخر معرف مُصدّر لكل جدول"""
+        state_path = self.output_dir / self.STATE_FILE
+        if not state_path.exists():
+            return {}
+        return json.loads(state_path.read_text(encoding='utf-8'))
+
+    def _save_state(self, state: Dict[str, int]):
+        """حفظ آخر معرف مُصدّر لكل جدول"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        state_path = self.output_dir / self.STATE_FILE
+        temporary_path = state_path.with_suffix('.tmp')
+        temporary_path.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        os.replace(temporary_path, state_path)
@@ -0,0 +1,224 @@
+"""
+وحدة pool الاتصالات الموحد لقاعدة البيانات
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+import mysql.connector
+from mysql.connector import pooling, Error
+from mysql.connector.errors import PoolError
+from typing import Dict, Any, Optional
+import threading
+import logging
+import time
+
+class ConnectionPool:
+    """pool اتصالات MySQL مع اتصالات إضافية (overflow) ومقاييس أداء"""
+
+    def __init__(self, connection_config: Dict[str, Any], pool_name: str = 'amazon_bot_pool',
+                 pool_size: int = 10, max_overflow: int = 20, timeout: float = 30):
+        """
+        تهيئة pool الاتصالات
+
+        Args:
+            connection_config: إعدادات الاتصال (host, port, user, ...)
+            pool_name: اسم الـ pool
+            pool_size: عدد الاتصالات الدائمة
+            max_overflow: الحد الأقصى للاتصالات الإضافية المؤقتة
+            timeout: أقصى مدة انتظار للحصول على اتصال بالثواني
+        """
+        self.logger = logging.getLogger(__name__)
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self._connection_config = connection_config
+
+        self._pool = pooling.MySQLConnectionPool(
+            pool_name=pool_name,
+            pool_size=pool_size,
+            pool_reset_session=True,
+            **connection_config
+        )
+
+        # حالة الـ pool
+        self._condition = threading.Condition()
+        self._overflow_ids = set()
+        self._overflow_in_use = 0
+        self._pooled_in_use = 0
+        self._in_use = 0
+        self._closed = False
+
+        # مقاييس الأداء
+        self._metrics = {
+            'checkouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'peak_in_use': 0,
+            'overflow_events': 0,
+            'timeouts': 0
+        }
+
+    def get_connection(self, timeout: Optional[float] = None):
+        """
+        الحصول على اتصال من الـ pool
+
+        ينتظر حتى يتحرر اتصال أو تنتهي المهلة إذا كانت جميع الاتصالات
+        الدائمة والإضافية مشغولة.
+
+        Args:
+            timeout: مهلة الانتظار لهذا الطلب (الافتراضي: مهلة الـ pool)
+
+        Returns:
+            اتصال قاعدة البيانات
+
+        Raises:
+            PoolError: عند انتهاء المهلة أو بعد إغلاق الـ pool
+        """
+        start_time = time.monotonic()
+        deadline = start_time + (self.timeout if timeout is None else timeout)
+        connection = None
+        use_overflow = False
+
+        while connection is None and not use_overflow:
+            # القفل يحمي الحجز فقط؛ جلب الاتصال (وقد يعيد الاتصال بالخادم) يتم خارجه
+            with self._condition:
+                while True:
+                    self._check_open()
+                    if self._pooled_in_use < self.pool_size:
+                        self._pooled_in_use += 1
+                        break
+
+                    if self._overflow_in_use < self.max_overflow:
+                        # حجز مكان للاتصال الإضافي قبل فتحه خارج القفل
+                        self._overflow_in_use += 1
+                        self._metrics['overflow_events'] += 1
+                        use_overflow = True
+                        break
+
+                    self._wait_for_release(deadline)
+
+            if use_overflow:
+                break
+
+            try:
+                connection = self._pool.get_connection()
+            except PoolError:
+                # الـ pool لا يملك اتصالاً خاملاً رغم الحجز (اتصالات مغلقة أو فشل إعادة الاتصال)
+                with self._condition:
+                    self._pooled_in_use -= 1
+                    if self._overflow_in_use < self.max_overflow:
+                        self._overflow_in_use += 1
+                        self._metrics['overflow_events'] += 1
+                        use_overflow = True
+                    else:
+                        self._wait_for_release(deadline)
+            except Error:
+                with self._condition:
+                    self._pooled_in_use -= 1
+                    self._condition.notify()
+                raise
+
+        if use_overflow:
+            try:
+                connection = mysql.connector.connect(**self._connection_config)
+            except Error:
+                with self._condition:
+                    self._overflow_in_use -= 1
+                    self._condition.notify()
+                raise
+
+        wait_time = time.monotonic() - start_time
+
+        with self._condition:
+            if use_overflow:
+                self._overflow_ids.add(id(connection))
+            self._in_use += 1
+            self._metrics['checkouts'] += 1
+            self._metrics['total_wait_time'] += wait_time
+            self._metrics['max_wait_time'] = max(self._metrics['max_wait_time'], wait_time)
+            self._metrics['peak_in_use'] = max(self._metrics['peak_in_use'], self._in_use)
+
+        return connection
+
+    def _check_open(self):
+        """رفض الطلب فوراً بعد إغلاق الـ pool (يُستدعى والقفل محجوز)"""
+        if self._closed:
+            raise PoolError(f"{self.pool_name} مغلق")
+
+    def _wait_for_release(self, deadline: float):
+        """انتظار تحرر اتصال (يُستدعى والقفل محجوز)"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._metrics['timeouts'] += 1
+            raise PoolError(f"انتهت مهلة انتظار اتصال من {self.pool_name}")
+        self._condition.wait(remaining)
+
+    def release(self, connection):
+        """
+        إعادة اتصال إلى الـ pool
+
+        الاتصالات الدائمة تعود للـ pool، والاتصالات الإضافية تُغلق.
+        """
+        try:
+            connection.close()
+        except Error as e:
+            self.logger.warning(f"خطأ في إغلاق الاتصال: {e}")
+        finally:
+            with self._condition:
+                if id(connection) in self._overflow_ids:
+                    self._overflow_ids.discard(id(connection))
+                    self._overflow_in_use -= 1
+                else:
+                    self._pooled_in_use = max(0, self._pooled_in_use - 1)
+                self._in_use = max(0, self._in_use - 1)
+                self._condition.notify()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        الحصول على مقاييس الـ pool
+
+        Returns:
+            مقاييس الانتظار والاستخدام والاتصالات الإضافية
+        """
+        with self._condition:
+            checkouts = self._metrics['checkouts']
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'in_use': self._in_use,
+                'overflow_in_use': self._overflow_in_use,
+                'peak_in_use': self._metrics['peak_in_use'],
+                'checkouts': checkouts,
+                'avg_wait_ms': round(self._metrics['total_wait_time'] / checkouts * 1000, 3) if checkouts else 0,
+                'max_wait_ms': round(self._metrics['max_wait_time'] * 1000, 3),
+                'overflow_events': self._metrics['overflow_events'],
+                'timeouts': self._metrics['timeouts']
+            }
+
+    def close(self) -> int:
+        """
+        إغلاق الاتصالات الخاملة في الـ pool
+
+        الاتصالات الخاملة تُسحب من الـ pool وتُقطع بدلاً من إعادتها؛ الاتصالات
+        المستخدمة حالياً تعود للـ pool عند تحريرها. بعد الإغلاق يُرفض أي طلب
+        اتصال فوراً (ومنه المنتظرون حالياً) بدلاً من انتظار المهلة.
+
+        Returns:
+            عدد الاتصالات المغلقة
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        closed = 0
+        for _ in range(self.pool_size):
+            try:
+                connection = self._pool.get_connection()
+            except Error:
+                break
+            try:
+                connection.disconnect()
+                closed += 1
+            except Error as e:
+                self.logger.warning(f"خطأ في إغلاق الاتصال: {e}")
+        return closed
@@ -4,14 +4,23 @@
 """
 
 import mysql.connector
-from mysql.connector import pooling, Error
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
 from contextlib import contextmanager
 from typing import Dict, List, Optional, Any, Tuple
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
-import json
+
+from connection_pool import ConnectionPool
+from cleanup_engine import CleanupEngine
+from partition_manager import PartitionManager
+from price_archive import PriceArchive
+from stats_service import StatsService
+from activity_logger import ActivityLogger
+from sqlite_backend import SQLiteConnectionPool
+from query_stats import QueryStats, InstrumentedConnection
 
 class DatabaseManager:
     """مدير قاعدة البيانات الرئيسي"""
@@ -25,19 +34,61 @@ class DatabaseManager:
         """
         self.config = config['database']
         self.logger = logging.getLogger(__name__)
+        # محرك التخزين: mysql أو sqlite (ملف مدمج بنفس الواجهة)
+        self.engine = self.config.get('engine', 'mysql')
         self.connection_pool = None
-        self.engine = None
-        self.Session = None
+        # pool اختياري لنسخة القراءة (read replica)
+        self.read_pool = None
+        replica_config = self.config.get('read_replica') or {}
+        # بعد الكتابة لمفتاح تُقرأ بياناته من الخادم الرئيسي خلال هذه المدة
+        self.read_your_writes_seconds = replica_config.get('read_your_writes_seconds', 5)
+        # انتظار قصير لاتصال من نسخة القراءة قبل الرجوع للخادم الرئيسي
+        self.replica_acquire_timeout = replica_config.get('acquire_timeout', 0.05)
+        # بعد فشل الاتصال بنسخة القراءة تُتجاوز هذه المدة بدلاً من انتظار مهلة الاتصال في كل قراءة
+        self.replica_retry_seconds = replica_config.get('retry_seconds', 30)
+        self._replica_down_until = 0.0
+        self._recent_writes: Dict[Any, float] = {}
+        self._recent_writes_lock = threading.Lock()
+        # قياس زمن الاستعلامات لكل بصمة
+        self.query_stats = QueryStats(self.config.get('instrumentation'))
         self._initialize_connection()
+        
+        # محرك تنظيف البيانات القديمة
+        maintenance_config = config.get('maintenance', {})
+        self.cleanup_engine = CleanupEngine(self, maintenance_config.get('cleanup'))
+        
+        # مدير أقسام جدول تاريخ الأسعار (SQLite لا يدعم الأقسام)
+        partitions_config = dict(maintenance_config.get('partitions') or {})
+        if self.engine == 'sqlite':
+            partitions_config['enabled'] = False
+        self.partition_manager = PartitionManager(self, partitions_config)
+        self.latest_price_window_days = maintenance_config.get('partitions', {}).get(
+            'latest_price_window_days', 31
+        )
+        
+        # أرشيف الأسعار طويل المدى (فترات تغير السعر)
+        self.price_archive = PriceArchive(self, maintenance_config.get('archive'))
+        
+        # خدمة الإحصائيات المجمعة والمخزنة مؤقتاً
+        self.stats_service = StatsService(self, config.get('performance'))
+        
+        # تسجيل النشاط المؤجل على دفعات
+        self.activity_logger = ActivityLogger(self, self.config.get('activity_log'))
     
     def _initialize_connection(self):
         """تهيئة اتصال قاعدة البيانات"""
         try:
-            # إنشاء connection pool
-            pool_config = {
-                'pool_name': 'amazon_bot_pool',
-                'pool_size': self.config.get('pool_size', 10),
-                'pool_reset_session': True,
+            if self.engine == 'sqlite':
+                self.connection_pool = SQLiteConnectionPool(
+                    self.config.get('sqlite_path', 'data/amazon_deals.db'),
+                    pool_size=self.config.get('pool_size', 10),
+                    timeout=self.config.get('pool_timeout', 30)
+                )
+                self.logger.info("تم تهيئة قاعدة بيانات SQLite بنجاح")
+                return
+            
+            # إنشاء pool اتصالات موحد
+            connection_config = {
                 'host': self.config['host'],
                 'port': self.config['port'],
                 'user': self.config['username'],
@@ -48,58 +99,77 @@ class DatabaseManager:
                 'time_zone': '+03:00'  # توقيت السعودية
             }
             
-            self.connection_pool = pooling.MySQLConnectionPool(**pool_config)
-            
-            # إنشاء SQLAlchemy engine
-            db_url = (f"mysql+mysqlconnector://{self.config['username']}:"
-                     f"{self.config['password']}@{self.config['host']}:"
-                     f"{self.config['port']}/{self.config['database']}")
-            
-            self.engine = create_engine(
-                db_url,
+            self.connection_pool = ConnectionPool(
+                connection_config,
+                pool_name='amazon_bot_pool',
                 pool_size=self.config.get('pool_size', 10),
                 max_overflow=self.config.get('max_overflow', 20),
-                pool_pre_ping=True,
-                pool_recycle=3600
+                timeout=self.config.get('pool_timeout', 30)
             )
             
-            self.Session = sessionmaker(bind=self.engine)
-            
             self.logger.info("تم تهيئة اتصال قاعدة البيانات بنجاح")
             
+            replica_config = self.config.get('read_replica') or {}
+            if replica_config.get('enabled'):
+                read_connection_config = dict(
+                    connection_config,
+                    host=replica_config.get('host', connection_config['host']),
+                    port=replica_config.get('port', connection_config['port']),
+                    user=replica_config.get('username', connection_config['user']),
+                    password=replica_config.get('password', connection_config['password'])
+                )
+                self.read_pool = ConnectionPool(
+                    read_connection_config,
+                    pool_name='amazon_bot_read_pool',
+                    pool_size=replica_config.get('pool_size', self.config.get('pool_size', 10)),
+                    max_overflow=replica_config.get('max_overflow', self.config.get('max_overflow', 20)),
+                    timeout=replica_config.get('pool_timeout', self.config.get('pool_timeout', 30))
+                )
+                self.logger.info(f"تم تهيئة نسخة القراءة: {read_connection_config['host']}")
+            
         except Error as e:
             self.logger.error(f"خطأ في تهيئة قاعدة البيانات: {e}")
             raise
     
     @contextmanager
-    def get_connection(self):
-        """الحصول على اتصال من pool"""
+    def get_connection(self, read_only: bool = False):
+        """
+        الحصول على اتصال من pool
+        
+        Args:
+            read_only: توجيه الاتصال لنسخة القراءة إن وُجدت
+        """
         connection = None
+        pool = self.connection_pool
         try:
-            connection = self.connection_pool.get_connection()
-            yield connection
+            start_time = time.perf_counter()
+            if read_only and self.read_pool and time.monotonic() >= self._replica_down_until:
+                try:
+                    connection = self.read_pool.get_connection(timeout=self.replica_acquire_timeout)
+                    pool = self.read_pool
+                except PoolError:
+                    # نسخة القراءة مشغولة بالكامل - نقرأ من الخادم الرئيسي دون انتظار
+                    pass
+                except Error as e:
+                    # نسخة القراءة غير متاحة - نقرأ من الخادم الرئيسي حتى retry_seconds
+                    self._replica_down_until = time.monotonic() + self.replica_retry_seconds
+                    self.logger.warning(f"تعذر الاتصال بنسخة القراءة: {e}")
+            if connection is None:
+                connection = self.connection_pool.get_connection()
+            pool_wait = time.perf_counter() - start_time
+            
+            if self.query_stats.enabled:
+                yield InstrumentedConnection(connection, self.query_stats, pool_wait)
+            else:
+                yield connection
         except Error as e:
             self.logger.error(f"خطأ في الاتصال بقاعدة البيانات: {e}")
             if connection:
                 connection.rollback()
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
-    
-    @contextmanager
-    def get_session(self):
-        """الحصول على SQLAlchemy session"""
-        session = self.Session()
-        try:
-            yield session
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            self.logger.error(f"خطأ في جلسة قاعدة البيانات: {e}")
-            raise
-        finally:
-            session.close()
+            if connection:
+                pool.release(connection)
     
     def execute_query(self, query: str, params: Optional[Tuple] = None, 
                      fetch: bool = False) -> Optional[List[Tuple]]:
@@ -114,7 +184,47 @@ class DatabaseManager:
         Returns:
             النتائج إذا كان fetch=True
         """
-        with self.get_connection() as connection:
+        return self._execute(query, params, fetch)
+    
+    def execute_read(self, query: str, params: Optional[Tuple] = None,
+                     consistency_key: Any = None) -> List[Tuple]:
+        """
+        تنفيذ استعلام قراءة عبر نسخة القراءة إن وُجدت
+        
+        Args:
+            query: الاستعلام
+            params: المعاملات
+            consistency_key: مفتاح البيانات المقروءة؛ إذا كُتب حديثاً (mark_written)
+                تتم القراءة من الخادم الرئيسي لضمان رؤية الكتابة
+            
+        Returns:
+            النتائج
+        """
+        read_only = consistency_key is None or not self._recently_written(consistency_key)
+        return self._execute(query, params, fetch=True, read_only=read_only) or []
+    
+    def mark_written(self, consistency_key: Any):
+        """تسجيل كتابة لمفتاح حتى تُقرأ بياناته من الخادم الرئيسي مؤقتاً"""
+        if not self.read_pool:
+            return
+        with self._recent_writes_lock:
+            now = time.monotonic()
+            self._recent_writes[consistency_key] = now + self.read_your_writes_seconds
+            # إزالة المفاتيح المنتهية حتى لا يكبر القاموس
+            if len(self._recent_writes) > 1000:
+                self._recent_writes = {key: expires for key, expires in self._recent_writes.items()
+                                       if expires > now}
+    
+    def _recently_written(self, consistency_key: Any) -> bool:
+        """هل كُتب المفتاح خلال نافذة read-your-writes"""
+        with self._recent_writes_lock:
+            expires = self._recent_writes.get(consistency_key)
+            return expires is not None and expires > time.monotonic()
+    
+    def _execute(self, query: str, params: Optional[Tuple] = None,
+                 fetch: bool = False, read_only: bool = False) -> Optional[List[Tuple]]:
+        """تنفيذ استعلام على الخادم الرئيسي أو نسخة القراءة"""
+        with self.get_connection(read_only=read_only) as connection:
             cursor = connection.cursor()
             try:
                 cursor.execute(query, params or ())
@@ -132,6 +242,34 @@ class DatabaseManager:
             finally:
                 cursor.close()
     
+    def execute_many(self, query: str, params_list: List[Any]) -> int:
+        """
+        تنفيذ استعلام على دفعة من المعاملات في معاملة واحدة
+        
+        Args:
+            query: الاستعلام
+            params_list: قائمة المعاملات
+            
+        Returns:
+            عدد السجلات المتأثرة
+        """
+        if not params_list:
+            return 0
+        
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(query, params_list)
+                connection.commit()
+                return cursor.rowcount
+                
+            except Error as e:
+                self.logger.error(f"خطأ في تنفيذ الاستعلام المجمع: {e}")
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
     def insert_product(self, product_data: Dict[str, Any]) -> int:
         """
         إدراج منتج جديد
@@ -182,7 +320,7 @@ class DatabaseManager:
     
     def insert_price_history(self, price_data: Dict[str, Any]) -> bool:
         """
-        إدراج سجل سعر جديد
+        إدراج سجل سعر جديد وتحديث ملخص الأسعار اليومي في نفس المعاملة
         
         Args:
             price_data: بيانات السعر
@@ -197,13 +335,172 @@ class DatabaseManager:
                 %(seller_name)s, %(is_prime)s)
         """
         
+        # تحديث تراكمي لملخص اليوم
+        # avg_price أولاً ليُحسب من القيم القديمة في MySQL (تقييم بالترتيب) و SQLite معاً
+        rollup_query = """
+        INSERT INTO price_daily (product_id, price_date, min_price, max_price, avg_price,
+                                 price_sum, close_price, close_at, sample_count)
+        VALUES (%(product_id)s, CURDATE(), %(price)s, %(price)s, %(price)s,
+                %(price)s, %(price)s, NOW(), 1)
+        ON DUPLICATE KEY UPDATE
+            avg_price = (price_sum + VALUES(price_sum)) / (sample_count + 1),
+            min_price = LEAST(min_price, VALUES(min_price)),
+            max_price = GREATEST(max_price, VALUES(max_price)),
+            price_sum = price_sum + VALUES(price_sum),
+            sample_count = sample_count + 1,
+            close_price = VALUES(close_price),
+            close_at = VALUES(close_at)
+        """
+        
         try:
-            self.execute_query(query, price_data)
-            return True
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(query, price_data)
+                    cursor.execute(rollup_query, price_data)
+                    connection.commit()
+                    return True
+                except Error:
+                    connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
         except Error as e:
             self.logger.error(f"خطأ في إدراج سجل السعر: {e}")
             return False
     
+    def get_price_daily(self, product_id: int, days: int = 90) -> List[Dict[str, Any]]:
+        """
+        الحصول على ملخص الأسعار اليومي للمنتج
+        
+        Args:
+            product_id: معرف المنتج
+            days: عدد الأيام
+            
+        Returns:
+            ملخصات الأيام مرتبة من الأقدم للأحدث
+        """
+        query = """
+        SELECT price_date, min_price, max_price, avg_price, close_price, sample_count
+        FROM price_daily
+        WHERE product_id = %s AND price_date >= %s
+        ORDER BY price_date
+        """
+        
+        start_date = (datetime.now() - timedelta(days=days)).date()
+        results = self.execute_query(query, (product_id, start_date), fetch=True)
+        
+        return [
+            {
+                'price_date': row[0],
+                'min_price': float(row[1]),
+                'max_price': float(row[2]),
+                'avg_price': float(row[3]),
+                'close_price': float(row[4]),
+                'sample_count': row[5]
+            }
+            for row in results or []
+        ]
+    
+    def get_price_daily_by_asins(self, asins: List[str], days: int = 90,
+                                 batch_size: int = 500) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        الحصول على ملخص الأسعار اليومي لمجموعة منتجات باستعلام واحد لكل دفعة
+
+        Args:
+            asins: معرفات أمازون للمنتجات
+            days: عدد الأيام
+            batch_size: عدد المنتجات في كل استعلام
+
+        Returns:
+            لكل ASIN: سجلات (price, min_price, price_date) مرتبة من الأقدم للأحدث
+        """
+        start_date = (datetime.now() - timedelta(days=days)).date()
+        asins = list(dict.fromkeys(asin for asin in asins if asin))
+        histories: Dict[str, List[Dict[str, Any]]] = {}
+
+        for offset in range(0, len(asins), batch_size):
+            batch = asins[offset:offset + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            query = f"""
+            SELECT p.asin, d.price_date, d.min_price, d.close_price
+            FROM price_daily d
+            JOIN products p ON p.id = d.product_id
+            WHERE p.asin IN ({placeholders}) AND d.price_date >= %s
+            ORDER BY p.asin, d.price_date
+            """
+            for asin, price_date, min_price, close_price in self.execute_read(
+                    query, tuple(batch) + (start_date,)) or []:
+                histories.setdefault(asin, []).append({
+                    'price': float(close_price),
+                    'min_price': float(min_price),
+                    'price_date': price_date
+                })
+
+        return histories
+
+    def backfill_price_daily(self, days: Optional[int] = None, batch_size: int = 1000) -> int:
+        """
+        إعادة بناء ملخص الأسعار اليومي من price_history
+        
+        تتم المعالجة على نطاقات من معرفات المنتجات لتقصير المعاملات.
+        
+        Args:
+            days: عدد الأيام المطلوب بناؤها (None = كامل السجل)
+            batch_size: عدد المنتجات في كل دفعة
+            
+        Returns:
+            عدد الأيام المحدثة
+        """
+        bounds = self.execute_query("SELECT MIN(id), MAX(id) FROM products", fetch=True)
+        if not bounds or bounds[0][0] is None:
+            return 0
+        
+        min_id, max_id = bounds[0]
+        start_date = datetime.now() - timedelta(days=days) if days else datetime(1970, 1, 2)
+        
+        # سعر الإغلاق: آخر سعر مسجل في اليوم
+        if self.engine == 'sqlite':
+            close_price = """(SELECT latest.price FROM price_history latest
+                WHERE latest.product_id = price_history.product_id
+                AND DATE(latest.recorded_at) = DATE(price_history.recorded_at)
+                ORDER BY latest.recorded_at DESC, latest.id DESC LIMIT 1)"""
+        else:
+            close_price = """CAST(SUBSTRING_INDEX(GROUP_CONCAT(price ORDER BY recorded_at DESC, id DESC), ',', 1)
+                    AS DECIMAL(10,2))"""
+        
+        query = f"""
+        INSERT INTO price_daily (product_id, price_date, min_price, max_price, avg_price,
+                                 price_sum, close_price, close_at, sample_count)
+        SELECT product_id, DATE(recorded_at), MIN(price), MAX(price), AVG(price), SUM(price),
+               {close_price},
+               MAX(recorded_at), COUNT(*)
+        FROM price_history
+        WHERE product_id >= %s AND product_id < %s AND recorded_at >= %s
+        GROUP BY product_id, DATE(recorded_at)
+        ON DUPLICATE KEY UPDATE
+            min_price = VALUES(min_price),
+            max_price = VALUES(max_price),
+            avg_price = VALUES(avg_price),
+            price_sum = VALUES(price_sum),
+            close_price = VALUES(close_price),
+            close_at = VALUES(close_at),
+            sample_count = VALUES(sample_count)
+        """
+        
+        total_rows = 0
+        lower_id = min_id
+        while lower_id <= max_id:
+            upper_id = lower_id + batch_size
+            try:
+                total_rows += self.execute_query(query, (lower_id, upper_id, start_date)) or 0
+            except Error as e:
+                self.logger.error(f"خطأ في بناء ملخص الأسعار للمنتجات {lower_id}-{upper_id}: {e}")
+            lower_id = upper_id
+        
+        self.logger.info(f"تم بناء ملخص الأسعار اليومي: {total_rows} سجل")
+        return total_rows
+    
     def insert_deal(self, deal_data: Dict[str, Any]) -> int:
         """
         إدراج عرض جديد
@@ -215,14 +512,17 @@ class DatabaseManager:
             معرف العرض المدرج
         """
         query = """
-        INSERT INTO deals (product_id, deal_type, original_price, deal_price,
+        INSERT INTO deals (product_id, deal_type, original_price, deal_price, opening_price,
                           discount_percentage, discount_amount, start_date, end_date,
-                          deal_status, max_quantity, deal_url, quality_score)
-        VALUES (%(product_id)s, %(deal_type)s, %(original_price)s, %(deal_price)s,
+                          last_seen_at, deal_status, max_quantity, deal_url, quality_score)
+        VALUES (%(product_id)s, %(deal_type)s, %(original_price)s, %(deal_price)s, %(deal_price)s,
                 %(discount_percentage)s, %(discount_amount)s, %(start_date)s, %(end_date)s,
-                %(deal_status)s, %(max_quantity)s, %(deal_url)s, %(quality_score)s)
+                %(start_date)s, %(deal_status)s, %(max_quantity)s, %(deal_url)s, %(quality_score)s)
         """
         
+        # العمود غير فارغ (ترتيب العروض النشطة وترقيمها بالفهرس)
+        deal_data = dict(deal_data, quality_score=deal_data.get('quality_score') or 0)
+        
         with self.get_connection() as connection:
             cursor = connection.cursor()
             try:
@@ -237,27 +537,124 @@ class DatabaseManager:
             finally:
                 cursor.close()
     
-    def get_active_deals(self, limit: int = 50) -> List[Dict[str, Any]]:
+    def get_active_deal_for_product(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """
+        الحصول على العرض النشط الحالي لمنتج
+        
+        Args:
+            product_id: معرف المنتج
+            
+        Returns:
+            معرف العرض وسعر فتحه أو None
+        """
+        query = """
+        SELECT id, COALESCE(opening_price, deal_price), end_date FROM deals
+        WHERE product_id = %s AND deal_status = 'active'
+        ORDER BY id DESC
+        LIMIT 1
+        """
+        
+        results = self.execute_query(query, (product_id,), fetch=True)
+        
+        if results:
+            row = results[0]
+            return {'id': row[0], 'opening_price': float(row[1]), 'end_date': row[2]}
+        
+        return None
+    
+    def refresh_deal(self, deal_id: int, deal_data: Dict[str, Any]) -> bool:
+        """
+        تحديث عرض نشط في مكانه (نفس مستوى السعر)
+        
+        Args:
+            deal_id: معرف العرض
+            deal_data: بيانات العرض الحالية
+            
+        Returns:
+            True إذا تم التحديث
+        """
+        query = """
+        UPDATE deals
+        SET original_price = %(original_price)s,
+            deal_price = %(deal_price)s,
+            discount_percentage = %(discount_percentage)s,
+            discount_amount = %(discount_amount)s,
+            end_date = %(end_date)s,
+            quality_score = %(quality_score)s,
+            last_seen_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %(id)s AND deal_status = 'active'
+        """
+        
+        params = dict(deal_data, id=deal_id, quality_score=deal_data.get('quality_score') or 0)
+        return bool(self.execute_query(query, params))
+    
+    def expire_deals(self, deal_ids: List[int], reason: str = 'ended') -> int:
+        """
+        تحويل عروض إلى حالة منتهية
+        
+        Args:
+            deal_ids: معرفات العروض
+            reason: سبب الإنهاء (ended: اختفى العرض، replaced: سعر جديد،
+                timeout: انقضى موعده المقدر دون رصد نهايته)
+            
+        Returns:
+            عدد العروض المنتهية
+        """
+        if not deal_ids:
+            return 0
+        
+        placeholders = ', '.join(['%s'] * len(deal_ids))
+        query = f"""
+        UPDATE deals
+        SET deal_status = 'expired', expiry_reason = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE id IN ({placeholders}) AND deal_status = 'active'
+        """
+        
+        return self.execute_query(query, (reason, *deal_ids)) or 0
+    
+    def get_active_deals(self, limit: int = 50,
+                         after: Optional[Tuple[float, float, int]] = None) -> List[Dict[str, Any]]:
         """
-        الحصول على العروض النشطة
+        الحصول على العروض النشطة مرتبة حسب الجودة
         
         Args:
             limit: عدد العروض المطلوبة
+            after: مفتاح آخر عرض في الصفحة السابقة (quality_score, discount_percentage, id)
             
         Returns:
             قائمة العروض النشطة
         """
         query = """
-        SELECT d.*, p.asin, p.title, p.image_url, p.amazon_url, p.rating, p.review_count
+        SELECT d.id, d.product_id, d.deal_type, d.original_price, d.deal_price,
+               d.discount_percentage, d.discount_amount, d.start_date, d.end_date,
+               d.deal_status, d.quality_score,
+               p.asin, p.title, p.image_url, p.amazon_url, p.rating, p.review_count,
+               p.brand
         FROM deals d
         JOIN products p ON d.product_id = p.id
         WHERE d.deal_status = 'active'
         AND (d.end_date IS NULL OR d.end_date > NOW())
-        ORDER BY d.quality_score DESC, d.discount_percentage DESC
+        """
+        params: Tuple = ()
+        
+        if after:
+            # ترقيم keyset بدلاً من OFFSET (quality_score غير فارغ، لذا يخدم
+            # idx_deal_active_rank البحث والترتيب معاً)
+            query += """
+        AND (d.quality_score < %s
+             OR (d.quality_score = %s AND (d.discount_percentage < %s
+                 OR (d.discount_percentage = %s AND d.id < %s))))
+        """
+            score, discount, deal_id = after
+            params = (score, score, discount, discount, deal_id)
+        
+        query += """
+        ORDER BY d.quality_score DESC, d.discount_percentage DESC, d.id DESC
         LIMIT %s
         """
         
-        results = self.execute_query(query, (limit,), fetch=True)
+        results = self.execute_read(query, params + (limit,))
         
         deals = []
         for row in results:
@@ -272,13 +669,14 @@ class DatabaseManager:
                 'start_date': row[7],
                 'end_date': row[8],
                 'deal_status': row[9],
-                'quality_score': float(row[15]) if row[15] else 0,
-                'asin': row[16],
-                'title': row[17],
-                'image_url': row[18],
-                'amazon_url': row[19],
-                'rating': float(row[20]) if row[20] else 0,
-                'review_count': row[21] or 0
+                'quality_score': float(row[10]) if row[10] else 0,
+                'asin': row[11],
+                'title': row[12],
+                'image_url': row[13],
+                'amazon_url': row[14],
+                'rating': float(row[15]) if row[15] else 0,
+                'review_count': row[16] or 0,
+                'brand': row[17]
             }
             deals.append(deal)
         
@@ -328,14 +726,43 @@ class DatabaseManager:
         Returns:
             بيانات آخر سعر أو None
         """
+        # البحث أولاً في الأقسام الحديثة فقط (partition pruning)
         query = """
         SELECT * FROM price_history 
         WHERE product_id = %s 
+        AND recorded_at >= %s
         ORDER BY recorded_at DESC 
         LIMIT 1
         """
         
-        results = self.execute_query(query, (product_id,), fetch=True)
+        window_start = datetime.now() - timedelta(days=self.latest_price_window_days)
+        results = self.execute_query(query, (product_id, window_start), fetch=True)
+        
+        if not results:
+            # الرجوع للبحث في كامل السجل
+            query = """
+            SELECT * FROM price_history 
+            WHERE product_id = %s 
+            ORDER BY recorded_at DESC 
+            LIMIT 1
+            """
+            results = self.execute_query(query, (product_id,), fetch=True)
+        
+        if not results:
+            # المنتجات التي لم تُشاهد منذ مدة قد تكون في الأرشيف فقط
+            runs = self.price_archive.get_runs(product_id)
+            if runs:
+                last_run = runs.runs()[-1]
+                return {
+                    'id': None,
+                    'product_id': product_id,
+                    'price': last_run['price'],
+                    'currency': None,
+                    'availability_status': last_run['availability_status'],
+                    'seller_name': None,
+                    'is_prime': None,
+                    'recorded_at': last_run['end']
+                }
         
         if results:
             row = results[0]
@@ -358,7 +785,7 @@ class DatabaseManager:
                     metadata: Optional[Dict] = None,
                     severity: str = 'info'):
         """
-        تسجيل نشاط في السجل
+        تسجيل نشاط في السجل (يُكتب لاحقاً على دفعات)
         
         Args:
             activity_type: نوع النشاط
@@ -368,57 +795,50 @@ class DatabaseManager:
             metadata: بيانات إضافية
             severity: مستوى الأهمية
         """
-        query = """
-        INSERT INTO activity_log (activity_type, description, related_table,
-                                related_id, metadata, severity)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
-        metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
-        
-        try:
-            self.execute_query(query, (activity_type, description, related_table,
-                                     related_id, metadata_json, severity))
-        except Error as e:
-            self.logger.error(f"خطأ في تسجيل النشاط: {e}")
+        self.activity_logger.log(activity_type, description, related_table,
+                                 related_id, metadata, severity)
     
-    def cleanup_old_data(self, days: int = 30):
+    def cleanup_old_data(self, days: int = 30) -> Dict[str, Any]:
         """
-        تنظيف البيانات القديمة
+        تنظيف البيانات القديمة على دفعات صغيرة
         
         Args:
             days: عدد الأيام للاحتفاظ بالبيانات
+            
+        Returns:
+            تقرير التنظيف لكل جدول
         """
-        cutoff_date = datetime.now() - timedelta(days=days)
+        return self.cleanup_engine.run(days)
+    
+    def archive_price_history(self) -> Dict[str, Any]:
+        """
+        نقل سجلات الأسعار القديمة إلى أرشيف فترات تغير السعر
         
-        # حذف سجلات الأسعار القديمة (الاحتفاظ بسجل واحد يومياً)
-        cleanup_queries = [
-            """
-            DELETE ph1 FROM price_history ph1
-            INNER JOIN price_history ph2 
-            WHERE ph1.product_id = ph2.product_id
-            AND ph1.recorded_at < %s
-            AND DATE(ph1.recorded_at) = DATE(ph2.recorded_at)
-            AND ph1.id < ph2.id
-            """,
-            
-            # حذف سجلات النشاط القديمة
-            "DELETE FROM activity_log WHERE created_at < %s",
+        Returns:
+            تقرير الأرشفة
+        """
+        return self.price_archive.run()
+    
+    def get_all_time_low(self, product_id: int) -> Optional[float]:
+        """
+        أدنى سعر تاريخي للمنتج (الأرشيف والسجل الحالي)
+        
+        Args:
+            product_id: معرف المنتج
             
-            # حذف العروض المنتهية القديمة
-            """
-            DELETE FROM deals 
-            WHERE deal_status = 'expired' 
-            AND updated_at < %s
-            """
-        ]
+        Returns:
+            أدنى سعر أو None
+        """
+        return self.price_archive.get_all_time_low(product_id)
+    
+    def maintain_partitions(self) -> Dict[str, Any]:
+        """
+        صيانة أقسام price_history الشهرية
         
-        for query in cleanup_queries:
-            try:
-                rows_affected = self.execute_query(query, (cutoff_date,))
-                self.logger.info(f"تم حذف {rows_affected} سجل من البيانات القديمة")
-            except Error as e:
-                self.logger.error(f"خطأ في تنظيف البيانات: {e}")
+        Returns:
+            تقرير الأقسام المنشأة والمحذوفة والمؤرشفة
+        """
+        return self.partition_manager.run_maintenance()
     
     def get_performance_stats(self, days: int = 7) -> Dict[str, Any]:
         """
@@ -430,41 +850,29 @@ class DatabaseManager:
         Returns:
             إحصائيات الأداء
         """
-        start_date = datetime.now() - timedelta(days=days)
-        
-        queries = {
-            'total_products': "SELECT COUNT(*) FROM products WHERE is_active = 1",
-            'active_deals': "SELECT COUNT(*) FROM deals WHERE deal_status = 'active'",
-            'messages_sent': """
-                SELECT COUNT(*) FROM sent_messages 
-                WHERE sent_at >= %s AND delivery_status = 'sent'
-            """,
-            'errors_count': """
-                SELECT COUNT(*) FROM activity_log 
-                WHERE created_at >= %s AND severity IN ('error', 'critical')
-            """
-        }
+        try:
+            stats = self.stats_service.get_performance_stats(days)
+        except Error as e:
+            self.logger.error(f"خطأ في الحصول على إحصائيات الأداء: {e}")
+            stats = {name: 0 for name, _, _ in StatsService.PERFORMANCE_COUNTERS}
         
-        stats = {}
-        for key, query in queries.items():
-            try:
-                if key in ['messages_sent', 'errors_count']:
-                    result = self.execute_query(query, (start_date,), fetch=True)
-                else:
-                    result = self.execute_query(query, fetch=True)
-                
-                stats[key] = result[0][0] if result else 0
-            except Error as e:
-                self.logger.error(f"خطأ في الحصول على إحصائية {key}: {e}")
-                stats[key] = 0
+        # مقاييس pool الاتصالات
+        stats['connection_pool'] = self.connection_pool.get_stats()
+        if self.read_pool:
+            stats['read_pool'] = self.read_pool.get_stats()
+        stats['activity_log'] = self.activity_logger.get_stats()
         
         return stats
     
     def close(self):
         """إغلاق الاتصالات"""
         try:
-            if self.engine:
-                self.engine.dispose()
+            # كتابة سجلات النشاط المنتظرة قبل إغلاق الاتصالات
+            self.activity_logger.close()
+            if self.connection_pool:
+                self.connection_pool.close()
+            if self.read_pool:
+                self.read_pool.close()
             self.logger.info("تم إغلاق اتصالات قاعدة البيانات")
         except Exception as e:
             self.logger.error(f"خطأ في إغلاق قاعدة البيانات: {e}")
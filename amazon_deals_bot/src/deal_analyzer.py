@@ -8,20 +8,29 @@ import logging
 from datetime import datetime, timedelta
 import statistics
 import re
+import numpy as np
+
+from keyword_matcher import KeywordMatcher
+from scoring_models import ScoringModelRegistry
+from deal_duration import DealDurationEstimator
+from cache import TTLCache
+from records import DealCandidate
 
 class DealAnalyzer:
     """محلل ومقيم العروض"""
     
-    def __init__(self, config: Dict[str, Any], database_manager):
+    def __init__(self, config: Dict[str, Any], database_manager, price_stats=None):
         """
         تهيئة محلل العروض
         
         Args:
             config: إعدادات النظام
             database_manager: مدير قاعدة البيانات
+            price_stats: محرك إحصائيات الأسعار (اختياري)
         """
         self.config = config
         self.db = database_manager
+        self.price_stats = price_stats
         self.logger = logging.getLogger(__name__)
         
         # إعدادات التقييم
@@ -30,13 +39,31 @@ class DealAnalyzer:
         self.min_price = config['deals']['min_original_price']
         self.max_price = config['deals']['max_original_price']
         
-        # أوزان التقييم
-        self.discount_weight = self.quality_config['discount_weight']
-        self.rating_weight = self.quality_config['rating_weight']
-        self.review_count_weight = self.quality_config['review_count_weight']
-        self.price_range_weight = self.quality_config['price_range_weight']
+        # نماذج التقييم تُترجم مرة واحدة (النموذج النشط + نماذج الظل للمقارنة)
+        self.scoring_models = ScoringModelRegistry(self.quality_config)
+        
+        # فحص الخصم مقابل السعر التاريخي
+        history_check = config['deals'].get('price_history_check', {})
+        self.history_check_enabled = history_check.get('enabled', True)
+        self.min_history_days = history_check.get('min_history_days', 7)
+        self.recent_low_days = history_check.get('recent_low_days', 2)
+        
+        # مطابق الكلمات المفتاحية (الجمهور، التصفية، العلامات، الفئات) يُبنى مرة واحدة
+        self.keyword_matcher = KeywordMatcher(config['deals'].get('keywords'))
+        
+        # تقدير مدة العروض من الأعمار المرصودة (يُحدَّث من محرك العروض)
+        self.duration_estimator = DealDurationEstimator(
+            database_manager, self.keyword_matcher, config['deals'].get('duration')
+        )
+        
+        # ملخصات العروض المولدة (مفتاحها معرف العرض وإصدار الحقول المستخدمة فيها)
+        performance_config = config.get('performance', {})
+        self.summary_cache = TTLCache(
+            ttl=performance_config.get('summary_cache_ttl', 3600),
+            max_entries=performance_config.get('summary_cache_size', 4096)
+        )
     
-    def analyze_product_for_deals(self, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def analyze_product_for_deals(self, product_data: Dict[str, Any]) -> Optional[DealCandidate]:
         """
         تحليل منتج لاكتشاف العروض
         
@@ -51,14 +78,25 @@ class DealAnalyzer:
             if not self._has_discount(product_data):
                 return None
             
+            # مقارنة الخصم المعلن بالسعر التاريخي الحقيقي (من الذاكرة)
+            if not self._passes_price_history_check(product_data):
+                return None
+            
             # الحصول على السجل التاريخي للمنتج
             existing_product = self.db.get_product_by_asin(product_data['asin'])
             price_history = []
             
             if existing_product:
-                latest_price = self.db.get_latest_price(existing_product['id'])
-                if latest_price:
-                    price_history = [latest_price]
+                # ملخص الأسعار اليومي (سجل لكل يوم بدلاً من مسح price_history)
+                daily_prices = self.db.get_price_daily(existing_product['id'], days=90)
+                price_history = [
+                    {
+                        'price': day['close_price'],
+                        'min_price': day['min_price'],
+                        'price_date': day['price_date']
+                    }
+                    for day in daily_prices
+                ]
             
             # تحليل العرض
             deal_info = self._analyze_deal(product_data, price_history)
@@ -72,6 +110,128 @@ class DealAnalyzer:
             self.logger.error(f"خطأ في تحليل المنتج للعروض: {e}")
             return None
     
+    def analyze_batch(self, products: List[Dict[str, Any]],
+                      price_histories: Optional[Dict[str, List[Dict[str, Any]]]] = None
+                      ) -> List[Optional[DealCandidate]]:
+        """
+        تحليل دفعة منتجات بعمليات NumPy على مصفوفات بدلاً من منتج واحد في كل مرة
+        
+        النتائج مطابقة لاستدعاء analyze_product_for_deals لكل منتج، لكن الملخصات
+        اليومية تُحمّل باستعلام واحد للدفعة ونقاط الجودة والتصنيفات تُحسب معاً.
+        
+        Args:
+            products: بيانات المنتجات المستخرجة
+            price_histories: ملخصات الأسعار اليومية لكل ASIN (تُحمّل من قاعدة البيانات إذا لم تُمرر)
+            
+        Returns:
+            قائمة بطول products: معلومات العرض أو None لكل منتج
+        """
+        results: List[Optional[DealCandidate]] = [None] * len(products)
+        if not products:
+            return results
+        
+        def column(key: str) -> np.ndarray:
+            return np.array([float(product.get(key) or 0) for product in products])
+        
+        current_price = column('current_price')
+        original_price = np.array([
+            float(product['original_price']) if product.get('original_price') is not None
+            else float(product.get('current_price') or 0)
+            for product in products
+        ])
+        stated_discount = column('discount_percentage')
+        
+        # فحص الخصم: النسبة المعلنة أولاً ثم المحسوبة من الأسعار (مثل _has_discount)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            calculated_discount = np.where(
+                original_price > current_price,
+                (original_price - current_price) / original_price * 100, 0
+            )
+        stated_ok = stated_discount >= self.min_discount
+        calculated_ok = ~stated_ok & (original_price > 0) & (calculated_discount >= self.min_discount)
+        discount = np.where(stated_ok, stated_discount, np.round(calculated_discount, 2))
+        for index in np.flatnonzero(calculated_ok):
+            products[index]['discount_percentage'] = round(float(calculated_discount[index]), 2)
+        
+        # فحص السعر التاريخي يعتمد على قاموس في الذاكرة لكل ASIN
+        candidates = stated_ok | calculated_ok
+        for index in np.flatnonzero(candidates):
+            if not self._passes_price_history_check(products[index]):
+                candidates[index] = False
+        if not candidates.any():
+            return results
+        
+        quality_score, shadow_scores = self._score_products(products, discount)
+        # التصنيف على النقاط المقربة كما في التحليل الفردي والنقاط المحفوظة
+        quality_score = np.round(quality_score, 2)
+        
+        # التصنيفات
+        clearance = np.array([
+            bool(candidates[index]) and discount[index] >= 20 and self._is_clearance_item(product)
+            for index, product in enumerate(products)
+        ])
+        deal_type = np.select(
+            [discount >= 50, discount >= 30, clearance, discount >= 15],
+            ['lightning', 'daily', 'clearance', 'weekly'], default='other'
+        )
+        deal_strength = np.select(
+            [(discount >= 50) & (quality_score >= 8), (discount >= 30) & (quality_score >= 7),
+             (discount >= 20) & (quality_score >= 6), (discount >= 15) & (quality_score >= 5)],
+            ['excellent', 'very_good', 'good', 'fair'], default='weak'
+        )
+        urgency_level = np.select(
+            [(deal_type == 'lightning') | (quality_score >= 9),
+             np.isin(deal_type, ['daily', 'clearance']) | (quality_score >= 7)],
+            ['high', 'medium'], default='low'
+        )
+        
+        significant = (candidates & (quality_score >= 4.0) & (discount >= self.min_discount)
+                       & (current_price >= self.min_price) & (current_price <= self.max_price))
+        selected = np.flatnonzero(significant)
+        if not len(selected):
+            return results
+        
+        if price_histories is None:
+            price_histories = self.db.get_price_daily_by_asins(
+                [products[index].get('asin') for index in selected], days=90
+            )
+        
+        now = datetime.now()
+        for index in selected:
+            product = products[index]
+            price_history = price_histories.get(product.get('asin'), [])
+            score = round(float(quality_score[index]), 2)
+            deal_discount = product.get('discount_percentage', 0)
+            
+            results[index] = DealCandidate(
+                product_id=None,
+                deal_type=str(deal_type[index]),
+                original_price=float(original_price[index]),
+                deal_price=float(current_price[index]),
+                discount_percentage=deal_discount,
+                discount_amount=float(max(original_price[index] - current_price[index], 0)),
+                start_date=now,
+                end_date=self._estimate_deal_duration(str(deal_type[index]), product),
+                deal_status='active',
+                quality_score=score,
+                deal_url=product.get('amazon_url', ''),
+                is_featured=score >= 8.0,
+                analysis_metadata={
+                    'price_trend': self._analyze_price_trend(price_history),
+                    'price_lows': self._calculate_price_lows(price_history),
+                    'price_reference': product.get('price_reference'),
+                    'deal_strength': str(deal_strength[index]),
+                    'urgency_level': str(urgency_level[index]),
+                    'target_audience': self._identify_target_audience(product),
+                    'keyword_tags': self._title_tags(product),
+                    'scoring_model': self.scoring_models.active,
+                    'shadow_scores': {name: round(float(scores[index]), 2)
+                                      for name, scores in shadow_scores.items()}
+                }
+            )
+        
+        return results
+    
     def _has_discount(self, product_data: Dict[str, Any]) -> bool:
         """فحص وجود خصم في المنتج"""
         discount_percentage = product_data.get('discount_percentage')
@@ -91,8 +251,55 @@ class DealAnalyzer:
         
         return False
     
+    def _passes_price_history_check(self, product_data: Dict[str, Any]) -> bool:
+        """
+        فحص الخصم المعلن مقابل وسيط السعر خلال آخر 30 يوماً
+        
+        يضيف price_reference إلى بيانات المنتج، ويرفض الخصم إذا كان السعر
+        "قبل الخصم" مضخماً ولم يكن السعر الحالي أدنى سعر تاريخي.
+        """
+        if not self.price_stats or not self.history_check_enabled:
+            return True
+        
+        reference = self.price_stats.get_reference(
+            product_data.get('asin'), product_data.get('current_price', 0)
+        )
+        if not reference:
+            return True
+        
+        product_data['price_reference'] = reference
+        
+        if reference['history_days'] < self.min_history_days:
+            return True
+        
+        historical_discount = reference['historical_discount'] or 0
+        if historical_discount < self.min_discount and not self._is_genuine_low(reference):
+            self.logger.debug(
+                f"خصم غير حقيقي للمنتج {product_data.get('asin')}: "
+                f"المعلن {product_data.get('discount_percentage')}% - التاريخي {historical_discount}%"
+            )
+            return False
+        
+        return True
+    
+    def _is_genuine_low(self, reference: Dict[str, Any]) -> bool:
+        """
+        هل السعر الحالي أدنى سعر حقيقي (يتجاوز رفض الخصم التاريخي)
+        
+        السعر الثابت مع سعر "قبل الخصم" وهمي دائم يساوي أدنى سعر تاريخي دائماً، لذا
+        يُشترط أدنى سعر جديد أقل من السابق، أو الوصول لأدنى سعر بانخفاض حديث
+        (خلال recent_low_days) من أسعار أعلى في نافذة الوسيط.
+        """
+        if reference.get('is_new_low'):
+            return True
+        
+        median = reference.get('median_30d')
+        return bool(reference['is_all_time_low']
+                    and reference['days_at_current_price'] <= self.recent_low_days
+                    and median and median > reference['all_time_low'])
+    
     def _analyze_deal(self, product_data: Dict[str, Any], 
-                     price_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+                     price_history: List[Dict[str, Any]]) -> DealCandidate:
         """
         تحليل تفاصيل العرض
         
@@ -113,32 +320,39 @@ class DealAnalyzer:
         # تحديد نوع العرض
         deal_type = self._determine_deal_type(product_data, price_history)
         
-        # حساب نقاط الجودة
-        quality_score = self._calculate_quality_score(product_data, price_history)
+        # حساب نقاط الجودة (ونقاط نماذج الظل)
+        scores, shadow_scores = self._score_products([product_data])
+        quality_score = round(float(scores[0]), 2)
         
         # تحديد مدة العرض المتوقعة
-        estimated_end_date = self._estimate_deal_duration(deal_type)
-        
-        deal_info = {
-            'product_id': None,  # سيتم تحديده لاحقاً
-            'deal_type': deal_type,
-            'original_price': original_price,
-            'deal_price': current_price,
-            'discount_percentage': discount_percentage,
-            'discount_amount': discount_amount,
-            'start_date': datetime.now(),
-            'end_date': estimated_end_date,
-            'deal_status': 'active',
-            'quality_score': quality_score,
-            'deal_url': product_data.get('amazon_url', ''),
-            'is_featured': quality_score >= 8.0,  # العروض المميزة
-            'analysis_metadata': {
+        estimated_end_date = self._estimate_deal_duration(deal_type, product_data)
+        
+        deal_info = DealCandidate(
+            product_id=None,  # سيتم تحديده لاحقاً
+            deal_type=deal_type,
+            original_price=original_price,
+            deal_price=current_price,
+            discount_percentage=discount_percentage,
+            discount_amount=discount_amount,
+            start_date=datetime.now(),
+            end_date=estimated_end_date,
+            deal_status='active',
+            quality_score=quality_score,
+            deal_url=product_data.get('amazon_url', ''),
+            is_featured=quality_score >= 8.0,  # العروض المميزة
+            analysis_metadata={
                 'price_trend': self._analyze_price_trend(price_history),
+                'price_lows': self._calculate_price_lows(price_history),
+                'price_reference': product_data.get('price_reference'),
                 'deal_strength': self._assess_deal_strength(discount_percentage, quality_score),
                 'urgency_level': self._calculate_urgency_level(deal_type, quality_score),
-                'target_audience': self._identify_target_audience(product_data)
+                'target_audience': self._identify_target_audience(product_data),
+                'keyword_tags': self._title_tags(product_data),
+                'scoring_model': self.scoring_models.active,
+                'shadow_scores': {name: round(float(shadow[0]), 2)
+                                  for name, shadow in shadow_scores.items()}
             }
-        }
+        )
         
         return deal_info
     
@@ -169,12 +383,19 @@ class DealAnalyzer:
         
         return 'other'
     
+    def _title_tags(self, product_data: Dict[str, Any]) -> Dict[str, List[str]]:
+        """وسوم عنوان المنتج من مسح واحد (تُحفظ في keyword_tags لإعادة استخدامها)"""
+        tags = product_data.get('keyword_tags')
+        if tags is None:
+            matched = self.keyword_matcher.match(product_data.get('title'))
+            tags = product_data['keyword_tags'] = {
+                group: sorted(group_tags) for group, group_tags in matched.items()
+            }
+        return tags
+    
     def _is_clearance_item(self, product_data: Dict[str, Any]) -> bool:
         """فحص إذا كان المنتج من عروض التصفية"""
-        title = product_data.get('title', '').lower()
-        clearance_keywords = ['تصفية', 'clearance', 'outlet', 'last chance', 'final sale']
-        
-        return any(keyword in title for keyword in clearance_keywords)
+        return 'clearance' in self._title_tags(product_data)
     
     def _has_coupon(self, product_data: Dict[str, Any]) -> bool:
         """فحص وجود كوبون خصم"""
@@ -184,71 +405,52 @@ class DealAnalyzer:
     def _calculate_quality_score(self, product_data: Dict[str, Any], 
                                price_history: List[Dict[str, Any]]) -> float:
         """
-        حساب نقاط جودة العرض
+        حساب نقاط جودة العرض بالنموذج النشط
         
         Returns:
             نقاط الجودة من 0 إلى 10
         """
-        scores = []
-        
-        # نقاط الخصم (0-10)
-        discount = product_data.get('discount_percentage', 0)
-        discount_score = min(10, (discount / 70) * 10)  # 70% = نقاط كاملة
-        scores.append(discount_score * self.discount_weight)
-        
-        # نقاط التقييم (0-10)
-        rating = product_data.get('rating', 0)
-        rating_score = (rating / 5) * 10 if rating else 5  # افتراضي 5 إذا لم يكن متوفر
-        scores.append(rating_score * self.rating_weight)
-        
-        # نقاط عدد المراجعات (0-10)
-        review_count = product_data.get('review_count', 0)
-        review_score = min(10, (review_count / 1000) * 10)  # 1000 مراجعة = نقاط كاملة
-        scores.append(review_score * self.review_count_weight)
-        
-        # نقاط نطاق السعر (0-10)
-        price = product_data.get('current_price', 0)
-        price_score = self._calculate_price_range_score(price)
-        scores.append(price_score * self.price_range_weight)
-        
-        # النقاط الإضافية
-        bonus_score = self._calculate_bonus_score(product_data)
-        
-        total_score = sum(scores) + bonus_score
-        return round(min(10, max(0, total_score)), 2)
+        scores, _ = self._score_products([product_data])
+        return round(float(scores[0]), 2)
     
-    def _calculate_price_range_score(self, price: float) -> float:
-        """حساب نقاط نطاق السعر"""
-        if price <= 100:
-            return 8  # أسعار منخفضة جذابة
-        elif price <= 500:
-            return 10  # النطاق الأمثل
-        elif price <= 1000:
-            return 7  # أسعار متوسطة
-        elif price <= 2000:
-            return 5  # أسعار عالية
-        else:
-            return 3  # أسعار عالية جداً
-    
-    def _calculate_bonus_score(self, product_data: Dict[str, Any]) -> float:
-        """حساب النقاط الإضافية"""
-        bonus = 0
-        
-        # Prime shipping
-        if product_data.get('is_prime'):
-            bonus += 0.5
-        
-        # توفر المنتج
-        if product_data.get('availability') == 'in_stock':
-            bonus += 0.3
-        
-        # علامة تجارية معروفة
-        brand = product_data.get('brand', '').lower()
-        known_brands = ['samsung', 'apple', 'sony', 'lg', 'hp', 'dell', 'nike', 'adidas']
-        if any(brand_name in brand for brand_name in known_brands):
-            bonus += 0.2
+    def _score_products(self, products: List[Dict[str, Any]],
+                        discount: Optional[np.ndarray] = None
+                        ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        تقييم منتجات بالنموذج النشط ونماذج الظل
         
-        return bonus
+        Args:
+            products: بيانات المنتجات
+            discount: نسب الخصم المحسوبة مسبقاً (افتراضياً discount_percentage)
+            
+        Returns:
+            (نقاط النموذج النشط، اسم نموذج الظل -> نقاطه)
+        """
+        if discount is None:
+            discount = np.array([float(product.get('discount_percentage') or 0) for product in products])
+        
+        # الخصم المستخدم في النقاط لا يتجاوز الخصم الحقيقي مقارنة بالسعر التاريخي
+        discount = discount.copy()
+        for index, product in enumerate(products):
+            reference = product.get('price_reference')
+            if (reference and reference.get('historical_discount') is not None
+                    and reference.get('history_days', 0) >= self.min_history_days):
+                discount[index] = min(discount[index], max(0, reference['historical_discount']))
+        
+        features = {
+            'discount': discount,
+            'rating': np.array([float(product.get('rating') or 0) for product in products]),
+            'review_count': np.array([float(product.get('review_count') or 0) for product in products]),
+            'price': np.array([float(product.get('current_price') or 0) for product in products]),
+            'is_prime': np.array([bool(product.get('is_prime')) for product in products], dtype=float),
+            'in_stock': np.array([product.get('availability') == 'in_stock' for product in products], dtype=float),
+            'known_brand': np.array([self._is_known_brand(product) for product in products], dtype=float)
+        }
+        return self.scoring_models.score(features)
+    
+    def _is_known_brand(self, product_data: Dict[str, Any]) -> bool:
+        """فحص إذا كانت العلامة التجارية معروفة"""
+        return 'brand' in self.keyword_matcher.match(product_data.get('brand'))
     
     def _analyze_price_trend(self, price_history: List[Dict[str, Any]]) -> str:
         """تحليل اتجاه السعر"""
@@ -257,19 +459,33 @@ class DealAnalyzer:
         
         prices = [record['price'] for record in price_history[-10:]]  # آخر 10 سجلات
         
-        if len(prices) >= 3:
-            # حساب الاتجاه
-            recent_avg = statistics.mean(prices[-3:])
-            older_avg = statistics.mean(prices[:-3])
-            
-            if recent_avg < older_avg * 0.9:
-                return 'declining'
-            elif recent_avg > older_avg * 1.1:
-                return 'rising'
-            else:
-                return 'stable'
-        
-        return 'stable'
+        # حساب الاتجاه: متوسط آخر 3 سجلات مقابل ما قبلها، أو آخر سجل مقابل ما قبله
+        # عندما لا يبقى قبل آخر 3 سجلات ما يُحسب متوسطه
+        recent_count = 3 if len(prices) >= 4 else 1
+        recent_avg = statistics.mean(prices[-recent_count:])
+        older_avg = statistics.mean(prices[:-recent_count])
+        
+        if recent_avg < older_avg * 0.9:
+            return 'declining'
+        elif recent_avg > older_avg * 1.1:
+            return 'rising'
+        else:
+            return 'stable'
+    
+    def _calculate_price_lows(self, price_history: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+        """حساب أدنى سعر خلال آخر 30 و90 يوماً من الملخص اليومي"""
+        today = datetime.now().date()
+        lows = {}
+        
+        for days in (30, 90):
+            window = [
+                record.get('min_price', record['price'])
+                for record in price_history
+                if record.get('price_date') and (today - record['price_date']).days <= days
+            ]
+            lows[f'low_{days}d'] = min(window) if window else None
+        
+        return lows
     
     def _assess_deal_strength(self, discount_percentage: float, quality_score: float) -> str:
         """تقييم قوة العرض"""
@@ -295,7 +511,6 @@ class DealAnalyzer:
     
     def _identify_target_audience(self, product_data: Dict[str, Any]) -> List[str]:
         """تحديد الجمهور المستهدف"""
-        title = product_data.get('title', '').lower()
         price = product_data.get('current_price', 0)
         
         audiences = []
@@ -306,33 +521,21 @@ class DealAnalyzer:
         elif price >= 1000:
             audiences.append('premium_buyers')
         
-        # حسب الفئة
-        if any(keyword in title for keyword in ['laptop', 'computer', 'gaming']):
-            audiences.append('tech_enthusiasts')
-        elif any(keyword in title for keyword in ['fashion', 'clothing', 'shoes']):
-            audiences.append('fashion_lovers')
-        elif any(keyword in title for keyword in ['home', 'kitchen', 'furniture']):
-            audiences.append('homeowners')
-        elif any(keyword in title for keyword in ['book', 'kindle']):
-            audiences.append('readers')
+        # حسب الفئة (أول جمهور مطابق بترتيب جدول الكلمات)
+        audience = self.keyword_matcher.first_tag(self._title_tags(product_data), 'audience')
+        if audience:
+            audiences.append(audience)
         
         return audiences if audiences else ['general']
     
-    def _estimate_deal_duration(self, deal_type: str) -> Optional[datetime]:
-        """تقدير مدة العرض"""
-        now = datetime.now()
-        
-        duration_map = {
-            'lightning': timedelta(hours=6),
-            'daily': timedelta(days=1),
-            'weekly': timedelta(days=7),
-            'clearance': timedelta(days=30),
-            'coupon': timedelta(days=14),
-            'other': timedelta(days=3)
-        }
-        
-        duration = duration_map.get(deal_type, timedelta(days=1))
-        return now + duration
+    def _estimate_deal_duration(self, deal_type: str,
+                                product_data: Optional[Dict[str, Any]] = None) -> Optional[datetime]:
+        """تقدير موعد انتهاء العرض من أعمار العروض المماثلة (الفئة ونوع العرض)"""
+        category = None
+        if product_data is not None:
+            category = self.keyword_matcher.first_tag(self._title_tags(product_data), 'category')
+        
+        return datetime.now() + self.duration_estimator.estimate(deal_type, category)
     
     def _is_significant_deal(self, deal_info: Dict[str, Any]) -> bool:
         """فحص إذا كان العرض مهماً بما يكفي للنشر"""
@@ -354,58 +557,9 @@ class DealAnalyzer:
         
         return True
     
-    def compare_deals(self, deals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        مقارنة وترتيب العروض
-        
-        Args:
-            deals: قائمة العروض
-            
-        Returns:
-            العروض مرتبة حسب الأولوية
-        """
-        try:
-            # ترتيب حسب نقاط الجودة ونسبة الخصم
-            sorted_deals = sorted(deals, 
-                                key=lambda x: (x.get('quality_score', 0), 
-                                             x.get('discount_percentage', 0)), 
-                                reverse=True)
-            
-            # إضافة ترتيب الأولوية
-            for i, deal in enumerate(sorted_deals):
-                deal['priority_rank'] = i + 1
-                deal['is_top_deal'] = i < 5  # أفضل 5 عروض
-            
-            return sorted_deals
-            
-        except Exception as e:
-            self.logger.error(f"خطأ في مقارنة العروض: {e}")
-            return deals
-    
-    def filter_duplicate_deals(self, deals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        فلترة العروض المكررة
-        
-        Args:
-            deals: قائمة العروض
-            
-        Returns:
-            العروض بدون تكرار
-        """
-        seen_asins = set()
-        unique_deals = []
-        
-        for deal in deals:
-            asin = deal.get('asin')
-            if asin and asin not in seen_asins:
-                seen_asins.add(asin)
-                unique_deals.append(deal)
-        
-        return unique_deals
-    
     def generate_deal_summary(self, deal: Dict[str, Any]) -> Dict[str, str]:
         """
-        إنشاء ملخص للعرض
+        إنشاء ملخص للعرض (من الذاكرة المؤقتة إذا لم تتغير حقوله)
         
         Args:
             deal: معلومات العرض
@@ -414,22 +568,35 @@ class DealAnalyzer:
             ملخص العرض
         """
         try:
-            analysis = deal.get('analysis_metadata', {})
+            deal_id = deal.get('id')
+            if deal_id is None:
+                return self._build_deal_summary(deal)
             
-            summary = {
-                'title': self._generate_deal_title(deal),
-                'description': self._generate_deal_description(deal),
-                'urgency_message': self._generate_urgency_message(deal),
-                'value_proposition': self._generate_value_proposition(deal),
-                'recommendation': self._generate_recommendation(deal)
-            }
-            
-            return summary
+            # الفشل يرفع استثناءً من دالة التحميل فلا يُخزن ويُعاد التوليد في الاستدعاء التالي
+            key = (deal_id, self._summary_version(deal))
+            return dict(self.summary_cache.get_or_load(key, lambda: self._build_deal_summary(deal)))
             
         except Exception as e:
             self.logger.error(f"خطأ في إنشاء ملخص العرض: {e}")
             return {}
     
+    def _summary_version(self, deal: Dict[str, Any]) -> Tuple:
+        """الحقول التي يعتمد عليها الملخص (تغير أي منها ينشئ ملخصاً جديداً)"""
+        analysis = deal.get('analysis_metadata') or {}
+        return (deal.get('deal_type'), deal.get('discount_percentage'), deal.get('original_price'),
+                deal.get('deal_price'), deal.get('quality_score'),
+                analysis.get('urgency_level'), analysis.get('deal_strength'))
+    
+    def _build_deal_summary(self, deal: Dict[str, Any]) -> Dict[str, str]:
+        """توليد نصوص ملخص العرض (يرفع الاستثناء لمن يستدعيه)"""
+        return {
+            'title': self._generate_deal_title(deal),
+            'description': self._generate_deal_description(deal),
+            'urgency_message': self._generate_urgency_message(deal),
+            'value_proposition': self._generate_value_proposition(deal),
+            'recommendation': self._generate_recommendation(deal)
+        }
+    
     def _generate_deal_title(self, deal: Dict[str, Any]) -> str:
         """إنشاء عنوان للعرض"""
         discount = deal.get('discount_percentage', 0)
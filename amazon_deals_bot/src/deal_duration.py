@@ -0,0 +1,173 @@
+"""
+وحدة تقدير مدة العروض من الأعمار المرصودة تاريخياً
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta
+import logging
+import threading
+
+# المدد الافتراضية عند نقص البيانات (كانت ثابتة في DealAnalyzer)
+DEFAULT_DURATIONS_HOURS = {
+    'lightning': 6,
+    'daily': 24,
+    'weekly': 24 * 7,
+    'clearance': 24 * 30,
+    'coupon': 24 * 14,
+    'other': 24 * 3
+}
+
+class DealDurationEstimator:
+    """
+    تقدير عمر العرض لكل (فئة، نوع عرض) من العروض المنتهية
+
+    عمر العرض المرصود = آخر تأكيد لوجوده (deals.last_seen_at) - بدايته، وليس
+    موعد الانتهاء المقدر، حتى لا يتعلم المقدر من تقديراته. العرض الذي أنهاه
+    المنهي عند موعده المقدر (expiry_reason = 'timeout') لم تُرصد نهايته، فعمره
+    عينة مقطوعة: العرض عاش على الأقل هذه المدة. لذا الـ quantile يُحسب من منحنى
+    البقاء (Kaplan-Meier) وليس من ترتيب الأعمار مباشرة. الفئة تُستخرج من عنوان
+    المنتج بمطابق الكلمات المفتاحية (مجموعة category). إذا قلت العينات يُستخدم
+    نوع العرض وحده ثم المدد الافتراضية.
+    """
+
+    def __init__(self, database_manager, keyword_matcher, duration_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة المقدر
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            keyword_matcher: مطابق الكلمات المفتاحية (لتحديد الفئة من العنوان)
+            duration_config: الإعدادات (deals.duration)
+        """
+        self.db = database_manager
+        self.keyword_matcher = keyword_matcher
+        self.logger = logging.getLogger(__name__)
+
+        duration_config = duration_config or {}
+        self.history_days = duration_config.get('history_days', 90)
+        self.min_samples = duration_config.get('min_samples', 20)
+        self.quantile = duration_config.get('quantile', 0.5)
+        self.refresh_interval = timedelta(hours=duration_config.get('refresh_hours', 6))
+        self.batch_size = duration_config.get('batch_size', 1000)
+        # العرض المرصود مرة واحدة عمره صفر؛ الحد الأدنى يمنع إنهاء العروض فور فتحها
+        self.min_duration = timedelta(hours=duration_config.get('min_hours', 1))
+        self.defaults = {
+            deal_type: timedelta(hours=hours)
+            for deal_type, hours in {**DEFAULT_DURATIONS_HOURS,
+                                     **(duration_config.get('defaults_hours') or {})}.items()
+        }
+
+        # (الفئة أو None، نوع العرض) -> العمر المقدر بالثواني (للمجموعات ذات العينات الكافية)
+        self._estimates: Dict[Tuple[Optional[str], str], float] = {}
+        self._refreshed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def category_of(self, title: Optional[str]) -> Optional[str]:
+        """فئة المنتج من عنوانه"""
+        return self.keyword_matcher.first_tag(self.keyword_matcher.match(title), 'category')
+
+    def refresh(self) -> int:
+        """
+        إعادة حساب توزيع الأعمار من العروض المنتهية (بترقيم keyset على المعرف)
+
+        Returns:
+            عدد العينات
+        """
+        query = """
+        SELECT d.id, d.deal_type, d.start_date, d.last_seen_at, d.expiry_reason, p.title
+        FROM deals d
+        JOIN products p ON p.id = d.product_id
+        WHERE d.id > %s AND d.deal_status = 'expired'
+            AND d.last_seen_at IS NOT NULL AND d.start_date >= %s
+        ORDER BY d.id
+        LIMIT %s
+        """
+
+        cutoff = datetime.now() - timedelta(days=self.history_days)
+        # (العمر بالثواني، هل رُصدت نهايته)
+        lifetimes: Dict[Tuple[Optional[str], str], List[Tuple[float, bool]]] = {}
+        last_id = 0
+        samples = 0
+
+        try:
+            while True:
+                rows = self.db.execute_read(query, (last_id, cutoff, self.batch_size))
+                if not rows:
+                    break
+
+                for _, deal_type, start_date, last_seen_at, expiry_reason, title in rows:
+                    lifetime = (last_seen_at - start_date).total_seconds()
+                    if lifetime < 0:
+                        continue
+                    sample = (lifetime, expiry_reason != 'timeout')
+                    category = self.category_of(title)
+                    lifetimes.setdefault((None, deal_type), []).append(sample)
+                    if category:
+                        lifetimes.setdefault((category, deal_type), []).append(sample)
+                    samples += 1
+
+                last_id = rows[-1][0]
+                if len(rows) < self.batch_size:
+                    break
+
+        except Exception as e:
+            self.logger.error(f"خطأ في تحميل أعمار العروض: {e}")
+            return 0
+
+        estimates = {
+            key: self._quantile(samples)
+            for key, samples in lifetimes.items() if len(samples) >= self.min_samples
+        }
+
+        with self._lock:
+            self._estimates = estimates
+            self._refreshed_at = datetime.now()
+
+        self.logger.info(f"تم حساب أعمار العروض من {samples} عرض منتهي")
+        return samples
+
+    def refresh_if_stale(self) -> bool:
+        """إعادة الحساب إذا مضت refresh_hours منذ آخر حساب"""
+        if self._refreshed_at and datetime.now() - self._refreshed_at < self.refresh_interval:
+            return False
+        self.refresh()
+        return True
+
+    def _quantile(self, samples: List[Tuple[float, bool]]) -> float:
+        """
+        quantile العمر من منحنى البقاء (Kaplan-Meier)
+
+        العينة المقطوعة تخرج من مجموعة المعرضين للانتهاء دون أن تُنقص البقاء. إذا
+        لم ينخفض البقاء إلى 1 - quantile (معظم العينات مقطوعة) يُعاد أطول عمر مرصود
+        كحد أدنى. دون عينات مقطوعة النتيجة تساوي quantile الأعمار المرتبة.
+        """
+        # النهايات المرصودة قبل المقطوعة عند تساوي العمر
+        samples = sorted(samples, key=lambda sample: (sample[0], not sample[1]))
+        target = 1 - self.quantile
+        survival = 1.0
+        at_risk = len(samples)
+        for lifetime, observed in samples:
+            if observed:
+                survival *= (at_risk - 1) / at_risk
+                if survival < target - 1e-9:
+                    return lifetime
+            at_risk -= 1
+        return samples[-1][0]
+
+    def estimate(self, deal_type: str, category: Optional[str] = None) -> timedelta:
+        """
+        العمر المتوقع للعرض (quantile من الأعمار المرصودة)
+
+        Args:
+            deal_type: نوع العرض
+            category: فئة المنتج
+
+        Returns:
+            المدة المتوقعة
+        """
+        estimates = self._estimates
+        for key in ((category, deal_type), (None, deal_type)):
+            if key in estimates:
+                return max(self.min_duration, timedelta(seconds=estimates[key]))
+        return self.defaults.get(deal_type, timedelta(days=1))
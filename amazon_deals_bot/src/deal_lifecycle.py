@@ -0,0 +1,93 @@
+"""
+وحدة إدارة دورة حياة العروض (عرض نشط واحد لكل منتج ومستوى سعر)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, Optional, Any, Tuple
+import logging
+
+from cache import TTLCache
+
+class DealLifecycleManager:
+    """مدير دورة حياة العروض: تحديث العرض القائم أو فتح عرض جديد عند تغير السعر"""
+
+    def __init__(self, database_manager, lifecycle_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة مدير دورة الحياة
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            lifecycle_config: إعدادات دورة الحياة (deals.lifecycle)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        lifecycle_config = lifecycle_config or {}
+        # نسبة تغير السعر (%) التي تعتبر مستوى سعر جديداً
+        self.price_change_threshold = lifecycle_config.get('price_change_threshold', 2.0)
+
+        # العرض النشط لكل منتج: product_id -> {'id', 'opening_price'} (محدود الحجم)
+        self._active_by_product = TTLCache(
+            ttl=lifecycle_config.get('active_cache_ttl', 3600),
+            max_entries=lifecycle_config.get('active_cache_size', 10000)
+        )
+
+        self.stats = {
+            'opened': 0,
+            'refreshed': 0,
+            'replaced': 0
+        }
+
+    def save(self, deal_record: Dict[str, Any]) -> Tuple[Optional[int], bool]:
+        """
+        حفظ عرض وفق دورة الحياة
+
+        Args:
+            deal_record: سجل العرض الجاهز للإدراج
+
+        Returns:
+            (معرف العرض، هل هو عرض جديد)
+        """
+        product_id = deal_record['product_id']
+        active_deal = self._get_active_deal(product_id)
+
+        if active_deal:
+            # المقارنة مع سعر فتح العرض وليس آخر سعر، حتى لا تتراكم انخفاضات صغيرة
+            # متتالية في عرض واحد دون تجاوز حد التغير
+            if not self._is_material_change(active_deal['opening_price'], deal_record['deal_price']):
+                if self.db.refresh_deal(active_deal['id'], deal_record):
+                    self.stats['refreshed'] += 1
+                    return active_deal['id'], False
+
+                # العرض انتهى خارج هذا المدير - نفتح عرضاً جديداً
+                self._active_by_product.invalidate(product_id)
+            else:
+                # مستوى سعر جديد: إنهاء العرض السابق
+                self.db.expire_deals([active_deal['id']], reason='replaced')
+                self.stats['replaced'] += 1
+
+        deal_id = self.db.insert_deal(deal_record)
+        if deal_id:
+            self._active_by_product.set(product_id, {
+                'id': deal_id,
+                'opening_price': deal_record['deal_price']
+            })
+            self.stats['opened'] += 1
+
+        return deal_id, True
+
+    def _get_active_deal(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """الحصول على العرض النشط للمنتج من الذاكرة أو قاعدة البيانات"""
+        active_deal = self._active_by_product.get(product_id)
+        if active_deal is None:
+            active_deal = self.db.get_active_deal_for_product(product_id)
+            if active_deal:
+                self._active_by_product.set(product_id, active_deal)
+        return active_deal
+
+    def _is_material_change(self, old_price: float, new_price: float) -> bool:
+        """فحص إذا كان تغير السعر كافياً لاعتباره عرضاً جديداً"""
+        if not old_price:
+            return True
+        change = abs(new_price - old_price) / old_price * 100
+        return change > self.price_change_threshold
@@ -0,0 +1,102 @@
+"""
+وحدة ترتيب أفضل العروض أثناء الدورة (top-K بكومة محدودة الحجم)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+import heapq
+import itertools
+import threading
+
+class TopKRanker:
+    """
+    ترتيب تدفقي لأفضل K عروض حسب (نقاط الجودة، نسبة الخصم)
+
+    يحتفظ بكومة صغرى بحجم K: كل عرض جديد يُقارن بأضعف عرض محتفظ به (O(log K))،
+    لذا الذاكرة لا تتجاوز K عروض مهما كبرت الدورة، والترتيب متاح في أي لحظة.
+    هذا هو الترتيب الوحيد لعروض الدورة: عند التساوي يتقدم العرض الأسبق، وأول ظهور
+    لكل ASIN فقط يُحتسب (العروض بلا ASIN تُرتب دون فحص التكرار).
+    """
+
+    def __init__(self, k: int = 50, top_deals: int = 5):
+        """
+        تهيئة المرتب
+
+        Args:
+            k: عدد العروض المحتفظ بها
+            top_deals: عدد العروض التي تُعلَّم كأفضل العروض (is_top_deal)
+        """
+        self.k = k
+        self.top_deals = top_deals
+
+        self._heap: List[Tuple[float, float, int, Dict[str, Any]]] = []
+        self._seen_asins = set()
+        self._sequence = itertools.count()
+        self._pushed = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def pushed(self) -> int:
+        """عدد العروض المدفوعة منذ آخر reset"""
+        return self._pushed
+
+    def push(self, deal: Dict[str, Any]) -> bool:
+        """
+        إضافة عرض للترتيب
+
+        Args:
+            deal: معلومات العرض
+
+        Returns:
+            True إذا دخل العرض ضمن أفضل K
+        """
+        asin = deal.get('asin')
+        # الترتيب التصاعدي للتسلسل معكوس حتى يُستبعد الأحدث أولاً عند التساوي
+        entry = (deal.get('quality_score') or 0, deal.get('discount_percentage') or 0,
+                 -next(self._sequence), deal)
+
+        with self._lock:
+            if asin:
+                if asin in self._seen_asins:
+                    return False
+                self._seen_asins.add(asin)
+            self._pushed += 1
+
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+                return True
+            if entry[:3] > self._heap[0][:3]:
+                heapq.heapreplace(self._heap, entry)
+                return True
+            return False
+
+    def top(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        أفضل العروض حتى الآن مرتبة تنازلياً مع priority_rank و is_top_deal
+
+        Args:
+            limit: عدد العروض (الافتراضي: K)
+
+        Returns:
+            نسخ من العروض المرتبة
+        """
+        with self._lock:
+            entries = heapq.nlargest(limit or self.k, self._heap, key=lambda entry: entry[:3])
+
+        ranked = []
+        for index, entry in enumerate(entries):
+            deal = entry[3].copy()
+            deal['priority_rank'] = index + 1
+            deal['is_top_deal'] = index < self.top_deals
+            ranked.append(deal)
+        return ranked
+
+    def reset(self):
+        """بدء ترتيب جديد (مع بداية كل دورة)"""
+        with self._lock:
+            self._heap = []
+            self._seen_asins = set()
+            self._pushed = 0
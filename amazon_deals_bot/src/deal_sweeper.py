@@ -0,0 +1,186 @@
+"""
+وحدة إنهاء العروض منتهية الصلاحية باستخدام كومة المواعيد
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple, Callable
+import asyncio
+import heapq
+import logging
+import threading
+from datetime import datetime
+
+class DealExpirySweeper:
+    """منهي العروض: كومة صغرى لمواعيد انتهاء العروض النشطة في الذاكرة"""
+
+    def __init__(self, database_manager, sweeper_config: Optional[Dict[str, Any]] = None,
+                 on_expire: Optional[Callable[[List[int]], None]] = None):
+        """
+        تهيئة منهي العروض
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            sweeper_config: إعدادات المنهي (deals.expiry_sweeper)
+            on_expire: دالة تُستدعى بمعرفات العروض المنتهية
+        """
+        self.db = database_manager
+        self.on_expire = on_expire
+        self.logger = logging.getLogger(__name__)
+
+        sweeper_config = sweeper_config or {}
+        self.interval = sweeper_config.get('interval', 60)
+        self.batch_size = sweeper_config.get('batch_size', 500)
+
+        # كومة (end_date, deal_id) وآخر موعد معروف لكل عرض (للحذف الكسول)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._deadlines: Dict[int, datetime] = {}
+        # track يُستدعى من خيط كاتب خط المعالجة والمسح من حلقة الأحداث
+        self._lock = threading.Lock()
+        self._stop = False
+
+        self.stats = {
+            'tracked': 0,
+            'expired': 0,
+            'sweeps': 0
+        }
+
+    def rebuild(self) -> int:
+        """
+        إعادة بناء الكومة من العروض النشطة في قاعدة البيانات
+
+        المواعيد تُحمّل في حالة محلية ثم تُدمج تحت القفل: موعد متتبع في الذاكرة
+        (ومنه ما سجله track أثناء التحميل) أحدث من المحمّل فلا يُستبدل.
+
+        Returns:
+            عدد العروض المتتبعة
+        """
+        query = """
+        SELECT id, end_date FROM deals
+        WHERE deal_status = 'active' AND end_date IS NOT NULL AND id > %s
+        ORDER BY id
+        LIMIT %s
+        """
+
+        deadlines: Dict[int, datetime] = {}
+        last_id = 0
+
+        try:
+            while True:
+                rows = self.db.execute_query(query, (last_id, self.batch_size), fetch=True)
+                if not rows:
+                    break
+
+                for deal_id, end_date in rows:
+                    deadlines[deal_id] = end_date
+
+                last_id = rows[-1][0]
+                if len(rows) < self.batch_size:
+                    break
+
+            with self._lock:
+                for deal_id, end_date in deadlines.items():
+                    if deal_id not in self._deadlines:
+                        self._deadlines[deal_id] = end_date
+                        self._heap.append((end_date, deal_id))
+                heapq.heapify(self._heap)
+                self.stats['tracked'] = len(self._deadlines)
+            self.logger.info(f"تم تحميل {len(deadlines)} موعد انتهاء للعروض النشطة")
+
+        except Exception as e:
+            self.logger.error(f"خطأ في إعادة بناء مواعيد انتهاء العروض: {e}")
+
+        return len(self._deadlines)
+
+    def track(self, deal_id: int, end_date: Optional[datetime]):
+        """تتبع موعد انتهاء عرض جديد أو محدث"""
+        if not deal_id or not end_date:
+            return
+
+        with self._lock:
+            if self._deadlines.get(deal_id) == end_date:
+                return
+
+            self._deadlines[deal_id] = end_date
+            heapq.heappush(self._heap, (end_date, deal_id))
+            self.stats['tracked'] = len(self._deadlines)
+
+    def next_deadline(self) -> Optional[datetime]:
+        """أقرب موعد انتهاء صالح"""
+        with self._lock:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """
+        إنهاء جميع العروض المستحقة على دفعات
+
+        Args:
+            now: الوقت المرجعي
+
+        Returns:
+            عدد العروض المنتهية
+        """
+        now = now or datetime.now()
+        due_ids = []
+
+        with self._lock:
+            while True:
+                self._discard_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, deal_id = heapq.heappop(self._heap)
+                del self._deadlines[deal_id]
+                due_ids.append(deal_id)
+
+        expired_count = 0
+        for start in range(0, len(due_ids), self.batch_size):
+            batch = due_ids[start:start + self.batch_size]
+            try:
+                # نهاية العرض الفعلية غير مرصودة (عينة مقطوعة لمقدر الأعمار)
+                expired_count += self.db.expire_deals(batch, reason='timeout')
+            except Exception as e:
+                self.logger.error(f"خطأ في إنهاء العروض: {e}")
+                # إعادة العروض للكومة لمحاولة لاحقة
+                for deal_id in batch:
+                    self.track(deal_id, now)
+
+        self.stats['sweeps'] += 1
+        self.stats['expired'] += expired_count
+        self.stats['tracked'] = len(self._deadlines)
+
+        if expired_count:
+            self.logger.info(f"تم إنهاء {expired_count} عرض منتهي الصلاحية")
+            if self.on_expire:
+                self.on_expire(due_ids)
+
+        return expired_count
+
+    async def run(self):
+        """تشغيل المنهي في الخلفية حتى الإيقاف"""
+        self._stop = False
+        # استعلامات قاعدة البيانات متزامنة، لذا تُشغَّل في خيط حتى لا تتوقف حلقة الأحداث
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.rebuild)
+
+        while not self._stop:
+            await loop.run_in_executor(None, self.sweep)
+
+            # الانتظار حتى أقرب موعد أو الفترة الافتراضية
+            wait = self.interval
+            next_deadline = self.next_deadline()
+            if next_deadline:
+                wait = min(wait, max(1, (next_deadline - datetime.now()).total_seconds()))
+
+            await asyncio.sleep(wait)
+
+    def stop(self):
+        """إيقاف المنهي"""
+        self._stop = True
+
+    def _discard_stale(self):
+        """إزالة مدخلات الكومة التي تغير موعدها أو لم تعد متتبعة (تحت القفل)"""
+        while self._heap:
+            end_date, deal_id = self._heap[0]
+            if self._deadlines.get(deal_id) == end_date:
+                break
+            heapq.heappop(self._heap)
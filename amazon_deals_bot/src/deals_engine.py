@@ -5,16 +5,25 @@
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import yaml
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import time
+from functools import partial
 
 from database import DatabaseManager
 from scraper import AmazonScraper
 from deal_analyzer import DealAnalyzer
+from price_stats import PriceStatsEngine
+from deal_lifecycle import DealLifecycleManager
+from deal_sweeper import DealExpirySweeper
+from cache import TTLCache
+from deal_ranker import TopKRanker
+from change_detector import ProductChangeDetector
+from recheck_queue import RecheckQueue
+from records import Deal, DealCandidate, ScrapedProduct
 
 class DealsEngine:
     """محرك العروض الرئيسي"""
@@ -33,6 +42,11 @@ class DealsEngine:
         self.db_manager = None
         self.scraper = None
         self.analyzer = None
+        self.price_stats = None
+        self.deal_lifecycle = None
+        self.deal_sweeper = None
+        self.change_detector = None
+        self.recheck_queue = None
         
         # إحصائيات التشغيل
         self.stats = {
@@ -44,6 +58,20 @@ class DealsEngine:
             'start_time': datetime.now()
         }
         
+        # ذاكرة مؤقتة لقائمة العروض النشطة المرتبة (تُبطل عند الكتابة)
+        performance_config = self.config.get('performance', {})
+        self.active_deals_cache = TTLCache(
+            ttl=performance_config.get('active_deals_cache_ttl', 60),
+            max_entries=performance_config.get('active_deals_cache_size', 64)
+        )
+        
+        # ترتيب أفضل عروض الدورة الحالية أثناء اكتشافها (ذاكرة محدودة بـ top_k)
+        ranking_config = self.config['deals'].get('ranking', {})
+        self.deal_ranker = TopKRanker(
+            k=ranking_config.get('top_k', 50),
+            top_deals=ranking_config.get('top_deals', 5)
+        )
+        
         # حالة التشغيل
         self.is_running = False
         self.should_stop = False
@@ -53,6 +81,13 @@ class DealsEngine:
         try:
             with open(config_path, 'r', encoding='utf-8') as file:
                 config = yaml.safe_load(file)
+            
+            # ملف نماذج التقييم يُحل نسبةً لمجلد ملف الإعدادات وليس لمجلد التشغيل
+            scoring_config = config.get('deals', {}).get('quality_scoring', {})
+            models_file = scoring_config.get('models_file')
+            if models_file and not os.path.isabs(models_file):
+                config_dir = os.path.dirname(os.path.abspath(config_path))
+                scoring_config['models_file'] = os.path.join(config_dir, models_file)
             return config
         except Exception as e:
             print(f"خطأ في تحميل الإعدادات: {e}")
@@ -103,8 +138,34 @@ class DealsEngine:
             self.scraper = AmazonScraper(self.config)
             self.logger.info("تم تهيئة مستخرج البيانات")
             
+            # تحميل إحصائيات الأسعار التراكمية
+            self.price_stats = PriceStatsEngine(self.db_manager)
+            self.price_stats.load()
+            
             # تهيئة المحلل
-            self.analyzer = DealAnalyzer(self.config, self.db_manager)
+            self.analyzer = DealAnalyzer(self.config, self.db_manager, self.price_stats)
+            
+            # بصمات المنتجات المحللة (المنتجات غير المتغيرة لا يُعاد تحليلها)
+            self.change_detector = ProductChangeDetector(
+                self.db_manager, self.config['deals'].get('change_detection')
+            )
+            self.change_detector.load()
+            
+            # أعمار العروض المرصودة وطابور إعادة فحص العروض النشطة قرب نهايتها
+            self.analyzer.duration_estimator.refresh()
+            self.recheck_queue = RecheckQueue(self.db_manager, self.config['deals'].get('recheck'))
+            self.recheck_queue.rebuild()
+            
+            # مدير دورة حياة العروض
+            self.deal_lifecycle = DealLifecycleManager(
+                self.db_manager, self.config['deals'].get('lifecycle')
+            )
+            
+            # منهي العروض منتهية الصلاحية (يُبنى من قاعدة البيانات عند التشغيل)
+            self.deal_sweeper = DealExpirySweeper(
+                self.db_manager, self.config['deals'].get('expiry_sweeper'),
+                on_expire=lambda deal_ids: self.active_deals_cache.invalidate()
+            )
             self.logger.info("تم تهيئة محلل العروض")
             
             # تسجيل بداية التشغيل
@@ -163,9 +224,17 @@ class DealsEngine:
         self.logger.info("بدء دورة استخراج العروض")
         
         try:
+            self.deal_ranker.reset()
+            
+            # نماذج التقييم المعدلة في models_file تسري من هذه الدورة
+            if self.analyzer:
+                self.analyzer.scoring_models.reload_if_changed()
+                self.analyzer.duration_estimator.refresh_if_stale()
+            
             # إعادة تعيين إحصائيات الدورة
             cycle_stats = {
                 'products_scraped': 0,
+                'products_unchanged': 0,
                 'deals_found': 0,
                 'deals_processed': 0,
                 'errors': 0
@@ -174,43 +243,11 @@ class DealsEngine:
             # الحصول على قائمة المصطلحات للبحث
             search_terms = self._get_search_terms()
             
-            # استخراج البيانات بشكل متوازي
-            all_products = []
-            
-            with ThreadPoolExecutor(max_workers=self.config['performance']['max_concurrent_scrapers']) as executor:
-                # إرسال مهام البحث
-                future_to_term = {
-                    executor.submit(self._scrape_search_term, term): term 
-                    for term in search_terms
-                }
-                
-                # جمع النتائج
-                for future in as_completed(future_to_term):
-                    term = future_to_term[future]
-                    try:
-                        products = future.result()
-                        all_products.extend(products)
-                        cycle_stats['products_scraped'] += len(products)
-                        self.logger.info(f"تم استخراج {len(products)} منتج من البحث: {term}")
-                    except Exception as e:
-                        cycle_stats['errors'] += 1
-                        self.logger.error(f"خطأ في استخراج البحث {term}: {e}")
-            
-            # استخراج صفحة العروض الخاصة
-            try:
-                deals_page_products = self.scraper.scrape_deals_page()
-                all_products.extend(deals_page_products)
-                cycle_stats['products_scraped'] += len(deals_page_products)
-                self.logger.info(f"تم استخراج {len(deals_page_products)} منتج من صفحة العروض")
-            except Exception as e:
-                cycle_stats['errors'] += 1
-                self.logger.error(f"خطأ في استخراج صفحة العروض: {e}")
+            # الاستخراج والتحليل والحفظ كمراحل متزامنة (أول العروض تُحفظ أثناء الاستخراج)
+            await self._run_pipeline(search_terms, cycle_stats)
             
-            # معالجة المنتجات المستخرجة
-            if all_products:
-                processed_deals = await self._process_extracted_products(all_products)
-                cycle_stats['deals_found'] = len(processed_deals)
-                cycle_stats['deals_processed'] = len(processed_deals)
+            # إعادة فحص العروض النشطة المرجح تغيرها
+            await self._run_rechecks(cycle_stats)
             
             # تحديث الإحصائيات العامة
             self.stats['products_scraped'] += cycle_stats['products_scraped']
@@ -263,7 +300,7 @@ class DealsEngine:
         
         return search_terms[:20]  # تحديد العدد لتجنب الحمل الزائد
     
-    def _scrape_search_term(self, search_term: str) -> List[Dict[str, Any]]:
+    def _scrape_search_term(self, search_term: str) -> List[ScrapedProduct]:
         """استخراج منتجات مصطلح بحث محدد"""
         try:
             products = self.scraper.search_products(search_term, page=1)
@@ -279,52 +316,312 @@ class DealsEngine:
             self.logger.error(f"خطأ في استخراج مصطلح البحث {search_term}: {e}")
             return []
     
-    async def _process_extracted_products(self, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """معالجة المنتجات المستخرجة واكتشاف العروض"""
-        processed_deals = []
+    async def _process_extracted_products(self, products: List[ScrapedProduct],
+                                          cycle_stats: Optional[Dict[str, Any]] = None,
+                                          force: bool = False) -> List[Deal]:
+        """
+        معالجة المنتجات المستخرجة واكتشاف العروض
+        
+        كل عرض محفوظ يُدفع إلى deal_ranker فوراً، لذا أفضل العروض متاحة عبر
+        get_top_deals قبل انتهاء الدورة.
+        
+        Args:
+            products: المنتجات المستخرجة
+            cycle_stats: إحصائيات الدورة
+            force: تحليل جميع المنتجات حتى غير المتغيرة (إعادة الفحص)
+        
+        Returns:
+            أفضل العروض المرتبة (top_k)
+        """
+        analyzed, unchanged_count = self._analyze_products(products, force)
+        if cycle_stats is not None:
+            cycle_stats['products_unchanged'] = cycle_stats.get('products_unchanged', 0) + unchanged_count
+        
+        self._write_analyzed(analyzed, cycle_stats)
+        return self.deal_ranker.top()
+    
+    def _analyze_products(self, products: List[ScrapedProduct], force: bool = False
+                          ) -> Tuple[List[Tuple[ScrapedProduct, Optional[DealCandidate]]], int]:
+        """
+        مرحلة التحليل: استبعاد المنتجات غير المتغيرة وتحليل الباقي دفعة واحدة
+        
+        لا تعتمد على حلقة الأحداث، لذا تُشغَّل في خيط عامل ضمن خط المعالجة.
+        
+        Returns:
+            (أزواج المنتج ونتيجة تحليله، عدد المنتجات غير المتغيرة)
+        """
+        # المنتجات التي لم تتغير مدخلات تحليلها تُحدَّث last_seen_at لها فقط
+        unchanged = []
+        if self.change_detector is not None and not force:
+            products, unchanged = self.change_detector.split(products)
+        
+        self.logger.info(f"بدء معالجة {len(products)} منتج ({len(unchanged)} دون تغيير)")
+        
+        # تحليل الدفعة كاملة مرة واحدة (ملخصات الأسعار باستعلام واحد ونقاط متجهة)
+        try:
+            analyzed_deals = self.analyzer.analyze_batch(products)
+        except Exception as e:
+            self.logger.error(f"خطأ في التحليل المجمع، الرجوع للتحليل الفردي: {e}")
+            analyzed_deals = [self.analyzer.analyze_product_for_deals(product) for product in products]
+        
+        return list(zip(products, analyzed_deals)), len(unchanged)
+    
+    def _write_analyzed(self, analyzed: List[Tuple[ScrapedProduct, Optional[DealCandidate]]],
+                        cycle_stats: Optional[Dict[str, Any]] = None) -> int:
+        """
+        مرحلة الحفظ: حفظ المنتجات والعروض وسجلات الأسعار ثم حفظ الإحصائيات والبصمات دفعة واحدة
         
-        self.logger.info(f"بدء معالجة {len(products)} منتج")
+        استدعاءات قاعدة البيانات متزامنة، لذا تُشغَّل في خيط الكاتب ضمن خط المعالجة.
         
-        for product in products:
+        Returns:
+            عدد العروض المحفوظة
+        """
+        processed_count = 0
+        new_deals_count = 0
+        
+        for product, deal_info in analyzed:
+            product_id = None
+            # المنتج بلا عرض يكفي تحليله؛ المنتج ذو العرض يلزم حفظ عرضه
+            saved = not deal_info
             try:
-                # تحليل المنتج للعروض
-                deal_info = self.analyzer.analyze_product_for_deals(product)
-                
                 if deal_info:
                     # حفظ المنتج في قاعدة البيانات
-                    product_id = await self._save_product(product)
+                    product_id = self._save_product(product)
                     
                     if product_id:
                         # ربط العرض بالمنتج
                         deal_info['product_id'] = product_id
                         
                         # حفظ العرض
-                        deal_id = await self._save_deal(deal_info)
+                        deal_id = self._save_deal(deal_info)
                         
                         if deal_id:
-                            deal_info['id'] = deal_id
-                            deal_info.update(product)  # إضافة بيانات المنتج
-                            processed_deals.append(deal_info)
+                            # العرض يشير لمنتجه بدلاً من نسخ بياناته
+                            deal = Deal.from_candidate(deal_info, product, deal_id)
+                            self.deal_ranker.push(deal)
+                            
+                            # الفحص التالي قرب نهاية العرض المتوقعة
+                            if self.recheck_queue is not None:
+                                self.recheck_queue.schedule(deal_id, product.get('asin'), deal.end_date,
+                                                            deal.quality_score)
+                            processed_count += 1
+                            new_deals_count += int(bool(deal.get('is_new_deal')))
+                            saved = True
                             
                             self.logger.debug(f"تم اكتشاف عرض جديد: {product.get('title', 'Unknown')}")
                 
                 # حفظ سجل السعر حتى لو لم يكن هناك عرض
                 if product.get('current_price'):
-                    await self._save_price_history(product, product_id if 'product_id' in locals() else None)
+                    self._save_price_history(product, product_id)
+                    
+                    # تحديث إحصائيات الأسعار التراكمية بعد التحليل
+                    if self.price_stats:
+                        self.price_stats.observe(product.get('asin'), product['current_price'])
+                
+                # العرض الذي فشل حفظه لا تُسجل بصمته كي يُعاد تحليله في الدورة القادمة
+                if saved and self.change_detector is not None:
+                    self.change_detector.record(product)
                 
             except Exception as e:
                 self.logger.error(f"خطأ في معالجة المنتج: {e}")
                 continue
         
-        # فلترة العروض المكررة وترتيبها
-        if processed_deals:
-            processed_deals = self.analyzer.filter_duplicate_deals(processed_deals)
-            processed_deals = self.analyzer.compare_deals(processed_deals)
+        # حفظ إحصائيات الأسعار المعدلة دفعة واحدة
+        if self.price_stats:
+            self.price_stats.flush()
+        
+        # حفظ البصمات الجديدة وتحديث last_seen_at للمنتجات غير المتغيرة
+        if self.change_detector is not None:
+            self.change_detector.flush()
+        
+        # العروض المحفوظة تغير ترتيب العروض النشطة
+        if processed_count:
+            self.active_deals_cache.invalidate()
+        
+        if cycle_stats is not None:
+            cycle_stats['deals_found'] += new_deals_count
+            cycle_stats['deals_processed'] += processed_count
+        
+        self.logger.info(f"تم معالجة {processed_count} عرض جديد")
+        return processed_count
+    
+    async def _run_pipeline(self, search_terms: List[str], cycle_stats: Dict[str, Any]):
+        """
+        خط معالجة الدورة: استخراج ← تحليل ← حفظ بطوابير محدودة بين المراحل
+        
+        لكل مرحلة تزامنها الخاص: المستخرجون في خيوط (max_concurrent_scrapers)، عمال
+        التحليل في خيوط منفصلة (analysis_workers)، وكاتب واحد في خيطه الخاص يدمج الدفعات
+        المنتظرة حتى writer_batch_size منتج (حلقة الأحداث لا تنتظر قاعدة البيانات). المستخرج لا يُحرر مكانه حتى يدخل ناتجه الطابور،
+        لذا امتلاء طابور يوقف المرحلة التي قبله بدلاً من تكديس النتائج في الذاكرة.
+        مدة الدورة تقترب من مدة أبطأ مرحلة بدلاً من مجموع المراحل.
+        
+        Args:
+            search_terms: مصطلحات البحث (صفحة العروض تُستخرج كمهمة إضافية)
+            cycle_stats: إحصائيات الدورة
+        """
+        performance_config = self.config['performance']
+        pipeline_config = performance_config.get('pipeline', {})
+        scrapers = performance_config['max_concurrent_scrapers']
+        analysis_workers = pipeline_config.get('analysis_workers', 2)
+        writer_batch_size = pipeline_config.get('writer_batch_size', 200)
+        
+        product_queue: asyncio.Queue = asyncio.Queue(maxsize=pipeline_config.get('product_queue_size', 10))
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=pipeline_config.get('write_queue_size', 10))
+        scrape_slots = asyncio.Semaphore(scrapers)
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        
+        jobs = [(f"البحث: {term}", partial(self._scrape_search_term, term)) for term in search_terms]
+        jobs.append(("صفحة العروض", self.scraper.scrape_deals_page))
+        
+        async def scrape(source: str, job, executor: ThreadPoolExecutor):
+            async with scrape_slots:
+                try:
+                    products = await loop.run_in_executor(executor, job)
+                except Exception as e:
+                    cycle_stats['errors'] += 1
+                    self.logger.error(f"خطأ في استخراج {source}: {e}")
+                    return
+                
+                cycle_stats['products_scraped'] += len(products)
+                self.logger.info(f"تم استخراج {len(products)} منتج من {source}")
+                if products:
+                    await product_queue.put(products)
+        
+        async def analyze(executor: ThreadPoolExecutor):
+            while True:
+                products = await product_queue.get()
+                if products is None:
+                    break
+                try:
+                    analyzed, unchanged_count = await loop.run_in_executor(
+                        executor, self._analyze_products, products
+                    )
+                except Exception as e:
+                    cycle_stats['errors'] += 1
+                    self.logger.error(f"خطأ في مرحلة التحليل: {e}")
+                    continue
+                cycle_stats['products_unchanged'] += unchanged_count
+                await write_queue.put(analyzed)
+        
+        async def write(executor: ThreadPoolExecutor):
+            finished = False
+            while not finished:
+                batch = await write_queue.get()
+                if batch is None:
+                    break
+                # دمج الدفعات المنتظرة لتقليل عمليات الحفظ المجمعة
+                while len(batch) < writer_batch_size and not write_queue.empty():
+                    more = write_queue.get_nowait()
+                    if more is None:
+                        finished = True
+                        break
+                    batch = batch + more
+                try:
+                    await loop.run_in_executor(executor, self._write_analyzed, batch, cycle_stats)
+                except Exception as e:
+                    cycle_stats['errors'] += 1
+                    self.logger.error(f"خطأ في مرحلة الحفظ: {e}")
+                    continue
+                if 'first_write_seconds' not in cycle_stats:
+                    cycle_stats['first_write_seconds'] = round(time.monotonic() - started, 1)
+        
+        with ThreadPoolExecutor(max_workers=scrapers) as scrape_executor, \
+                ThreadPoolExecutor(max_workers=analysis_workers) as analysis_executor, \
+                ThreadPoolExecutor(max_workers=1) as write_executor:
+            writer = asyncio.create_task(write(write_executor))
+            analyzers = [asyncio.create_task(analyze(analysis_executor)) for _ in range(analysis_workers)]
+            
+            try:
+                await asyncio.gather(*(scrape(source, job, scrape_executor) for source, job in jobs))
+                
+                # إنهاء المراحل بالترتيب بعد تفريغ طوابيرها
+                for _ in analyzers:
+                    await product_queue.put(None)
+                await asyncio.gather(*analyzers)
+                await write_queue.put(None)
+                await writer
+            finally:
+                # عند الإلغاء أو الخطأ لا تبقى مراحل معلقة على طوابيرها بعد انتهاء الدورة
+                for task in analyzers + [writer]:
+                    task.cancel()
+                await asyncio.gather(*analyzers, writer, return_exceptions=True)
+    
+    async def _run_rechecks(self, cycle_stats: Optional[Dict[str, Any]] = None) -> int:
+        """
+        إعادة فحص العروض المستحقة من صفحات منتجاتها
+        
+        العرض الذي لا يزال قائماً يُحدَّث ويُجدول مجدداً؛ العرض الذي حُلل منتجه ولم ينتج
+        عنه عرض يُنهى فوراً بدلاً من انتظار موعد انتهائه المقدر. فشل حفظ العرض لا يعني
+        انتهاءه، لذا يُعاد فحصه لاحقاً. الجلب والتحليل والحفظ متزامنة فتُشغَّل في خيوط
+        كما في _run_pipeline حتى لا تتوقف حلقة الأحداث.
+        
+        Returns:
+            عدد العروض المنتهية
+        """
+        if self.recheck_queue is None or not self.scraper:
+            return 0
+        
+        entries = self.recheck_queue.pop_due()
+        if not entries:
+            return 0
+        
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.config['performance']['max_concurrent_scrapers']) as executor:
+            details = await asyncio.gather(*(
+                loop.run_in_executor(executor, self.scraper.get_product_details, entry['asin'])
+                for entry in entries
+            ), return_exceptions=True)
+        
+        checked = []
+        for entry, product in zip(entries, details):
+            if isinstance(product, Exception) or not product or not product.get('current_price'):
+                # تعذر الفحص (خطأ شبكة أو صفحة غير مكتملة) - محاولة لاحقة
+                self.recheck_queue.retry(entry)
+                continue
+            product.setdefault('amazon_url', f"{self.scraper.base_url}/dp/{entry['asin']}")
+            checked.append((entry, product))
+        
+        ended_ids = []
+        if checked:
+            # التحليل يحافظ على ترتيب المنتجات (force يلغي استبعاد غير المتغيرة)
+            analyzed, _ = await loop.run_in_executor(
+                None, partial(self._analyze_products, [product for _, product in checked], force=True)
+            )
+            await loop.run_in_executor(None, self._write_analyzed, analyzed, cycle_stats)
+            
+            for (entry, _), (_, deal_info) in zip(checked, analyzed):
+                if not deal_info:
+                    ended_ids.append(entry['deal_id'])
+                elif not self.recheck_queue.is_scheduled(entry['asin']):
+                    self.recheck_queue.retry(entry)
+        
+        ended = 0
+        if ended_ids:
+            try:
+                ended = await loop.run_in_executor(None, self.db_manager.expire_deals, ended_ids)
+                self.active_deals_cache.invalidate()
+            except Exception as e:
+                self.logger.error(f"خطأ في إنهاء العروض بعد إعادة الفحص: {e}")
         
-        self.logger.info(f"تم معالجة {len(processed_deals)} عرض جديد")
-        return processed_deals
+        if cycle_stats is not None:
+            cycle_stats['rechecked'] = cycle_stats.get('rechecked', 0) + len(checked)
+        self.logger.info(f"تم إعادة فحص {len(checked)} عرض، انتهى منها {ended}")
+        return ended
     
-    async def _save_product(self, product_data: Dict[str, Any]) -> Optional[int]:
+    def get_top_deals(self, limit: Optional[int] = None) -> List[Deal]:
+        """
+        أفضل عروض الدورة الحالية حتى الآن (متاحة أثناء الدورة)
+        
+        Args:
+            limit: عدد العروض (الافتراضي: top_k)
+            
+        Returns:
+            العروض مرتبة مع priority_rank و is_top_deal
+        """
+        return self.deal_ranker.top(limit)
+    
+    def _save_product(self, product_data: Dict[str, Any]) -> Optional[int]:
         """حفظ المنتج في قاعدة البيانات"""
         try:
             # تحضير بيانات المنتج
@@ -348,7 +645,7 @@ class DealsEngine:
             self.logger.error(f"خطأ في حفظ المنتج: {e}")
             return None
     
-    async def _save_deal(self, deal_info: Dict[str, Any]) -> Optional[int]:
+    def _save_deal(self, deal_info: Dict[str, Any]) -> Optional[int]:
         """حفظ العرض في قاعدة البيانات"""
         try:
             deal_record = {
@@ -366,10 +663,16 @@ class DealsEngine:
                 'quality_score': deal_info['quality_score']
             }
             
-            deal_id = self.db_manager.insert_deal(deal_record)
+            # تحديث العرض النشط في مكانه أو فتح عرض جديد عند تغير السعر
+            deal_id, is_new = self.deal_lifecycle.save(deal_record)
+            deal_info['is_new_deal'] = is_new
             
-            # تسجيل اكتشاف العرض
-            if deal_id:
+            # تتبع موعد انتهاء العرض
+            if deal_id and self.deal_sweeper:
+                self.deal_sweeper.track(deal_id, deal_record['end_date'])
+            
+            # تسجيل اكتشاف العرض الجديد فقط
+            if deal_id and is_new:
                 self.db_manager.log_activity(
                     'deal_found',
                     f"تم اكتشاف عرض جديد - خصم {deal_info['discount_percentage']}%",
@@ -388,7 +691,7 @@ class DealsEngine:
             self.logger.error(f"خطأ في حفظ العرض: {e}")
             return None
     
-    async def _save_price_history(self, product_data: Dict[str, Any], product_id: Optional[int]):
+    def _save_price_history(self, product_data: Dict[str, Any], product_id: Optional[int]):
         """حفظ سجل السعر"""
         if not product_id or not product_data.get('current_price'):
             return
@@ -416,28 +719,56 @@ class DealsEngine:
         except Exception as e:
             self.logger.error(f"خطأ في حفظ إحصائيات الأداء: {e}")
     
-    async def get_active_deals(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """الحصول على العروض النشطة"""
-        try:
-            deals = self.db_manager.get_active_deals(limit)
-            
-            # إضافة ملخصات للعروض
-            for deal in deals:
-                summary = self.analyzer.generate_deal_summary(deal)
-                deal['summary'] = summary
+    async def get_active_deals(self, limit: int = 50,
+                               after: Optional[Tuple[float, float, int]] = None) -> List[Dict[str, Any]]:
+        """
+        الحصول على العروض النشطة (عبر الذاكرة المؤقتة)
+        
+        Args:
+            limit: عدد العروض المطلوبة
+            after: مفتاح آخر عرض في الصفحة السابقة (quality_score, discount_percentage, id)
             
-            return deals
+        Returns:
+            قائمة العروض النشطة مع ملخصاتها
+        """
+        try:
+            cache_key = (limit, tuple(after) if after else None)
+            deals = self.active_deals_cache.get_or_load(
+                cache_key, lambda: self._load_active_deals(limit, after)
+            )
+            return list(deals)
             
         except Exception as e:
             self.logger.error(f"خطأ في الحصول على العروض النشطة: {e}")
             return []
     
+    def _load_active_deals(self, limit: int,
+                           after: Optional[Tuple[float, float, int]] = None) -> List[Dict[str, Any]]:
+        """تحميل العروض النشطة من قاعدة البيانات وإضافة ملخصاتها"""
+        deals = self.db_manager.get_active_deals(limit, after)
+        
+        # إضافة ملخصات للعروض
+        for deal in deals:
+            summary = self.analyzer.generate_deal_summary(deal)
+            deal['summary'] = summary
+        
+        return deals
+    
     async def cleanup_old_data(self):
         """تنظيف البيانات القديمة"""
         try:
             self.logger.info("بدء تنظيف البيانات القديمة")
-            self.db_manager.cleanup_old_data(days=30)
-            self.logger.info("تم تنظيف البيانات القديمة")
+            # الأرشفة أولاً حتى تُضغط السجلات القديمة بكامل دقتها قبل حذف المكرر منها
+            archive_report = self.db_manager.archive_price_history()
+            self.logger.info(f"تمت أرشفة سجلات الأسعار القديمة: {archive_report}")
+            
+            retention_days = self.config.get('maintenance', {}).get('cleanup', {}).get('retention_days', 30)
+            report = self.db_manager.cleanup_old_data(days=retention_days)
+            self.logger.info(f"تم تنظيف البيانات القديمة: {report}")
+            
+            # صيانة أقسام تاريخ الأسعار
+            partitions_report = self.db_manager.maintain_partitions()
+            self.logger.info(f"تمت صيانة أقسام تاريخ الأسعار: {partitions_report}")
         except Exception as e:
             self.logger.error(f"خطأ في تنظيف البيانات: {e}")
     
@@ -467,6 +798,9 @@ class DealsEngine:
         self.logger.info("بدء إيقاف محرك العروض...")
         self.should_stop = True
         
+        if self.deal_sweeper:
+            self.deal_sweeper.stop()
+        
         # انتظار انتهاء العمليات الجارية
         timeout = 30  # ثانية
         start_time = time.time()
@@ -0,0 +1,142 @@
+"""
+وحدة مطابقة الكلمات المفتاحية المتعددة (Aho-Corasick) لتصنيف عناوين المنتجات
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Collection, Dict, List, Optional, Set, Tuple
+from collections import deque
+
+# الجداول الافتراضية (تُستبدل كل مجموعة منها بمثيلتها في deals.keywords)
+DEFAULT_KEYWORD_TABLES: Dict[str, Dict[str, List[str]]] = {
+    'audience': {
+        'tech_enthusiasts': ['laptop', 'computer', 'gaming', 'لابتوب', 'كمبيوتر', 'ألعاب'],
+        'fashion_lovers': ['fashion', 'clothing', 'shoes', 'أزياء', 'ملابس', 'حذاء'],
+        'homeowners': ['home', 'kitchen', 'furniture', 'منزل', 'مطبخ', 'أثاث'],
+        'readers': ['book', 'kindle', 'كتاب', 'رواية']
+    },
+    'clearance': {
+        'clearance': ['تصفية', 'clearance', 'outlet', 'last chance', 'final sale']
+    },
+    'brand': {
+        'samsung': ['samsung', 'سامسونج'],
+        'apple': ['apple'],
+        'sony': ['sony', 'سوني'],
+        'lg': ['lg'],
+        'hp': ['hp'],
+        'dell': ['dell', 'ديل'],
+        'nike': ['nike', 'نايك'],
+        'adidas': ['adidas', 'أديداس']
+    },
+    'category': {}
+}
+
+# توحيد أشكال الحروف العربية حتى تطابق الكلمة بأي طريقة كتابة شائعة
+_ARABIC_NORMALIZATION = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ة': 'ه', 'ـ': None,
+    **{chr(code): None for code in range(0x064B, 0x0653)}  # التشكيل
+})
+
+def normalize_text(text: str) -> str:
+    """تحويل النص لحروف صغيرة وتوحيد الحروف العربية وإزالة التشكيل"""
+    return text.lower().translate(_ARABIC_NORMALIZATION)
+
+class KeywordMatcher:
+    """
+    مطابق Aho-Corasick لجميع الكلمات المفتاحية في جداول الوسوم
+
+    يُبنى مرة واحدة، ثم يمسح النص في مرور واحد ويعيد كل الوسوم التي ظهرت
+    كلماتها كنص جزئي (نفس دلالة keyword in title)، بتكلفة لا تعتمد على عدد الكلمات.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        """
+        بناء المطابق
+
+        Args:
+            tables: المجموعة -> الوسم -> الكلمات (تُدمج مع DEFAULT_KEYWORD_TABLES)
+        """
+        self.tables = dict(DEFAULT_KEYWORD_TABLES)
+        self.tables.update(tables or {})
+
+        # ترتيب الوسوم داخل كل مجموعة كما في الإعدادات (للأولوية في first_tag)
+        self._tag_order: Dict[str, List[str]] = {
+            group: list(tags) for group, tags in self.tables.items()
+        }
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[frozenset] = [frozenset()]
+        self._build()
+
+    def _build(self):
+        """بناء الـ trie وروابط الفشل"""
+        outputs: List[Set[Tuple[str, str]]] = [set()]
+
+        for group, tags in self.tables.items():
+            for tag, keywords in tags.items():
+                for keyword in keywords:
+                    keyword = normalize_text(str(keyword))
+                    if not keyword:
+                        continue
+                    state = 0
+                    for char in keyword:
+                        next_state = self._goto[state].get(char)
+                        if next_state is None:
+                            next_state = len(self._goto)
+                            self._goto[state][char] = next_state
+                            self._goto.append({})
+                            self._fail.append(0)
+                            outputs.append(set())
+                        state = next_state
+                    outputs[state].add((group, tag))
+
+        # روابط الفشل بالعرض أولاً، ودمج مخرجات حالة الفشل في كل حالة
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                outputs[next_state] |= outputs[self._fail[next_state]]
+
+        self._output = [frozenset(output) for output in outputs]
+
+    def match(self, text: Optional[str]) -> Dict[str, Set[str]]:
+        """
+        مسح النص وإرجاع جميع الوسوم المطابقة
+
+        Args:
+            text: النص (عنوان المنتج أو العلامة التجارية)
+
+        Returns:
+            المجموعة -> الوسوم المطابقة
+        """
+        found: Set[Tuple[str, str]] = set()
+        if text:
+            goto, fail, output = self._goto, self._fail, self._output
+            state = 0
+            for char in normalize_text(text):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state]:
+                    found |= output[state]
+
+        tags: Dict[str, Set[str]] = {}
+        for group, tag in found:
+            tags.setdefault(group, set()).add(tag)
+        return tags
+
+    def first_tag(self, tags: Dict[str, Collection[str]], group: str) -> Optional[str]:
+        """أول وسم مطابق في مجموعة حسب ترتيب الإعدادات"""
+        matched = tags.get(group)
+        if not matched:
+            return None
+        for tag in self._tag_order.get(group, []):
+            if tag in matched:
+                return tag
+        return None
@@ -0,0 +1,234 @@
+"""
+وحدة كشف العروض شبه المكررة (نسخ المنتج بألوان أو مقاسات مختلفة) عبر MinHash/LSH
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Set, Tuple
+from collections import deque
+from datetime import datetime, timedelta
+import itertools
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from keyword_matcher import normalize_text
+
+# كلمات تميّز نسخ المنتج الواحد ولا تميّز المنتج نفسه
+DEFAULT_VARIANT_WORDS = [
+    'color', 'colour', 'size', 'black', 'white', 'red', 'blue', 'green', 'grey', 'gray',
+    'silver', 'gold', 'pink', 'purple', 'yellow', 'orange', 'brown', 'beige', 'navy',
+    'xs', 's', 'm', 'l', 'xl', 'xxl', 'xxxl', 'small', 'medium', 'large',
+    'لون', 'مقاس', 'اسود', 'ابيض', 'احمر', 'ازرق', 'اخضر', 'رمادي', 'فضي', 'ذهبي',
+    'وردي', 'بنفسجي', 'اصفر', 'برتقالي', 'بني', 'صغير', 'وسط', 'كبير'
+]
+
+_TOKEN = re.compile(r'\w+')
+# عدد أولي أكبر من 2^32 لتبديلات MinHash
+_PRIME = np.uint64(4294967311)
+
+class NearDuplicateDetector:
+    """
+    كشف العروض شبه المكررة مقابل العروض المبثوثة خلال آخر N ساعة
+
+    كل عنوان (بعد التوحيد وإزالة كلمات النسخ) يتحول إلى بصمة MinHash، وتُقسم
+    البصمة إلى نطاقات LSH؛ العروض التي تتشارك نطاقاً واحداً على الأقل فقط تُقارن،
+    لذا الكلفة لا تنمو تربيعياً مع عدد العروض. التأكيد يتطلب تشابه العنوان
+    وتطابق العلامة التجارية (إن وُجدت) وتقارب السعر.
+    """
+
+    def __init__(self, database_manager=None, duplicates_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة الكاشف
+
+        Args:
+            database_manager: مدير قاعدة البيانات (لتحميل العروض المبثوثة مؤخراً)
+            duplicates_config: إعدادات الكشف (deals.near_duplicates)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        duplicates_config = duplicates_config or {}
+        self.enabled = duplicates_config.get('enabled', True)
+        self.window = timedelta(hours=duplicates_config.get('window_hours', 24))
+        self.threshold = duplicates_config.get('similarity_threshold', 0.7)
+        self.price_tolerance = duplicates_config.get('price_tolerance', 0.15)
+        self.bands = duplicates_config.get('bands', 16)
+        self.rows = duplicates_config.get('rows_per_band', 4)
+        self.variant_words = {normalize_text(word) for word in
+                              duplicates_config.get('variant_words', DEFAULT_VARIANT_WORDS)}
+
+        num_perm = self.bands * self.rows
+        rng = np.random.RandomState(duplicates_config.get('seed', 1))
+        self._a = rng.randint(1, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+
+        # العروض المتذكرة: المعرف -> (البصمة، العلامة، السعر، مفاتيح النطاقات)
+        self._entries: Dict[int, Tuple[np.ndarray, str, float, List[Tuple[int, bytes]]]] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[int]] = {}
+        self._expiry: deque = deque()
+        self._ids = itertools.count()
+
+    def signature(self, title: Optional[str]) -> Optional[np.ndarray]:
+        """
+        بصمة MinHash لعنوان منتج
+
+        Returns:
+            مصفوفة بطول bands * rows أو None إذا لم يبقَ من العنوان كلمات مميزة
+        """
+        tokens = {token for token in _TOKEN.findall(normalize_text(title or ''))
+                  if token not in self.variant_words}
+        if not tokens:
+            return None
+
+        hashes = np.array([zlib.crc32(token.encode('utf-8')) for token in tokens], dtype=np.uint64)
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def filter(self, deals: List[Dict[str, Any]], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        إبقاء أفضل عرض في كل مجموعة شبه مكررة
+
+        العروض تُفحص بترتيب الجودة؛ يُستبعد العرض إذا كان شبه مكرر لعرض مبثوث خلال
+        النافذة أو لعرض أفضل منه في نفس الدفعة.
+
+        Args:
+            deals: العروض المرشحة للبث
+            now: الوقت الحالي
+
+        Returns:
+            العروض المتبقية مرتبة كما وردت
+        """
+        if not self.enabled or not deals:
+            return deals
+
+        self._prune(now or datetime.now())
+
+        ranked = sorted(range(len(deals)), reverse=True,
+                        key=lambda index: (deals[index].get('quality_score') or 0,
+                                           deals[index].get('discount_percentage') or 0))
+
+        # عروض الدفعة المقبولة تُضاف مؤقتاً للمقارنة ثم تُزال
+        batch_ids = []
+        kept = set()
+        try:
+            for index in ranked:
+                deal = deals[index]
+                signature = self.signature(deal.get('title'))
+                if signature is not None:
+                    brand = normalize_text(deal.get('brand') or '')
+                    price = float(deal.get('deal_price') or 0)
+                    if self._find_duplicate(signature, brand, price) is not None:
+                        self.logger.debug(f"عرض شبه مكرر: {deal.get('title', '')[:80]}")
+                        continue
+                    batch_ids.append(self._add(signature, brand, price))
+                kept.add(index)
+        finally:
+            for entry_id in batch_ids:
+                self._remove(entry_id)
+
+        removed = len(deals) - len(kept)
+        if removed:
+            self.logger.info(f"تم استبعاد {removed} عرض شبه مكرر")
+        return [deal for index, deal in enumerate(deals) if index in kept]
+
+    def remember(self, deals: List[Dict[str, Any]], sent_at: Optional[datetime] = None):
+        """
+        تسجيل عروض مبثوثة حتى تُستبعد نسخها خلال النافذة
+
+        Args:
+            deals: العروض المبثوثة
+            sent_at: وقت البث
+        """
+        if not self.enabled:
+            return
+
+        sent_at = sent_at or datetime.now()
+        for deal in deals:
+            signature = self.signature(deal.get('title'))
+            if signature is None:
+                continue
+            entry_id = self._add(signature, normalize_text(deal.get('brand') or ''),
+                                 float(deal.get('deal_price') or 0))
+            self._expiry.append((sent_at + self.window, entry_id))
+
+    def load_recent(self) -> int:
+        """
+        تحميل العروض المبثوثة خلال النافذة من sent_messages (عند بدء التشغيل)
+
+        Returns:
+            عدد العروض المحملة
+        """
+        if not self.enabled or self.db is None:
+            return 0
+
+        query = """
+        SELECT p.title, p.brand, d.deal_price, MAX(s.sent_at)
+        FROM sent_messages s
+        JOIN deals d ON d.id = s.deal_id
+        JOIN products p ON p.id = d.product_id
+        WHERE s.sent_at >= %s AND s.delivery_status = 'sent'
+        GROUP BY d.id, p.title, p.brand, d.deal_price
+        ORDER BY MAX(s.sent_at)
+        """
+
+        try:
+            rows = self.db.execute_read(query, (datetime.now() - self.window,)) or []
+        except Exception as e:
+            self.logger.error(f"خطأ في تحميل العروض المبثوثة مؤخراً: {e}")
+            return 0
+
+        for title, brand, deal_price, sent_at in rows:
+            # SQLite يعيد نتيجة MAX() كنص وليس كتاريخ
+            if isinstance(sent_at, str):
+                sent_at = datetime.fromisoformat(sent_at)
+            self.remember([{'title': title, 'brand': brand, 'deal_price': deal_price}], sent_at)
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _find_duplicate(self, signature: np.ndarray, brand: str, price: float) -> Optional[int]:
+        """البحث عن عرض متذكر شبه مكرر عبر نطاقات LSH"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        for entry_id in candidates:
+            other_signature, other_brand, other_price, _ = self._entries[entry_id]
+            if brand and other_brand and brand != other_brand:
+                continue
+            if price and other_price and abs(price - other_price) > self.price_tolerance * max(price, other_price):
+                continue
+            if float(np.mean(signature == other_signature)) >= self.threshold:
+                return entry_id
+        return None
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def _add(self, signature: np.ndarray, brand: str, price: float) -> int:
+        entry_id = next(self._ids)
+        keys = self._band_keys(signature)
+        self._entries[entry_id] = (signature, brand, price, keys)
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(entry_id)
+        return entry_id
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry[3]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _prune(self, now: datetime):
+        """حذف العروض الأقدم من النافذة"""
+        while self._expiry and self._expiry[0][0] <= now:
+            _, entry_id = self._expiry.popleft()
+            self._remove(entry_id)
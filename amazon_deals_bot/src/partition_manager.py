@@ -0,0 +1,251 @@
+"""
+وحدة إدارة تقسيم جدول تاريخ الأسعار حسب الشهر
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+from datetime import date, datetime
+
+class PartitionManager:
+    """مدير أقسام price_history الشهرية (إنشاء الأقسام القادمة وإزالة المنتهية)"""
+
+    TABLE_NAME = 'price_history'
+    FUTURE_PARTITION = 'p_future'
+
+    def __init__(self, database_manager, partition_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة مدير الأقسام
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            partition_config: إعدادات الأقسام (maintenance.partitions)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        partition_config = partition_config or {}
+        self.enabled = partition_config.get('enabled', True)
+        self.months_ahead = partition_config.get('months_ahead', 3)
+        self.retention_months = partition_config.get('retention_months', 12)
+        self.archive = partition_config.get('archive', False)
+
+    def run_maintenance(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        تشغيل صيانة الأقسام: إنشاء أقسام الأشهر القادمة وإزالة المنتهية
+
+        Args:
+            today: التاريخ المرجعي (الافتراضي: اليوم)
+
+        Returns:
+            تقرير الصيانة
+        """
+        report = {'created': [], 'dropped': [], 'archived': [], 'skipped': False}
+
+        if not self.enabled:
+            report['skipped'] = True
+            return report
+
+        partitions = self.list_partition_bounds()
+        if not partitions:
+            self.logger.warning(f"الجدول {self.TABLE_NAME} غير مقسم - تم تخطي صيانة الأقسام")
+            report['skipped'] = True
+            return report
+
+        today = today or date.today()
+        current_month = date(today.year, today.month, 1)
+
+        report['created'] = self.ensure_future_partitions(current_month, partitions)
+
+        expired = self._expired_partitions(current_month, self.list_partition_bounds())
+        for partition_name in expired:
+            if self.archive:
+                if self.archive_partition(partition_name):
+                    report['archived'].append(partition_name)
+            elif self.drop_partition(partition_name):
+                report['dropped'].append(partition_name)
+
+        self.logger.info(
+            f"صيانة الأقسام - جديدة: {len(report['created'])}, "
+            f"محذوفة: {len(report['dropped'])}, مؤرشفة: {len(report['archived'])}"
+        )
+
+        return report
+
+    def list_partitions(self) -> List[str]:
+        """الحصول على أسماء أقسام الجدول مرتبة"""
+        return [name for name, _ in self.list_partition_bounds()]
+
+    def list_partition_bounds(self) -> List[Tuple[str, Optional[date]]]:
+        """
+        الحصول على أقسام الجدول مرتبة مع الحد الأعلى لكل قسم
+
+        Returns:
+            (اسم القسم، الحد الأعلى أو None للقسم MAXVALUE)
+        """
+        query = """
+        SELECT PARTITION_NAME,
+            CASE WHEN PARTITION_DESCRIPTION = 'MAXVALUE' THEN NULL
+                 ELSE FROM_UNIXTIME(PARTITION_DESCRIPTION) END
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """
+
+        results = self.db.execute_query(query, (self.TABLE_NAME,), fetch=True)
+        bounds = []
+        for name, boundary in results or []:
+            if isinstance(boundary, datetime):
+                boundary = boundary.date()
+            bounds.append((name, boundary))
+        return bounds
+
+    def ensure_future_partitions(self, current_month: date,
+                                 partitions: Optional[List[Tuple[str, Optional[date]]]] = None) -> List[str]:
+        """
+        إنشاء الأقسام الشهرية من آخر حد موجود حتى الأشهر القادمة
+
+        الجدول الجديد أو المتوقف عن الصيانة مدة طويلة يحصل على قسم لكل شهر فائت
+        أيضاً (وليس قسماً واحداً يجمعها)، حتى تبقى إزالة البيانات شهرية. جميع
+        الأقسام الناقصة تُنشأ بتقسيم p_future مرة واحدة؛ p_future فارغ عادةً فتكون
+        العملية تعديلاً للبيانات الوصفية فقط.
+
+        Args:
+            current_month: أول يوم في الشهر الحالي
+            partitions: الأقسام الموجودة مع حدودها (list_partition_bounds)
+
+        Returns:
+            أسماء الأقسام المنشأة
+        """
+        if partitions is None:
+            partitions = self.list_partition_bounds()
+
+        last_boundary = max((boundary for _, boundary in partitions if boundary), default=None)
+        # الشهر الذي يقع فيه آخر حد هو أول شهر ناقص (قسمه يبدأ من ذلك الحد)
+        month = date(last_boundary.year, last_boundary.month, 1) if last_boundary else current_month
+        last_month = self._add_months(current_month, self.months_ahead)
+
+        months = []
+        while month <= last_month:
+            months.append(month)
+            month = self._add_months(month, 1)
+
+        if not months:
+            return []
+
+        definitions = ',\n'.join(
+            f"            PARTITION {self._partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{self._add_months(month, 1).isoformat()} 00:00:00'))"
+            for month in months
+        )
+        query = f"""
+        ALTER TABLE {self.TABLE_NAME} REORGANIZE PARTITION {self.FUTURE_PARTITION} INTO (
+{definitions},
+            PARTITION {self.FUTURE_PARTITION} VALUES LESS THAN MAXVALUE
+        )
+        """
+
+        created = [self._partition_name(month) for month in months]
+        try:
+            self.db.execute_query(query)
+        except Exception as e:
+            self.logger.error(f"خطأ في إنشاء الأقسام {created[0]}..{created[-1]}: {e}")
+            return []
+
+        self.logger.info(f"تم إنشاء الأقسام {', '.join(created)}")
+        return created
+
+    def drop_partition(self, partition_name: str) -> bool:
+        """حذف قسم منتهي الصلاحية"""
+        try:
+            self.db.execute_query(f"ALTER TABLE {self.TABLE_NAME} DROP PARTITION {partition_name}")
+            self.logger.info(f"تم حذف القسم {partition_name}")
+            return True
+        except Exception as e:
+            self.logger.error(f"خطأ في حذف القسم {partition_name}: {e}")
+            return False
+
+    def archive_partition(self, partition_name: str) -> bool:
+        """
+        أرشفة قسم منتهي الصلاحية إلى جدول مستقل ثم حذفه
+
+        تستخدم EXCHANGE PARTITION لنقل البيانات دون نسخ السجلات. العملية قابلة
+        للإعادة بعد فشل جزئي: القسم المحذوف لا يُعالج، والجدول المؤرشف الذي يحمل
+        البيانات لا يُبادل مجدداً (المبادلة الثانية تعيد البيانات للقسم).
+        """
+        archive_table = f"{self.TABLE_NAME}_archive_{partition_name[1:]}"
+
+        try:
+            if partition_name not in self.list_partitions():
+                self.logger.info(f"القسم {partition_name} غير موجود - تم تخطي الأرشفة")
+                return True
+
+            partition_has_rows = self._has_rows(f"{self.TABLE_NAME} PARTITION ({partition_name})")
+            archive_exists = self._table_exists(archive_table)
+            archive_has_rows = archive_exists and self._has_rows(archive_table)
+
+            if partition_has_rows and archive_has_rows:
+                self.logger.error(
+                    f"القسم {partition_name} والجدول {archive_table} يحملان بيانات - تم إيقاف الأرشفة"
+                )
+                return False
+
+            if partition_has_rows:
+                if not archive_exists:
+                    self.db.execute_query(f"CREATE TABLE {archive_table} LIKE {self.TABLE_NAME}")
+                if self._is_partitioned(archive_table):
+                    self.db.execute_query(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+                self.db.execute_query(
+                    f"ALTER TABLE {self.TABLE_NAME} EXCHANGE PARTITION {partition_name} WITH TABLE {archive_table}"
+                )
+
+            self.db.execute_query(f"ALTER TABLE {self.TABLE_NAME} DROP PARTITION {partition_name}")
+            self.logger.info(f"تم أرشفة القسم {partition_name} إلى {archive_table}")
+            return True
+        except Exception as e:
+            self.logger.error(f"خطأ في أرشفة القسم {partition_name}: {e}")
+            return False
+
+    def _table_exists(self, table: str) -> bool:
+        results = self.db.execute_query(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,), fetch=True
+        )
+        return bool(results)
+
+    def _is_partitioned(self, table: str) -> bool:
+        results = self.db.execute_query(
+            """
+            SELECT 1 FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            LIMIT 1
+            """,
+            (table,), fetch=True
+        )
+        return bool(results)
+
+    def _has_rows(self, source: str) -> bool:
+        return bool(self.db.execute_query(f"SELECT 1 FROM {source} LIMIT 1", fetch=True))
+
+    def _expired_partitions(self, current_month: date,
+                            partitions: List[Tuple[str, Optional[date]]]) -> List[str]:
+        """تحديد الأقسام التي تقع كل بياناتها قبل مدة الاحتفاظ (بما فيها p_start)"""
+        cutoff_month = self._add_months(current_month, -self.retention_months)
+
+        expired = []
+        for name, boundary in partitions:
+            if boundary and boundary <= cutoff_month:
+                expired.append(name)
+
+        return expired
+
+    def _partition_name(self, month: date) -> str:
+        """اسم القسم لشهر معين (pYYYYMM)"""
+        return f"p{month.year:04d}{month.month:02d}"
+
+    @staticmethod
+    def _add_months(month: date, months: int) -> date:
+        """إضافة عدد من الأشهر لأول يوم في الشهر"""
+        index = month.year * 12 + (month.month - 1) + months
+        return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,393 @@
+"""
+وحدة أرشيف الأسعار طويل المدى بترميز نقاط التغير (change-point runs)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+import bisect
+import logging
+import struct
+import sys
+import time
+import zlib
+
+# مشاهدة سعر واحدة: (وقت التسجيل، السعر، حالة التوفر)
+Observation = Tuple[datetime, float, Optional[str]]
+
+class PriceRuns:
+    """
+    سلسلة أسعار منتج واحد كفترات ثابتة (بداية، نهاية، سعر، توفر)
+
+    كل فترة تمتد من أول مشاهدة إلى آخر مشاهدة بنفس السعر والتوفر، لذا
+    آلاف المشاهدات المتكررة تتحول إلى فترة واحدة. الأعمدة مخزنة في مصفوفات
+    array: الأوقات بالثواني، الأسعار بالهللات، والتوفر كرمز من قاموس صغير.
+    """
+
+    VERSION = 1
+
+    _HEADER = struct.Struct('<BHI')  # الإصدار، حجم القاموس، عدد الفترات
+    _LENGTH = struct.Struct('<H')
+
+    __slots__ = ('starts', 'ends', 'prices', 'statuses', 'vocabulary')
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.prices = array('i')
+        self.statuses = array('B')
+        # الرمز 0 محجوز لعدم وجود حالة توفر
+        self.vocabulary: List[Optional[str]] = [None]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def extend(self, observations: Iterable[Observation]):
+        """
+        إضافة مشاهدات إلى السلسلة
+
+        المشاهدات الأحدث من آخر فترة تُلحق مباشرة (O(1) لكل مشاهدة)، وإذا وصلت
+        مشاهدات أقدم يُعاد بناء السلسلة بالترتيب الزمني.
+
+        Args:
+            observations: مشاهدات (وقت، سعر، توفر)
+        """
+        observations = sorted(observations, key=lambda observation: observation[0])
+        if not observations:
+            return
+
+        if self.ends and self._seconds(observations[0][0]) < self.ends[-1]:
+            self._rebuild(observations)
+            return
+
+        for recorded_at, price, availability in observations:
+            self._append(self._seconds(recorded_at), self._cents(price),
+                         self._status_code(availability))
+
+    def runs(self, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        إعادة بناء السلسلة كفترات ضمن نطاق زمني
+
+        Args:
+            start: بداية النطاق (الافتراضي: أول فترة)
+            end: نهاية النطاق (الافتراضي: آخر فترة)
+
+        Returns:
+            الفترات المتقاطعة مع النطاق بالترتيب الزمني
+        """
+        first = 0
+        if start is not None:
+            # الفترة السارية عند بداية النطاق مشمولة حتى لو بدأت قبله
+            first = max(bisect.bisect_right(self.starts, self._seconds(start)) - 1, 0)
+
+        result = []
+        end_seconds = self._seconds(end) if end is not None else None
+        for index in range(first, len(self.starts)):
+            if end_seconds is not None and self.starts[index] > end_seconds:
+                break
+            result.append({
+                'start': datetime.fromtimestamp(self.starts[index]),
+                'end': datetime.fromtimestamp(self.ends[index]),
+                'price': self.prices[index] / 100,
+                'availability_status': self.vocabulary[self.statuses[index]]
+            })
+        return result
+
+    def price_at(self, moment: datetime) -> Optional[float]:
+        """السعر الساري في لحظة معينة (آخر سعر مشاهد قبلها)"""
+        index = bisect.bisect_right(self.starts, self._seconds(moment)) - 1
+        if index < 0:
+            return None
+        return self.prices[index] / 100
+
+    def all_time_low(self) -> Optional[float]:
+        """أدنى سعر في السلسلة"""
+        return min(self.prices) / 100 if self.prices else None
+
+    def first_seen(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.starts[0]) if self.starts else None
+
+    def last_seen(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.ends[-1]) if self.ends else None
+
+    def to_bytes(self) -> bytes:
+        """تحويل السلسلة إلى تمثيل ثنائي مضغوط"""
+        parts = [self._HEADER.pack(self.VERSION, len(self.vocabulary), len(self.starts))]
+        for status in self.vocabulary[1:]:
+            encoded = status.encode('utf-8')
+            parts.append(self._LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+
+        # الأوقات تُخزن كفروق متتالية لتتكرر قيمها ويرتفع معدل الضغط
+        previous = 0
+        deltas = array('q')
+        for start, end in zip(self.starts, self.ends):
+            deltas.append(start - previous)
+            deltas.append(end - start)
+            previous = end
+
+        # التمثيل الثنائي little-endian دائماً
+        for column in (deltas, self.prices, self.statuses):
+            column = array(column.typecode, column)
+            if column.itemsize > 1 and sys.byteorder == 'big':
+                column.byteswap()
+            parts.append(column.tobytes())
+
+        return zlib.compress(b''.join(parts), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PriceRuns':
+        """إنشاء السلسلة من التمثيل الثنائي"""
+        data = zlib.decompress(data)
+        version, vocabulary_size, count = cls._HEADER.unpack_from(data)
+        if version != cls.VERSION:
+            raise ValueError(f"إصدار أرشيف أسعار غير مدعوم: {version}")
+
+        runs = cls()
+        offset = cls._HEADER.size
+        for _ in range(vocabulary_size - 1):
+            (length,) = cls._LENGTH.unpack_from(data, offset)
+            offset += cls._LENGTH.size
+            runs.vocabulary.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+
+        columns = []
+        for typecode, size in (('q', count * 2), ('i', count), ('B', count)):
+            column = array(typecode)
+            length = column.itemsize * size
+            column.frombytes(data[offset:offset + length])
+            if column.itemsize > 1 and sys.byteorder == 'big':
+                column.byteswap()
+            columns.append(column)
+            offset += length
+
+        deltas, runs.prices, runs.statuses = columns
+        previous = 0
+        for index in range(count):
+            start = previous + deltas[index * 2]
+            previous = start + deltas[index * 2 + 1]
+            runs.starts.append(start)
+            runs.ends.append(previous)
+
+        return runs
+
+    def _append(self, seconds: int, cents: int, status: int):
+        """إلحاق مشاهدة بعد آخر فترة"""
+        if self.starts and self.prices[-1] == cents and self.statuses[-1] == status:
+            self.ends[-1] = max(self.ends[-1], seconds)
+            return
+        self.starts.append(seconds)
+        self.ends.append(seconds)
+        self.prices.append(cents)
+        self.statuses.append(status)
+
+    def _rebuild(self, observations: List[Observation]):
+        """دمج مشاهدات قديمة مع الفترات الحالية بالترتيب الزمني"""
+        points = []
+        for index in range(len(self.starts)):
+            points.append((self.starts[index], self.prices[index], self.statuses[index]))
+            if self.ends[index] != self.starts[index]:
+                points.append((self.ends[index], self.prices[index], self.statuses[index]))
+        for recorded_at, price, availability in observations:
+            points.append((self._seconds(recorded_at), self._cents(price),
+                           self._status_code(availability)))
+        points.sort(key=lambda point: point[0])
+
+        self.starts, self.ends = array('q'), array('q')
+        self.prices, self.statuses = array('i'), array('B')
+        for seconds, cents, status in points:
+            self._append(seconds, cents, status)
+
+    def _status_code(self, availability: Optional[str]) -> int:
+        """رمز حالة التوفر في القاموس (يُضاف عند أول ظهور)"""
+        if availability is None:
+            return 0
+        try:
+            return self.vocabulary.index(availability)
+        except ValueError:
+            if len(self.vocabulary) > 255:
+                raise ValueError("عدد حالات التوفر يتجاوز 255 في سلسلة واحدة")
+            self.vocabulary.append(availability)
+            return len(self.vocabulary) - 1
+
+    @staticmethod
+    def _seconds(moment: datetime) -> int:
+        return int(moment.timestamp())
+
+    @staticmethod
+    def _cents(price: float) -> int:
+        return int(round(float(price) * 100))
+
+class PriceArchive:
+    """طبقة أرشفة: تنقل سجلات الأسعار القديمة من price_history إلى فترات مضغوطة"""
+
+    def __init__(self, database_manager, archive_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة الأرشيف
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            archive_config: إعدادات الأرشفة (maintenance.archive)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        archive_config = archive_config or {}
+        self.enabled = archive_config.get('enabled', False)
+        self.after_days = archive_config.get('after_days', 30)
+        self.batch_size = archive_config.get('batch_size', 5000)
+        self.time_budget = archive_config.get('time_budget', 300)
+
+    def run(self, days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        أرشفة سجلات الأسعار الأقدم من المدة المحددة على دفعات حسب المفتاح الأساسي
+
+        كل دفعة تُدمج في فترات المنتجات وتُحذف من price_history في معاملة واحدة،
+        لذا التوقف في منتصف التشغيل لا يفقد أو يكرر بيانات.
+
+        Args:
+            days: عمر السجلات المؤرشفة بالأيام (الافتراضي: after_days)
+
+        Returns:
+            إحصائيات الأرشفة
+        """
+        progress = {'archived': 0, 'products': 0, 'batches': 0, 'completed': False}
+        if not self.enabled:
+            progress['skipped'] = True
+            return progress
+
+        cutoff_date = datetime.now() - timedelta(days=days or self.after_days)
+        deadline = time.monotonic() + self.time_budget
+
+        bounds = self.db.execute_query(
+            "SELECT MIN(id), MAX(id) FROM price_history WHERE recorded_at < %s",
+            (cutoff_date,), fetch=True
+        )
+        if not bounds or bounds[0][0] is None:
+            progress['completed'] = True
+            return progress
+
+        lower_id, max_id = bounds[0]
+        while lower_id <= max_id:
+            if time.monotonic() >= deadline:
+                self.logger.warning(f"انتهت الميزانية الزمنية لأرشفة الأسعار عند المعرف {lower_id}")
+                return progress
+
+            upper_id = lower_id + self.batch_size
+            rows = self.db.execute_query(
+                """
+                SELECT id, product_id, price, availability_status, recorded_at
+                FROM price_history
+                WHERE id >= %s AND id < %s AND recorded_at < %s
+                ORDER BY id
+                """,
+                (lower_id, upper_id, cutoff_date), fetch=True
+            ) or []
+
+            if rows:
+                progress['products'] += self._archive_rows(rows)
+                progress['archived'] += len(rows)
+            progress['batches'] += 1
+            lower_id = upper_id
+
+        progress['completed'] = True
+        self.logger.info(f"تم أرشفة {progress['archived']} سجل سعر")
+        return progress
+
+    def _archive_rows(self, rows: List[Tuple]) -> int:
+        """
+        دمج دفعة سجلات في فترات منتجاتها وحذفها من price_history
+
+        Returns:
+            عدد المنتجات المحدثة
+        """
+        observations: Dict[int, List[Observation]] = defaultdict(list)
+        for _, product_id, price, availability, recorded_at in rows:
+            observations[product_id].append((recorded_at, price, availability))
+
+        series = self._load_runs(list(observations))
+        updates = []
+        for product_id, product_observations in observations.items():
+            runs = series.get(product_id) or PriceRuns()
+            runs.extend(product_observations)
+            updates.append((product_id, runs.to_bytes(), len(runs), runs.all_time_low(),
+                            runs.first_seen(), runs.last_seen()))
+
+        upsert_query = """
+        INSERT INTO price_archive (product_id, runs_data, run_count, all_time_low,
+                                   first_seen_at, last_seen_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            runs_data = VALUES(runs_data),
+            run_count = VALUES(run_count),
+            all_time_low = VALUES(all_time_low),
+            first_seen_at = VALUES(first_seen_at),
+            last_seen_at = VALUES(last_seen_at),
+            updated_at = CURRENT_TIMESTAMP
+        """
+        ids = [row[0] for row in rows]
+        delete_query = f"DELETE FROM price_history WHERE id IN ({', '.join(['%s'] * len(ids))})"
+
+        with self.db.get_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(upsert_query, updates)
+                cursor.execute(delete_query, tuple(ids))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        return len(updates)
+
+    def _load_runs(self, product_ids: List[int]) -> Dict[int, PriceRuns]:
+        """تحميل فترات مجموعة منتجات من الأرشيف"""
+        if not product_ids:
+            return {}
+
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        rows = self.db.execute_query(
+            f"SELECT product_id, runs_data FROM price_archive WHERE product_id IN ({placeholders})",
+            tuple(product_ids), fetch=True
+        ) or []
+        return {product_id: PriceRuns.from_bytes(bytes(data)) for product_id, data in rows}
+
+    def get_runs(self, product_id: int) -> Optional[PriceRuns]:
+        """فترات أسعار منتج من الأرشيف"""
+        return self._load_runs([product_id]).get(product_id)
+
+    def reconstruct(self, product_id: int, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        إعادة بناء سلسلة أسعار منتج من الأرشيف
+
+        Args:
+            product_id: معرف المنتج
+            start: بداية النطاق
+            end: نهاية النطاق
+
+        Returns:
+            الفترات (start, end, price, availability_status)
+        """
+        runs = self.get_runs(product_id)
+        return runs.runs(start, end) if runs else []
+
+    def get_all_time_low(self, product_id: int) -> Optional[float]:
+        """أدنى سعر تاريخي من الأرشيف والسجل الحالي معاً"""
+        rows = self.db.execute_read(
+            """
+            SELECT
+                (SELECT all_time_low FROM price_archive WHERE product_id = %s),
+                (SELECT MIN(price) FROM price_history WHERE product_id = %s)
+            """,
+            (product_id, product_id)
+        )
+        if not rows:
+            return None
+        prices = [float(value) for value in rows[0] if value is not None]
+        return min(prices) if prices else None
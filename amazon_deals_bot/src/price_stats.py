@@ -0,0 +1,253 @@
+"""
+وحدة إحصائيات الأسعار التراكمية لكل منتج (كشف الخصومات الوهمية)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any
+import logging
+import math
+import statistics
+import struct
+import threading
+from datetime import date
+
+class PriceStats:
+    """إحصائيات سعر منتج واحد: أدنى سعر، إغلاقات آخر 30 يوماً، ومدة السعر الحالي"""
+
+    WINDOW_DAYS = 30
+    PRICE_EPSILON = 0.005
+
+    # التنسيق الثنائي: أدنى سعر، السعر الحالي، يوم بدء السعر، آخر يوم، عدد المشاهدات، 30 إغلاق يومي
+    _FORMAT = struct.Struct(f'<ffiiI{WINDOW_DAYS}f')
+
+    __slots__ = ('all_time_low', 'current_price', 'current_since', 'last_day',
+                 'observations', 'daily_closes')
+
+    def __init__(self):
+        self.all_time_low = math.nan
+        self.current_price = math.nan
+        self.current_since = 0
+        self.last_day = 0
+        self.observations = 0
+        self.daily_closes = [math.nan] * self.WINDOW_DAYS
+
+    def observe(self, price: float, day: date):
+        """
+        إضافة مشاهدة سعر (O(1))
+
+        Args:
+            price: السعر المشاهد
+            day: يوم المشاهدة
+        """
+        ordinal = day.toordinal()
+
+        if self.observations == 0 or price < self.all_time_low:
+            self.all_time_low = price
+
+        if ordinal >= self.last_day:
+            # مسح أيام الفجوة منذ آخر مشاهدة (30 خانة كحد أقصى)
+            if self.observations and ordinal > self.last_day:
+                gap = min(ordinal - self.last_day, self.WINDOW_DAYS)
+                for offset in range(1, gap):
+                    self.daily_closes[(self.last_day + offset) % self.WINDOW_DAYS] = math.nan
+
+            self.daily_closes[ordinal % self.WINDOW_DAYS] = price
+            self.last_day = ordinal
+
+            if self.observations == 0 or abs(price - self.current_price) > self.PRICE_EPSILON:
+                self.current_price = price
+                self.current_since = ordinal
+
+        self.observations += 1
+
+    def median_30d(self, today: Optional[date] = None) -> Optional[float]:
+        """الوسيط التقريبي لأسعار الإغلاق اليومية خلال آخر 30 يوماً"""
+        closes = self._window_closes(today)
+        return statistics.median(closes) if closes else None
+
+    def history_days(self, today: Optional[date] = None) -> int:
+        """عدد الأيام المشاهدة خلال آخر 30 يوماً"""
+        return len(self._window_closes(today))
+
+    def days_at_current_price(self, today: Optional[date] = None) -> int:
+        """عدد الأيام منذ تغير السعر الحالي"""
+        if not self.observations:
+            return 0
+        ordinal = (today or date.today()).toordinal()
+        return max(0, ordinal - self.current_since)
+
+    def _window_closes(self, today: Optional[date] = None) -> List[float]:
+        """إغلاقات الأيام ضمن النافذة (تتجاهل الخانات القديمة أو الفارغة)"""
+        if not self.observations:
+            return []
+
+        ordinal = (today or date.today()).toordinal()
+        age = ordinal - self.last_day
+        if age >= self.WINDOW_DAYS:
+            return []
+
+        # الخانات الأقدم من النافذة بالنسبة لليوم الحالي
+        stale = {(self.last_day - offset) % self.WINDOW_DAYS
+                 for offset in range(self.WINDOW_DAYS - max(age, 0), self.WINDOW_DAYS)}
+
+        return [value for index, value in enumerate(self.daily_closes)
+                if index not in stale and not math.isnan(value)]
+
+    def to_bytes(self) -> bytes:
+        """تحويل الإحصائيات إلى تمثيل ثنائي مضغوط"""
+        return self._FORMAT.pack(self.all_time_low, self.current_price, self.current_since,
+                                 self.last_day, self.observations, *self.daily_closes)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PriceStats':
+        """إنشاء الإحصائيات من التمثيل الثنائي"""
+        values = cls._FORMAT.unpack(data)
+        stats = cls()
+        (stats.all_time_low, stats.current_price, stats.current_since,
+         stats.last_day, stats.observations) = values[:5]
+        stats.daily_closes = list(values[5:])
+        return stats
+
+class PriceStatsEngine:
+    """محرك إحصائيات الأسعار لكل ASIN مع حفظ دوري في قاعدة البيانات"""
+
+    def __init__(self, database_manager, load_batch_size: int = 10000):
+        """
+        تهيئة محرك الإحصائيات
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            load_batch_size: حجم دفعة التحميل من قاعدة البيانات
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+        self.load_batch_size = load_batch_size
+
+        self._stats: Dict[str, PriceStats] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """
+        تحميل الإحصائيات المحفوظة (بترقيم keyset على ASIN)
+
+        Returns:
+            عدد المنتجات المحملة
+        """
+        query = """
+        SELECT asin, stats_data FROM price_stats
+        WHERE asin > %s
+        ORDER BY asin
+        LIMIT %s
+        """
+
+        last_asin = ''
+        loaded = 0
+
+        try:
+            while True:
+                rows = self.db.execute_query(query, (last_asin, self.load_batch_size), fetch=True)
+                if not rows:
+                    break
+
+                with self._lock:
+                    for asin, data in rows:
+                        try:
+                            self._stats[asin] = PriceStats.from_bytes(bytes(data))
+                            loaded += 1
+                        except struct.error:
+                            self.logger.warning(f"إحصائيات أسعار تالفة للمنتج {asin}")
+
+                last_asin = rows[-1][0]
+                if len(rows) < self.load_batch_size:
+                    break
+
+            self.logger.info(f"تم تحميل إحصائيات الأسعار لـ {loaded} منتج")
+
+        except Exception as e:
+            self.logger.error(f"خطأ في تحميل إحصائيات الأسعار: {e}")
+
+        return loaded
+
+    def observe(self, asin: str, price: float, day: Optional[date] = None):
+        """تسجيل مشاهدة سعر لمنتج"""
+        if not asin or not price:
+            return
+
+        with self._lock:
+            stats = self._stats.get(asin)
+            if stats is None:
+                stats = self._stats[asin] = PriceStats()
+            stats.observe(float(price), day or date.today())
+            self._dirty.add(asin)
+
+    def get(self, asin: str) -> Optional[PriceStats]:
+        """الحصول على إحصائيات منتج من الذاكرة"""
+        return self._stats.get(asin)
+
+    def get_reference(self, asin: str, current_price: float,
+                      today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """
+        حساب السعر المرجعي التاريخي لمنتج
+
+        Args:
+            asin: معرف المنتج
+            current_price: السعر الحالي
+            today: اليوم المرجعي
+
+        Returns:
+            الوسيط، أدنى سعر، أيام السعر الحالي والخصم الحقيقي، أو None
+        """
+        # القراءة تحت القفل لأن كاتب خط المعالجة يعدل الإحصائيات أثناء التحليل
+        with self._lock:
+            stats = self._stats.get(asin)
+            if stats is None or not stats.observations:
+                return None
+
+            median = stats.median_30d(today)
+            historical_discount = None
+            if median and current_price:
+                historical_discount = round((median - current_price) / median * 100, 2)
+
+            # السعر المستخرج المختلف عن آخر سعر مشاهد هو تغير يحدث الآن
+            price_changed = abs(current_price - stats.current_price) > PriceStats.PRICE_EPSILON
+
+            return {
+                'median_30d': median,
+                'all_time_low': stats.all_time_low,
+                'days_at_current_price': 0 if price_changed else stats.days_at_current_price(today),
+                'history_days': stats.history_days(today),
+                'historical_discount': historical_discount,
+                'is_all_time_low': current_price <= stats.all_time_low + PriceStats.PRICE_EPSILON,
+                'is_new_low': current_price < stats.all_time_low - PriceStats.PRICE_EPSILON
+            }
+
+    def flush(self) -> int:
+        """
+        حفظ الإحصائيات المعدلة في قاعدة البيانات دفعة واحدة
+
+        Returns:
+            عدد المنتجات المحفوظة
+        """
+        with self._lock:
+            if not self._dirty:
+                return 0
+            rows = [(asin, self._stats[asin].to_bytes()) for asin in self._dirty]
+            self._dirty = set()
+
+        query = """
+        INSERT INTO price_stats (asin, stats_data)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE
+            stats_data = VALUES(stats_data),
+            updated_at = CURRENT_TIMESTAMP
+        """
+
+        try:
+            self.db.execute_many(query, rows)
+            return len(rows)
+        except Exception as e:
+            self.logger.error(f"خطأ في حفظ إحصائيات الأسعار: {e}")
+            with self._lock:
+                self._dirty.update(asin for asin, _ in rows)
+            return 0
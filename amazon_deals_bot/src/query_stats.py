@@ -0,0 +1,282 @@
+"""
+وحدة قياس أداء الاستعلامات (مدرجات زمن التنفيذ وسجل الاستعلامات البطيئة)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from pathlib import Path
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+
+# حدود خانات مدرج الزمن بالمللي ثانية (الخانة الأخيرة لما فوق آخر حد)
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%\(\w+\)s|%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """
+    بصمة الاستعلام: نص موحد بدون القيم الحرفية
+
+    Args:
+        query: نص الاستعلام
+
+    Returns:
+        البصمة (مثلاً "DELETE FROM deals WHERE id IN (?+)")
+    """
+    normalized = _STRING_LITERAL.sub('?', query)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PARAMETER.sub('?', normalized)
+    # قوائم IN بأطوال مختلفة لها نفس البصمة
+    normalized = _IN_LIST.sub('IN (?+)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+class StatementStats:
+    """إحصائيات بصمة استعلام واحدة"""
+
+    __slots__ = ('calls', 'errors', 'total_ms', 'max_ms', 'rows', 'pool_wait_ms', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.pool_wait_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """تقدير النسبة المئوية من المدرج (الحد الأعلى للخانة)"""
+        if not self.calls:
+            return None
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'pool_wait_ms': round(self.pool_wait_ms, 3),
+            'histogram': list(self.histogram)
+        }
+
+class QueryStats:
+    """سجل أداء الاستعلامات لكل بصمة مع تسجيل الاستعلامات البطيئة"""
+
+    SORT_KEYS = ('total_ms', 'avg_ms', 'max_ms', 'calls', 'rows', 'pool_wait_ms')
+
+    def __init__(self, instrumentation_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة سجل الأداء
+
+        Args:
+            instrumentation_config: إعدادات القياس (database.instrumentation)
+        """
+        instrumentation_config = instrumentation_config or {}
+        self.enabled = instrumentation_config.get('enabled', True)
+        self.slow_query_ms = instrumentation_config.get('slow_query_ms', 200)
+        self.dump_path = instrumentation_config.get('dump_path', 'logs/query_stats.json')
+
+        self.slow_logger = logging.getLogger('slow_query')
+        self._statements: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, elapsed: float, rows: int = 0,
+               pool_wait: float = 0.0, error: bool = False):
+        """
+        تسجيل تنفيذ استعلام
+
+        Args:
+            query: نص الاستعلام
+            elapsed: زمن التنفيذ بالثواني
+            rows: عدد السجلات المتأثرة أو المسترجعة
+            pool_wait: زمن انتظار الاتصال من الـ pool بالثواني
+            error: هل فشل الاستعلام
+        """
+        if not self.enabled:
+            return
+
+        key = fingerprint(query)
+        elapsed_ms = elapsed * 1000
+
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats()
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows += max(rows or 0, 0)
+            stats.pool_wait_ms += pool_wait * 1000
+            stats.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_logger.warning(
+                f"استعلام بطيء ({elapsed_ms:.1f}ms, {rows or 0} سجل): {key[:500]}"
+            )
+
+    def top(self, limit: int = 10, order_by: str = 'total_ms') -> List[Dict[str, Any]]:
+        """
+        أعلى الاستعلامات حسب مقياس
+
+        Args:
+            limit: عدد الاستعلامات
+            order_by: مقياس الترتيب (total_ms, avg_ms, max_ms, calls, rows, pool_wait_ms)
+
+        Returns:
+            قائمة إحصائيات الاستعلامات
+        """
+        if order_by not in self.SORT_KEYS:
+            raise ValueError(f"مقياس ترتيب غير مدعوم: {order_by}")
+
+        with self._lock:
+            entries = [dict(stats.to_dict(), statement=key)
+                       for key, stats in self._statements.items()]
+
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+        return entries[:limit]
+
+    def reset(self):
+        """مسح الإحصائيات"""
+        with self._lock:
+            self._statements = {}
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """حفظ جميع الإحصائيات في ملف JSON لأمر query-stats"""
+        path = Path(path or self.dump_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            statements = {key: stats.to_dict() for key, stats in self._statements.items()}
+
+        payload = {
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'buckets_ms': LATENCY_BUCKETS_MS,
+            'statements': statements
+        }
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
+        return str(path)
+
+class InstrumentedCursor:
+    """مؤشر يقيس زمن كل استعلام وعدد سجلاته ويسجلها في QueryStats"""
+
+    def __init__(self, cursor, query_stats: QueryStats, connection: 'InstrumentedConnection'):
+        self._cursor = cursor
+        self._stats = query_stats
+        self._connection = connection
+        # الاستعلام الأخير ينتظر معرفة عدد السجلات المسترجعة قبل تسجيله
+        self._pending: Optional[List[Any]] = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, query, params=None):
+        self._flush_pending()
+        start_time = time.perf_counter()
+        try:
+            result = self._cursor.execute(query, params or ())
+        except Exception:
+            self._stats.record(query, time.perf_counter() - start_time,
+                               pool_wait=self._connection.take_pool_wait(), error=True)
+            raise
+
+        self._pending = [query, time.perf_counter() - start_time,
+                         self._connection.take_pool_wait()]
+        return result
+
+    def executemany(self, query, params_list):
+        self._flush_pending()
+        start_time = time.perf_counter()
+        error = False
+        try:
+            return self._cursor.executemany(query, params_list)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._stats.record(query, time.perf_counter() - start_time,
+                               rows=len(params_list), error=error,
+                               pool_wait=self._connection.take_pool_wait())
+
+    def fetchall(self):
+        start_time = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._flush_pending(len(rows), time.perf_counter() - start_time)
+        return rows
+
+    def fetchone(self):
+        start_time = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._flush_pending(1 if row is not None else 0, time.perf_counter() - start_time)
+        return row
+
+    def close(self):
+        self._flush_pending()
+        return self._cursor.close()
+
+    def _flush_pending(self, rows: Optional[int] = None, fetch_time: float = 0.0):
+        """تسجيل الاستعلام المعلق"""
+        if self._pending is None:
+            return
+        query, elapsed, pool_wait = self._pending
+        self._pending = None
+        if rows is None:
+            rowcount = self._cursor.rowcount
+            rows = rowcount if isinstance(rowcount, int) else 0
+        self._stats.record(query, elapsed + fetch_time, rows=rows, pool_wait=pool_wait)
+
+class InstrumentedConnection:
+    """غلاف اتصال يعيد مؤشرات مقاسة ويحمل زمن انتظار الـ pool لأول استعلام"""
+
+    def __init__(self, connection, query_stats: QueryStats, pool_wait: float = 0.0):
+        self.raw_connection = connection
+        self._stats = query_stats
+        self._pool_wait = pool_wait
+
+    def __getattr__(self, name):
+        return getattr(self.raw_connection, name)
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        return InstrumentedCursor(self.raw_connection.cursor(*args, **kwargs), self._stats, self)
+
+    def take_pool_wait(self) -> float:
+        """زمن الانتظار يُنسب لأول استعلام على الاتصال فقط"""
+        pool_wait, self._pool_wait = self._pool_wait, 0.0
+        return pool_wait
+
+def format_top_statements(statements: Dict[str, Dict[str, Any]], limit: int = 10,
+                          order_by: str = 'total_ms') -> str:
+    """تنسيق أعلى الاستعلامات كجدول نصي"""
+    ranked = sorted(statements.items(), key=lambda item: item[1][order_by], reverse=True)[:limit]
+
+    lines = [f"{'calls':>8} {'total_ms':>11} {'avg_ms':>9} {'p95_ms':>8} "
+             f"{'max_ms':>9} {'rows':>9} {'wait_ms':>9}  statement"]
+    for statement, stats in ranked:
+        lines.append(
+            f"{stats['calls']:>8} {stats['total_ms']:>11.1f} {stats['avg_ms']:>9.2f} "
+            f"{stats['p95_ms'] or 0:>8} {stats['max_ms']:>9.1f} {stats['rows']:>9} "
+            f"{stats['pool_wait_ms']:>9.1f}  {statement[:120]}"
+        )
+    return '\n'.join(lines)
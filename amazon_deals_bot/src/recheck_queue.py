@@ -0,0 +1,177 @@
+"""
+وحدة طابور إعادة فحص العروض النشطة قرب نهايتها المتوقعة
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta
+import heapq
+import logging
+import threading
+
+class RecheckQueue:
+    """
+    كومة صغرى لمواعيد إعادة فحص العروض النشطة
+
+    كل عرض يُجدول عند نسبة recheck_at من عمره المتوقع (DealDurationEstimator)،
+    أي حين يصبح تغيره مرجحاً؛ العروض المستقرة طويلة العمر لا تُعاد زيارتها
+    مبكراً. عند تجاوز المستحق ميزانية الدورة تُفحص العروض الأعلى جودة أولاً
+    ويبقى الباقي مستحقاً للدورة التالية. عرض واحد متتبع لكل ASIN.
+    """
+
+    def __init__(self, database_manager, recheck_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة الطابور
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            recheck_config: الإعدادات (deals.recheck)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        recheck_config = recheck_config or {}
+        self.enabled = recheck_config.get('enabled', True)
+        self.recheck_at = recheck_config.get('recheck_at', 0.8)
+        self.budget = recheck_config.get('budget', 20)
+        self.retry_delay = timedelta(minutes=recheck_config.get('retry_minutes', 30))
+        self.batch_size = recheck_config.get('batch_size', 500)
+
+        # كومة (موعد الفحص، معرف العرض) مع حذف كسول عبر _entries
+        self._heap: List[Tuple[datetime, int]] = []
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._by_asin: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'scheduled': 0,
+            'checked': 0,
+            'deferred': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, deal_id: int, asin: Optional[str], end_date: Optional[datetime],
+                 quality_score: float = 0, now: Optional[datetime] = None):
+        """
+        جدولة فحص عرض (يحل محل أي جدولة سابقة لنفس ASIN)
+
+        Args:
+            deal_id: معرف العرض
+            asin: معرف المنتج
+            end_date: موعد الانتهاء المتوقع
+            quality_score: نقاط الجودة (أولوية الفحص عند تجاوز الميزانية)
+            now: الوقت الحالي
+        """
+        if not self.enabled or not deal_id or not asin or not end_date:
+            return
+
+        now = now or datetime.now()
+        due = now + max(timedelta(0), end_date - now) * self.recheck_at
+        self._push({'deal_id': deal_id, 'asin': asin, 'quality_score': float(quality_score or 0), 'due': due})
+
+    def _push(self, entry: Dict[str, Any]):
+        with self._lock:
+            previous = self._by_asin.get(entry['asin'])
+            if previous is not None and previous != entry['deal_id']:
+                self._entries.pop(previous, None)
+            self._entries[entry['deal_id']] = entry
+            self._by_asin[entry['asin']] = entry['deal_id']
+            heapq.heappush(self._heap, (entry['due'], entry['deal_id']))
+            self.stats['scheduled'] = len(self._entries)
+
+    def pop_due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        سحب العروض المستحقة للفحص (الأعلى جودة أولاً ضمن الميزانية)
+
+        Args:
+            now: الوقت الحالي
+            limit: الحد الأقصى (الافتراضي: budget)
+
+        Returns:
+            مدخلات العروض المسحوبة
+        """
+        now = now or datetime.now()
+        limit = self.budget if limit is None else limit
+        due = []
+
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, deal_id = heapq.heappop(self._heap)
+                entry = self._entries.get(deal_id)
+                if entry is not None and entry['due'] == due_at:
+                    due.append(entry)
+
+            due.sort(key=lambda entry: entry['quality_score'], reverse=True)
+            selected, deferred = due[:limit], due[limit:]
+
+            for entry in selected:
+                del self._entries[entry['deal_id']]
+                if self._by_asin.get(entry['asin']) == entry['deal_id']:
+                    del self._by_asin[entry['asin']]
+            for entry in deferred:
+                heapq.heappush(self._heap, (entry['due'], entry['deal_id']))
+
+            self.stats['checked'] += len(selected)
+            self.stats['deferred'] += len(deferred)
+            self.stats['scheduled'] = len(self._entries)
+
+        return selected
+
+    def retry(self, entry: Dict[str, Any], now: Optional[datetime] = None):
+        """إعادة جدولة عرض تعذر فحصه بعد retry_minutes"""
+        if entry['asin'] in self._by_asin:
+            return
+        self._push(dict(entry, due=(now or datetime.now()) + self.retry_delay))
+
+    def is_scheduled(self, asin: str) -> bool:
+        """هل للمنتج عرض نشط مجدول للفحص"""
+        return asin in self._by_asin
+
+    def rebuild(self) -> int:
+        """
+        إعادة بناء الطابور من العروض النشطة في قاعدة البيانات
+
+        Returns:
+            عدد العروض المجدولة
+        """
+        if not self.enabled:
+            return 0
+
+        query = """
+        SELECT d.id, p.asin, d.end_date, d.quality_score
+        FROM deals d
+        JOIN products p ON p.id = d.product_id
+        WHERE d.deal_status = 'active' AND d.end_date IS NOT NULL AND d.id > %s
+        ORDER BY d.id
+        LIMIT %s
+        """
+
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+            self._by_asin = {}
+
+        now = datetime.now()
+        last_id = 0
+
+        try:
+            while True:
+                rows = self.db.execute_query(query, (last_id, self.batch_size), fetch=True)
+                if not rows:
+                    break
+
+                for deal_id, asin, end_date, quality_score in rows:
+                    self.schedule(deal_id, asin, end_date, quality_score, now)
+
+                last_id = rows[-1][0]
+                if len(rows) < self.batch_size:
+                    break
+
+            self.logger.info(f"تم جدولة فحص {len(self._entries)} عرض نشط")
+
+        except Exception as e:
+            self.logger.error(f"خطأ في إعادة بناء طابور الفحص: {e}")
+
+        return len(self._entries)
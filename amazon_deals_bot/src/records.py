@@ -0,0 +1,163 @@
+"""
+وحدة سجلات المنتجات والعروض المضغوطة (__slots__) المتداولة بين المستخرج والمحلل والمحرك
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+_MISSING = object()
+
+class Record:
+    """
+    أساس السجلات: حقول ثابتة في __slots__ بدلاً من قاموس لكل عنصر
+
+    الحقل غير المعيّن يُعامل كمفتاح غير موجود، لذا السجل يدعم واجهة القاموس
+    المستخدمة في الكود القائم (get و [] و in و keys و update و setdefault)
+    بنفس الدلالة، إضافة للوصول المباشر product.current_price. المفاتيح خارج
+    FIELDS تُحفظ في قاموس إضافي يُنشأ عند الحاجة فقط.
+    """
+
+    FIELDS: Tuple[str, ...] = ()
+    __slots__ = ('_extra',)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None, **fields):
+        if values:
+            self.update(values)
+        if fields:
+            self.update(fields)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            extra = getattr(self, '_extra', None)
+            if extra is None:
+                extra = self._extra = {}
+            extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        extra = getattr(self, '_extra', None)
+        return extra.get(key, default) if extra else default
+
+    def keys(self) -> List[str]:
+        keys = [field for field in self.FIELDS if hasattr(self, field)]
+        extra = getattr(self, '_extra', None)
+        if extra:
+            keys.extend(extra)
+        return keys
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def update(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            self[key] = value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = value = default
+        return value
+
+    def copy(self):
+        """نسخة سطحية من نفس النوع"""
+        clone = type(self).__new__(type(self))
+        for field in self.FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                setattr(clone, field, value)
+        extra = getattr(self, '_extra', None)
+        if extra:
+            clone._extra = dict(extra)
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        """تحويل لقاموس عادي (عند حدود قاعدة البيانات وتيليجرام)"""
+        return dict(self.items())
+
+class ScrapedProduct(Record):
+    """منتج مستخرج من صفحات البحث أو العروض أو صفحة المنتج"""
+
+    FIELDS = (
+        'asin', 'title', 'brand', 'description', 'amazon_url', 'image_url',
+        'current_price', 'original_price', 'currency', 'discount_percentage',
+        'rating', 'review_count', 'seller_name', 'is_prime', 'availability', 'scraped_at',
+        # من صفحة العروض
+        'deal_type', 'deal_url',
+        # يضيفها المحلل
+        'price_reference', 'keyword_tags'
+    )
+    __slots__ = FIELDS
+
+class DealCandidate(Record):
+    """عرض ناتج عن تحليل منتج (قبل الحفظ أو بعده)"""
+
+    FIELDS = (
+        'product_id', 'deal_type', 'original_price', 'deal_price', 'discount_percentage',
+        'discount_amount', 'start_date', 'end_date', 'deal_status', 'quality_score',
+        'deal_url', 'is_featured', 'analysis_metadata', 'is_new_deal'
+    )
+    __slots__ = FIELDS
+
+class Deal(DealCandidate):
+    """
+    عرض محفوظ مرتبط بمنتجه
+
+    حقول المنتج (العنوان، ASIN، العلامة...) تُقرأ من المنتج المرتبط بدلاً من نسخها
+    في كل عرض؛ حقول العرض لها الأولوية عند تطابق الاسم.
+    """
+
+    FIELDS = DealCandidate.FIELDS + ('id', 'priority_rank', 'is_top_deal', 'product')
+    __slots__ = ('id', 'priority_rank', 'is_top_deal', 'product')
+
+    @classmethod
+    def from_candidate(cls, candidate: DealCandidate, product: Optional[Record], deal_id: int) -> 'Deal':
+        """إنشاء عرض محفوظ من عرض محلل ومنتجه"""
+        deal = cls(candidate)
+        deal.id = deal_id
+        deal.product = product
+        return deal
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        product = getattr(self, 'product', None)
+        return product.get(key, default) if product is not None else default
+
+    def keys(self) -> List[str]:
+        keys = [key for key in super().keys() if key != 'product']
+        product = getattr(self, 'product', None)
+        if product is not None:
+            own = set(keys)
+            keys.extend(key for key in product.keys() if key not in own)
+        return keys
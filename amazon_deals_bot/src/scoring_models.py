@@ -0,0 +1,251 @@
+"""
+وحدة نماذج تقييم جودة العروض (نموذج افتراضي ونماذج خطية مجزأة من الإعدادات)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+import os
+import threading
+
+import numpy as np
+import yaml
+
+# الخصائص التي يحسبها DealAnalyzer لكل منتج (مصفوفة لكل خاصية)
+FEATURES = ('discount', 'rating', 'review_count', 'price', 'is_prime', 'in_stock', 'known_brand')
+
+# معاملات المعادلة الأصلية (كانت ثوابت داخل DealAnalyzer)
+DEFAULT_LEGACY_PARAMS = {
+    'discount_full': 70,  # نسبة الخصم التي تعطي نقاطاً كاملة
+    'review_count_full': 1000,  # عدد المراجعات الذي يعطي نقاطاً كاملة
+    'missing_rating_score': 5,  # نقاط التقييم عند عدم توفره
+    'price_buckets': [[100, 8], [500, 10], [1000, 7], [2000, 5]],  # [حد السعر، النقاط]
+    'price_default': 3,  # نقاط السعر فوق آخر حد
+    'bonus': {'is_prime': 0.5, 'in_stock': 0.3, 'known_brand': 0.2}
+}
+
+class ScoringModel(ABC):
+    """
+    واجهة نموذج التقييم
+
+    النموذج يستقبل خصائص دفعة كاملة (مصفوفة لكل خاصية) ويعيد مصفوفة النقاط
+    قبل القص إلى [0, max_score]؛ منتج واحد هو دفعة بطول 1.
+    """
+
+    def __init__(self, name: str, max_score: float = 10):
+        self.name = name
+        self.max_score = max_score
+
+    @abstractmethod
+    def raw_score(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """النقاط قبل القص لكل عنصر في الدفعة"""
+
+    def score(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """النقاط بين 0 و max_score"""
+        return np.clip(self.raw_score(features), 0, self.max_score)
+
+class LegacyScoringModel(ScoringModel):
+    """المعادلة الأصلية: أوزان quality_scoring مع حدود الخصم والمراجعات وشرائح السعر"""
+
+    def __init__(self, name: str, weights: Dict[str, float], params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            name: اسم النموذج
+            weights: أوزان quality_scoring (discount/rating/review_count/price_range)
+            params: معاملات تستبدل DEFAULT_LEGACY_PARAMS
+        """
+        params = {**DEFAULT_LEGACY_PARAMS, **(params or {})}
+        super().__init__(name, params.get('max_score', 10))
+
+        self.discount_weight = weights['discount_weight']
+        self.rating_weight = weights['rating_weight']
+        self.review_count_weight = weights['review_count_weight']
+        self.price_range_weight = weights['price_range_weight']
+
+        self.discount_full = float(params['discount_full'])
+        self.review_count_full = float(params['review_count_full'])
+        self.missing_rating_score = float(params['missing_rating_score'])
+        buckets = sorted(params['price_buckets'])
+        self.price_limits = np.array([limit for limit, _ in buckets], dtype=float)
+        self.price_scores = np.array([points for _, points in buckets] + [params['price_default']], dtype=float)
+        self.bonus = dict(params['bonus'])
+
+    def raw_score(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        discount_score = np.minimum(10, features['discount'] / self.discount_full * 10)
+        rating = features['rating']
+        rating_score = np.where(rating != 0, rating / 5 * 10, self.missing_rating_score)
+        review_score = np.minimum(10, features['review_count'] / self.review_count_full * 10)
+        # السعر المساوي للحد ينتمي للشريحة الأدنى (price <= limit)
+        price_score = self.price_scores[np.searchsorted(self.price_limits, features['price'], side='left')]
+
+        total = (discount_score * self.discount_weight
+                 + rating_score * self.rating_weight
+                 + review_score * self.review_count_weight
+                 + price_score * self.price_range_weight)
+        for feature, points in self.bonus.items():
+            total = total + features[feature] * points
+        return total
+
+class PiecewiseLinearModel(ScoringModel):
+    """
+    نموذج من الإعدادات: مجموع موزون لدوال خطية مجزأة لكل خاصية + نقاط إضافية
+
+    مثال:
+        type: piecewise_linear
+        features:
+          discount: {weight: 0.5, points: [[10, 0], [40, 8], [70, 10]]}
+          price: {weight: 0.1, points: [[0, 8], [500, 10], [2000, 4]]}
+        bonus: {is_prime: 0.5}
+
+    النقاط تُحوّل لمصفوفات مرة واحدة، والتقييم استدعاء np.interp لكل خاصية
+    (القيم خارج النطاق تأخذ قيمة الطرف الأقرب).
+    """
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        super().__init__(name, spec.get('max_score', 10))
+
+        self.terms: List[Tuple[str, float, np.ndarray, np.ndarray]] = []
+        for feature, term in (spec.get('features') or {}).items():
+            if feature not in FEATURES:
+                raise ValueError(f"خاصية غير معروفة في النموذج {name}: {feature}")
+            points = sorted(term['points'])
+            xs = np.array([x for x, _ in points], dtype=float)
+            ys = np.array([y for _, y in points], dtype=float)
+            if not len(xs) or np.any(np.diff(xs) <= 0):
+                raise ValueError(f"نقاط غير صالحة للخاصية {feature} في النموذج {name}")
+            self.terms.append((feature, float(term.get('weight', 1)), xs, ys))
+
+        self.bonus = dict(spec.get('bonus') or {})
+        for feature in self.bonus:
+            if feature not in FEATURES:
+                raise ValueError(f"خاصية غير معروفة في النموذج {name}: {feature}")
+
+    def raw_score(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        total = np.zeros(len(features['discount']))
+        for feature, weight, xs, ys in self.terms:
+            total += weight * np.interp(features[feature], xs, ys)
+        for feature, points in self.bonus.items():
+            total += features[feature] * points
+        return total
+
+class ScoringModelRegistry:
+    """
+    النماذج المترجمة والنموذج النشط ونماذج الظل
+
+    النموذج النشط يحدد quality_score، ونماذج الظل تُقيّم نفس الدفعة وتُسجل
+    نقاطها للمقارنة (A/B) دون التأثير على الترتيب. الحالة تُستبدل ككائن واحد،
+    لذا تبديل النموذج أو إعادة التحميل آمن أثناء التقييم. إذا حُدد models_file
+    يُعاد تحميله عند تغيره دون إعادة تشغيل.
+    """
+
+    LEGACY = 'legacy'
+
+    def __init__(self, scoring_config: Dict[str, Any]):
+        """
+        Args:
+            scoring_config: إعدادات deals.quality_scoring
+        """
+        self.logger = logging.getLogger(__name__)
+        self.config = scoring_config
+        self.models_file = scoring_config.get('models_file')
+        self._file_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self._state = self._compile(scoring_config)
+        self.reload_if_changed()
+
+    def _compile(self, settings: Dict[str, Any]) -> Tuple[Dict[str, ScoringModel], str, Tuple[str, ...]]:
+        """ترجمة النماذج والتحقق من النموذج النشط ونماذج الظل"""
+        models: Dict[str, ScoringModel] = {
+            self.LEGACY: LegacyScoringModel(self.LEGACY, self.config, self.config.get('legacy'))
+        }
+        for name, spec in (settings.get('models') or {}).items():
+            model_type = spec.get('type', 'piecewise_linear')
+            if model_type == 'legacy':
+                models[name] = LegacyScoringModel(name, self.config, spec)
+            elif model_type == 'piecewise_linear':
+                models[name] = PiecewiseLinearModel(name, spec)
+            else:
+                raise ValueError(f"نوع نموذج غير معروف: {model_type}")
+
+        active = settings.get('model', self.LEGACY)
+        shadow = tuple(name for name in settings.get('shadow_models') or [] if name != active)
+        for name in (active,) + shadow:
+            if name not in models:
+                raise ValueError(f"نموذج تقييم غير معرف: {name}")
+        return models, active, shadow
+
+    @property
+    def active(self) -> str:
+        return self._state[1]
+
+    @property
+    def shadow(self) -> Tuple[str, ...]:
+        return self._state[2]
+
+    def models(self) -> List[str]:
+        return list(self._state[0])
+
+    def set_active(self, name: str, shadow: Optional[List[str]] = None):
+        """
+        تبديل النموذج النشط (ونماذج الظل اختيارياً)
+
+        Raises:
+            ValueError: إذا كان النموذج غير معرف
+        """
+        with self._lock:
+            models, _, current_shadow = self._state
+            shadow = tuple(current_shadow if shadow is None else shadow)
+            for model_name in (name,) + shadow:
+                if model_name not in models:
+                    raise ValueError(f"نموذج تقييم غير معرف: {model_name}")
+            self._state = (models, name, tuple(model for model in shadow if model != name))
+        self.logger.info(f"نموذج التقييم النشط: {name}")
+
+    def reload_if_changed(self) -> bool:
+        """
+        إعادة ترجمة النماذج إذا تغير models_file (النماذج فيه تُضاف لنماذج الإعدادات)
+
+        Returns:
+            True إذا أُعيد التحميل
+        """
+        if not self.models_file:
+            return False
+        try:
+            mtime = os.path.getmtime(self.models_file)
+        except OSError:
+            return False
+        if mtime == self._file_mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._file_mtime:
+                return False
+            self._file_mtime = mtime
+            try:
+                with open(self.models_file, 'r', encoding='utf-8') as file:
+                    overrides = yaml.safe_load(file) or {}
+                settings = {
+                    'models': {**(self.config.get('models') or {}), **(overrides.get('models') or {})},
+                    'model': overrides.get('model', self.config.get('model', self.LEGACY)),
+                    'shadow_models': overrides.get('shadow_models', self.config.get('shadow_models'))
+                }
+                # الترجمة تكتمل قبل الاستبدال؛ الملف غير الصالح يبقي النماذج الحالية
+                self._state = self._compile(settings)
+            except Exception as e:
+                self.logger.error(f"خطأ في تحميل نماذج التقييم من {self.models_file}: {e}")
+                return False
+
+        self.logger.info(f"تم تحميل نماذج التقييم، النموذج النشط: {self.active}")
+        return True
+
+    def score(self, features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        تقييم دفعة بالنموذج النشط ونماذج الظل
+
+        Returns:
+            (نقاط النموذج النشط، اسم نموذج الظل -> نقاطه)
+        """
+        models, active, shadow = self._state
+        return models[active].score(features), {name: models[name].score(features) for name in shadow}
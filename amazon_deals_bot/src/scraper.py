@@ -17,6 +17,8 @@ import json
 from datetime import datetime
 import os
 
+from records import ScrapedProduct
+
 class AmazonScraper:
     """مستخرج البيانات من أمازون السعودية"""
     
@@ -143,7 +145,7 @@ class AmazonScraper:
             self._error_delay()
             raise
     
-    def search_products(self, search_term: str, page: int = 1) -> List[Dict[str, Any]]:
+    def search_products(self, search_term: str, page: int = 1) -> List[ScrapedProduct]:
         """
         البحث عن المنتجات
         
@@ -178,7 +180,7 @@ class AmazonScraper:
         finally:
             self._random_delay()
     
-    def _parse_search_results(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+    def _parse_search_results(self, soup: BeautifulSoup) -> List[ScrapedProduct]:
         """
         تحليل نتائج البحث
         
@@ -204,7 +206,7 @@ class AmazonScraper:
         
         return products
     
-    def _extract_product_info(self, container) -> Optional[Dict[str, Any]]:
+    def _extract_product_info(self, container) -> Optional[ScrapedProduct]:
         """
         استخراج معلومات المنتج من العنصر
         
@@ -244,22 +246,22 @@ class AmazonScraper:
             # معلومات البائع
             seller_info = self._extract_seller_info(container)
             
-            product = {
-                'asin': asin,
-                'title': title,
-                'amazon_url': product_url,
-                'image_url': image_url,
-                'current_price': price_info.get('current_price'),
-                'original_price': price_info.get('original_price'),
-                'currency': price_info.get('currency', 'SAR'),
-                'discount_percentage': price_info.get('discount_percentage'),
-                'rating': rating_info.get('rating'),
-                'review_count': rating_info.get('review_count'),
-                'seller_name': seller_info.get('seller_name'),
-                'is_prime': seller_info.get('is_prime', False),
-                'availability': seller_info.get('availability', 'unknown'),
-                'scraped_at': datetime.now()
-            }
+            product = ScrapedProduct(
+                asin=asin,
+                title=title,
+                amazon_url=product_url,
+                image_url=image_url,
+                current_price=price_info.get('current_price'),
+                original_price=price_info.get('original_price'),
+                currency=price_info.get('currency', 'SAR'),
+                discount_percentage=price_info.get('discount_percentage'),
+                rating=rating_info.get('rating'),
+                review_count=rating_info.get('review_count'),
+                seller_name=seller_info.get('seller_name'),
+                is_prime=seller_info.get('is_prime', False),
+                availability=seller_info.get('availability', 'unknown'),
+                scraped_at=datetime.now()
+            )
             
             return product
             
@@ -412,7 +414,7 @@ class AmazonScraper:
         
         return True
     
-    def get_product_details(self, asin: str) -> Optional[Dict[str, Any]]:
+    def get_product_details(self, asin: str) -> Optional[ScrapedProduct]:
         """
         الحصول على تفاصيل منتج محدد
         
@@ -440,9 +442,9 @@ class AmazonScraper:
         finally:
             self._random_delay()
     
-    def _parse_product_page(self, soup: BeautifulSoup, asin: str) -> Dict[str, Any]:
+    def _parse_product_page(self, soup: BeautifulSoup, asin: str) -> ScrapedProduct:
         """تحليل صفحة المنتج"""
-        product = {'asin': asin}
+        product = ScrapedProduct(asin=asin)
         
         try:
             # العنوان
@@ -534,7 +536,7 @@ class AmazonScraper:
         
         return rating_info
     
-    def scrape_deals_page(self) -> List[Dict[str, Any]]:
+    def scrape_deals_page(self) -> List[ScrapedProduct]:
         """استخراج العروض من صفحة العروض الخاصة"""
         deals_url = f"{self.base_url}/deals"
         
@@ -555,7 +557,7 @@ class AmazonScraper:
         finally:
             self._random_delay()
     
-    def _parse_deals_page(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+    def _parse_deals_page(self, soup: BeautifulSoup) -> List[ScrapedProduct]:
         """تحليل صفحة العروض"""
         deals = []
         
@@ -573,7 +575,7 @@ class AmazonScraper:
         
         return deals
     
-    def _extract_deal_info(self, container) -> Optional[Dict[str, Any]]:
+    def _extract_deal_info(self, container) -> Optional[ScrapedProduct]:
         """استخراج معلومات العرض"""
         try:
             # الحصول على ASIN من الرابط
@@ -0,0 +1,292 @@
+"""
+وحدة تخزين SQLite المدمجة (بديل MySQL للتثبيتات الصغيرة والاختبارات)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from typing import Dict, Any, Optional
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+# ملف مخطط SQLite المكافئ لـ setup_database.sql
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'setup_database_sqlite.sql'
+
+_NAMED_PARAM = re.compile(r'%\((\w+)\)s')
+_VALUES_REF = re.compile(r'VALUES\((\w+)\)')
+_DELETE_LIMIT = re.compile(
+    r'DELETE FROM (\w+) WHERE (.+?) ORDER BY (\w+) LIMIT %s', re.DOTALL
+)
+
+# دوال MySQL ومكافئاتها في SQLite
+_FUNCTION_REPLACEMENTS = [
+    ('NOW()', "datetime('now', 'localtime')"),
+    ('CURDATE()', "date('now', 'localtime')"),
+    ('CURRENT_TIMESTAMP', "datetime('now', 'localtime')"),
+    ('INSERT IGNORE', 'INSERT OR IGNORE'),
+    ('LEAST(', 'MIN('),
+    ('GREATEST(', 'MAX(')
+]
+
+@lru_cache(maxsize=512)
+def translate_query(query: str) -> str:
+    """
+    تحويل استعلام بصيغة MySQL إلى صيغة SQLite
+
+    يغطي الصيغ المستخدمة في المشروع: المعاملات (%s و %(name)s)، ON DUPLICATE KEY
+    UPDATE، دوال الوقت، و DELETE ... ORDER BY ... LIMIT.
+
+    Args:
+        query: استعلام MySQL
+
+    Returns:
+        استعلام SQLite
+    """
+    if 'ON DUPLICATE KEY UPDATE' in query:
+        head, tail = query.split('ON DUPLICATE KEY UPDATE', 1)
+        query = head + 'ON CONFLICT DO UPDATE SET' + _VALUES_REF.sub(r'excluded.\1', tail)
+
+    for mysql_function, sqlite_function in _FUNCTION_REPLACEMENTS:
+        query = query.replace(mysql_function, sqlite_function)
+
+    # SQLite لا يدعم ORDER BY/LIMIT في DELETE إلا في نسخ مخصصة
+    query = _DELETE_LIMIT.sub(
+        r'DELETE FROM \1 WHERE \3 IN (SELECT \3 FROM \1 WHERE \2 ORDER BY \3 LIMIT %s)', query
+    )
+
+    query = _NAMED_PARAM.sub(r':\1', query)
+    return query.replace('%s', '?').replace('%%', '%')
+
+def _adapt(value: Any) -> Any:
+    """تحويل قيمة معامل إلى تمثيلها في SQLite (بنفس تمثيل MySQL)"""
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _adapt_params(params: Any) -> Any:
+    """
+    تحويل معاملات استعلام (تسلسل أو قاموس)
+
+    التحويل يتم في المؤشر بدلاً من sqlite3.register_adapter حتى لا يتغير سلوك
+    sqlite3 لبقية العملية عند استخدام MySQL.
+    """
+    if not params:
+        return ()
+    if isinstance(params, dict):
+        return {name: _adapt(value) for name, value in params.items()}
+    return tuple(_adapt(value) for value in params)
+
+def _register_converters():
+    """
+    تحويل أعمدة TIMESTAMP و DATE المقروءة إلى تواريخ
+
+    يُستدعى عند إنشاء pool SQLite فقط (المحولات عامة في sqlite3 ولا تُطبق إلا على
+    الاتصالات المفتوحة بـ PARSE_DECLTYPES). نتائج الدوال (مثل MAX) بلا نوع معلن
+    فتبقى نصاً.
+    """
+    sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+    sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+
+class SQLiteCursor:
+    """مؤشر بواجهة mysql.connector فوق مؤشر SQLite"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._cursor = connection.cursor()
+        self.lastrowid = None
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def execute(self, query: str, params: Any = ()):
+        sql = translate_query(query)
+        upsert = 'ON CONFLICT' in sql
+        if upsert:
+            previous_rowid = self._connection.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+        try:
+            self._cursor.execute(sql, _adapt_params(params))
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+        self.lastrowid = self._cursor.lastrowid
+        # عند التحديث بدلاً من الإدراج يعيد MySQL صفراً وليس آخر معرف سابق
+        if upsert and self.lastrowid == previous_rowid:
+            self.lastrowid = 0
+
+    def executemany(self, query: str, params_list):
+        try:
+            self._cursor.executemany(translate_query(query), [_adapt_params(params) for params in params_list])
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """اتصال بواجهة mysql.connector فوق اتصال SQLite"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._connection)
+
+    def commit(self):
+        try:
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+class SQLiteConnectionPool:
+    """pool اتصالات SQLite بوضع WAL وبنفس واجهة ومقاييس ConnectionPool"""
+
+    def __init__(self, database_path: str, pool_size: int = 5, timeout: float = 30):
+        """
+        تهيئة pool الاتصالات وإنشاء المخطط عند الحاجة
+
+        Args:
+            database_path: مسار ملف قاعدة البيانات
+            pool_size: عدد الاتصالات
+            timeout: أقصى مدة انتظار لاتصال أو لقفل الكتابة بالثواني
+        """
+        self.logger = logging.getLogger(__name__)
+        self.database_path = database_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+
+        self._metrics = {
+            'checkouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'peak_in_use': 0,
+            'timeouts': 0
+        }
+
+        _register_converters()
+        self._apply_schema()
+
+    def _connect(self) -> SQLiteConnection:
+        """فتح اتصال جديد بإعدادات WAL"""
+        connection = sqlite3.connect(
+            self.database_path,
+            timeout=self.timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        # في وضع WAL يكفي NORMAL لسلامة البيانات مع كتابة أسرع
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        return SQLiteConnection(connection)
+
+    def _apply_schema(self):
+        """إنشاء الجداول والفهارس إذا لم تكن موجودة"""
+        connection = self._connect()
+        try:
+            connection._connection.executescript(SCHEMA_PATH.read_text(encoding='utf-8'))
+        finally:
+            connection.close()
+
+    def get_connection(self) -> SQLiteConnection:
+        """الحصول على اتصال من الـ pool"""
+        start_time = time.monotonic()
+        connection = None
+
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                connection = self._connect()
+            else:
+                try:
+                    connection = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._metrics['timeouts'] += 1
+                    raise PoolError(
+                        f"انتهت مهلة انتظار اتصال SQLite بعد {self.timeout} ثانية"
+                    )
+
+        wait_time = time.monotonic() - start_time
+        with self._lock:
+            self._in_use += 1
+            self._metrics['checkouts'] += 1
+            self._metrics['total_wait_time'] += wait_time
+            self._metrics['max_wait_time'] = max(self._metrics['max_wait_time'], wait_time)
+            self._metrics['peak_in_use'] = max(self._metrics['peak_in_use'], self._in_use)
+
+        return connection
+
+    def release(self, connection: SQLiteConnection):
+        """إعادة اتصال إلى الـ pool"""
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+        self._idle.put(connection)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """مقاييس الـ pool بنفس مفاتيح ConnectionPool"""
+        with self._lock:
+            checkouts = self._metrics['checkouts']
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': 0,
+                'in_use': self._in_use,
+                'overflow_in_use': 0,
+                'peak_in_use': self._metrics['peak_in_use'],
+                'checkouts': checkouts,
+                'avg_wait_ms': round(self._metrics['total_wait_time'] / checkouts * 1000, 3) if checkouts else 0,
+                'max_wait_ms': round(self._metrics['max_wait_time'] * 1000, 3),
+                'overflow_events': 0,
+                'timeouts': self._metrics['timeouts']
+            }
+
+    def close(self):
+        """إغلاق الاتصالات الخاملة"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"خطأ في إغلاق اتصال SQLite: {e}")
+            with self._lock:
+                self._created -= 1
@@ -0,0 +1,96 @@
+"""
+وحدة خدمة الإحصائيات (استعلام واحد لكل مجموعة عدادات مع تخزين مؤقت)
+تاريخ الإنشاء: 19 أكتوبر 2026
+"""
+
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+from datetime import datetime, timedelta
+
+from cache import TTLCache
+
+class StatsService:
+    """خدمة إحصائيات النظام: جميع العدادات في رحلة واحدة لقاعدة البيانات"""
+
+    # كل مجموعة: قائمة (اسم العداد، استعلام فرعي، هل يحتاج تاريخ البداية)
+    PERFORMANCE_COUNTERS: List[Tuple[str, str, bool]] = [
+        ('total_products', "SELECT COUNT(*) FROM products WHERE is_active = 1", False),
+        ('active_deals', "SELECT COUNT(*) FROM deals WHERE deal_status = 'active'", False),
+        ('messages_sent', """SELECT COUNT(*) FROM sent_messages
+            WHERE delivery_status = 'sent' AND sent_at >= %s""", True),
+        ('errors_count', """SELECT COUNT(*) FROM activity_log
+            WHERE severity IN ('error', 'critical') AND created_at >= %s""", True)
+    ]
+
+    CHANNEL_COUNTERS: List[Tuple[str, str, bool]] = [
+        ('active_channels', "SELECT COUNT(*) FROM telegram_channels WHERE is_active = 1", False),
+        ('active_users', "SELECT COUNT(*) FROM telegram_users WHERE is_active = 1", False),
+        ('messages_today', """SELECT COUNT(*) FROM sent_messages
+            WHERE delivery_status = 'sent' AND sent_at >= %s""", True),
+        ('failed_messages_today', """SELECT COUNT(*) FROM sent_messages
+            WHERE delivery_status = 'failed' AND sent_at >= %s""", True)
+    ]
+
+    USER_ACTIVITY_COUNTERS: List[Tuple[str, str, bool]] = [
+        ('active_users', """SELECT COUNT(*) FROM telegram_users
+            WHERE is_active = 1 AND last_interaction >= %s""", True),
+        ('new_users', "SELECT COUNT(*) FROM telegram_users WHERE created_at >= %s", True),
+        ('new_subscriptions', """SELECT COUNT(*) FROM activity_log
+            WHERE activity_type = 'user_subscribed' AND created_at >= %s""", True)
+    ]
+
+    def __init__(self, database_manager, stats_config: Optional[Dict[str, Any]] = None):
+        """
+        تهيئة خدمة الإحصائيات
+
+        Args:
+            database_manager: مدير قاعدة البيانات
+            stats_config: إعدادات الخدمة (performance.stats_cache_ttl)
+        """
+        self.db = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        stats_config = stats_config or {}
+        self.cache = TTLCache(ttl=stats_config.get('stats_cache_ttl', 60), max_entries=32)
+
+    def get_performance_stats(self, days: int = 7) -> Dict[str, Any]:
+        """عدادات الأداء خلال آخر عدد من الأيام"""
+        start_date = datetime.now() - timedelta(days=days)
+        return self._get_counters(('performance', days), self.PERFORMANCE_COUNTERS, start_date)
+
+    def get_channel_stats(self) -> Dict[str, Any]:
+        """عدادات القنوات والمستخدمين ورسائل اليوم"""
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        return self._get_counters(('channels', today), self.CHANNEL_COUNTERS, today)
+
+    def get_user_activity_stats(self, days: int = 7) -> Dict[str, Any]:
+        """عدادات نشاط المستخدمين خلال آخر عدد من الأيام"""
+        start_date = datetime.now() - timedelta(days=days)
+        return self._get_counters(('user_activity', days), self.USER_ACTIVITY_COUNTERS, start_date)
+
+    def invalidate(self):
+        """إبطال جميع الإحصائيات المخزنة"""
+        self.cache.invalidate()
+
+    def _get_counters(self, cache_key: Tuple, counters: List[Tuple[str, str, bool]],
+                      start_date: datetime) -> Dict[str, Any]:
+        """قراءة مجموعة عدادات عبر الذاكرة المؤقتة"""
+        return dict(self.cache.get_or_load(
+            cache_key, lambda: self._count(counters, start_date)
+        ))
+
+    def _count(self, counters: List[Tuple[str, str, bool]],
+               start_date: datetime) -> Dict[str, int]:
+        """حساب جميع العدادات في استعلام واحد من استعلامات فرعية"""
+        query = "SELECT " + ",\n".join(
+            f"({subquery}) AS {name}" for name, subquery, _ in counters
+        )
+        params = tuple(start_date for _, _, needs_date in counters if needs_date)
+
+        stats = {name: 0 for name, _, _ in counters}
+        result = self.db.execute_read(query, params)
+        if result:
+            for (name, _, _), value in zip(counters, result[0]):
+                stats[name] = value or 0
+
+        return stats
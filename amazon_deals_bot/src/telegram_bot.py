@@ -23,6 +23,9 @@ from telegram.error import TelegramError, RetryAfter, TimedOut
 class TelegramBot:
     """بوت التليجرام لنشر العروض"""
     
+    # عدد العروض في كل صفحة من أمر /deals
+    DEALS_PAGE_SIZE = 5
+    
     def __init__(self, config: Dict[str, Any], database_manager, deals_engine):
         """
         تهيئة بوت التليجرام
@@ -195,17 +198,11 @@ class TelegramBot:
     async def deals_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالج أمر /deals"""
         try:
-            # الحصول على أحدث العروض
-            deals = await self.deals_engine.get_active_deals(limit=10)
-            
-            if not deals:
+            # إرسال الصفحة الأولى من أحدث العروض
+            if not await self._send_deals_page(update.effective_chat.id, context):
                 await update.message.reply_text(
                     "🤷‍♂️ لا توجد عروض متاحة حالياً. سنبحث عن المزيد قريباً!"
                 )
-                return
-            
-            # إرسال العروض
-            await self._send_deals_to_chat(update.effective_chat.id, deals, context)
             
         except Exception as e:
             self.logger.error(f"خطأ في أمر deals: {e}")
@@ -315,6 +312,8 @@ class TelegramBot:
                 await self._handle_subscription(query, data)
             elif data.startswith("deal_"):
                 await self._handle_deal_action(query, data)
+            elif data.startswith("more_deals:"):
+                await self._handle_more_deals(query, data, context)
             else:
                 await query.edit_message_text("خيار غير معروف.")
                 
@@ -453,7 +452,7 @@ class TelegramBot:
 🛒 [اشتري الآن]({deal.get('amazon_url', '')})
             """.strip()
     
-    async def broadcast_deals(self, deals: List[Dict[str, Any]]) -> Dict[str, int]:
+    async def broadcast_deals(self, deals: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         بث العروض لجميع القنوات المشتركة
         
@@ -461,13 +460,15 @@ class TelegramBot:
             deals: قائمة العروض
             
         Returns:
-            إحصائيات الإرسال
+            إحصائيات الإرسال مع 'sent_deals': العروض التي وصلت لقناة واحدة على الأقل
         """
         broadcast_stats = {
             'channels_sent': 0,
             'messages_sent': 0,
-            'messages_failed': 0
+            'messages_failed': 0,
+            'sent_deals': []
         }
+        sent_ids = set()
         
         try:
             # الحصول على قائمة القنوات النشطة
@@ -496,6 +497,9 @@ class TelegramBot:
                         if await self.send_deal_to_channel(channel_id, deal):
                             sent_count += 1
                             broadcast_stats['messages_sent'] += 1
+                            if id(deal) not in sent_ids:
+                                sent_ids.add(id(deal))
+                                broadcast_stats['sent_deals'].append(deal)
                         else:
                             broadcast_stats['messages_failed'] += 1
                         
@@ -586,6 +590,49 @@ class TelegramBot:
         except Exception as e:
             self.logger.error(f"خطأ في إرسال العروض للمحادثة: {e}")
     
+    async def _send_deals_page(self, chat_id: int, context, after=None) -> int:
+        """
+        إرسال صفحة من العروض النشطة مع زر "المزيد" عند وجود صفحة تالية
+        
+        Args:
+            chat_id: معرف المحادثة
+            context: سياق البوت
+            after: مفتاح آخر عرض في الصفحة السابقة
+            
+        Returns:
+            عدد العروض المرسلة
+        """
+        page_size = self.DEALS_PAGE_SIZE
+        # عرض إضافي لمعرفة وجود صفحة تالية
+        deals = await self.deals_engine.get_active_deals(limit=page_size + 1, after=after)
+        page = deals[:page_size]
+        
+        if page:
+            await self._send_deals_to_chat(chat_id, page, context)
+        
+        if len(deals) > page_size:
+            last = page[-1]
+            keyboard = [[InlineKeyboardButton(
+                "⬇️ المزيد من العروض",
+                callback_data=f"more_deals:{last.get('quality_score') or 0}:"
+                              f"{last.get('discount_percentage') or 0}:{last['id']}"
+            )]]
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text="هل تريد المزيد من العروض؟",
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+        
+        return len(page)
+    
+    async def _handle_more_deals(self, query, data, context):
+        """معالجة زر الصفحة التالية من العروض"""
+        _, score, discount, deal_id = data.split(':')
+        after = (float(score), float(discount), int(deal_id))
+        
+        if not await self._send_deals_page(query.message.chat_id, context, after=after):
+            await query.edit_message_text("لا توجد عروض إضافية حالياً.")
+    
     async def _handle_subscription(self, query, data):
         """معالجة طلبات الاشتراك"""
         # يمكن تطوير هذا لاحقاً
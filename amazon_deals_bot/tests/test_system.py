@@ -8,7 +8,7 @@ import asyncio
 import sys
 import os
 from unittest.mock import Mock, patch, AsyncMock
-from datetime import datetime
+from datetime import datetime, timedelta
 import yaml
 
 # إضافة مجلد src إلى المسار
@@ -20,6 +20,25 @@ from deal_analyzer import DealAnalyzer
 from telegram_bot import TelegramBot
 from channel_manager import ChannelManager
 from deals_engine import DealsEngine
+from cleanup_engine import CleanupEngine
+from partition_manager import PartitionManager
+from price_stats import PriceStats, PriceStatsEngine
+from deal_lifecycle import DealLifecycleManager
+from deal_sweeper import DealExpirySweeper
+from cache import TTLCache
+from stats_service import StatsService
+from activity_logger import ActivityLogger
+from sqlite_backend import translate_query
+from columnar_export import ColumnarExporter
+from price_archive import PriceRuns
+from keyword_matcher import KeywordMatcher
+from deal_ranker import TopKRanker
+from near_duplicates import NearDuplicateDetector
+from scoring_models import ScoringModel, ScoringModelRegistry
+from change_detector import ProductChangeDetector
+from deal_duration import DealDurationEstimator
+from recheck_queue import RecheckQueue
+from records import ScrapedProduct, DealCandidate, Deal
 
 class TestConfig:
     """إعدادات الاختبار"""
@@ -148,6 +167,490 @@ class TestDatabaseManager:
             result = db_manager.insert_product(product_data)
             assert result == 1
             mock_query.assert_called_once()
+    
+    def test_connection_pool_overflow_metrics(self, db_manager):
+        """اختبار الاتصالات الإضافية ومقاييس pool"""
+        from mysql.connector.errors import PoolError
+        
+        pool = db_manager.connection_pool
+        pool.max_overflow = 1
+        pool._pool.get_connection.side_effect = PoolError("pool exhausted")
+        
+        with patch('mysql.connector.connect') as mock_connect:
+            mock_connect.return_value = Mock()
+            
+            with db_manager.get_connection():
+                stats = pool.get_stats()
+                assert stats['in_use'] == 1
+                assert stats['overflow_in_use'] == 1
+            
+            stats = pool.get_stats()
+            assert stats['in_use'] == 0
+            assert stats['overflow_in_use'] == 0
+            assert stats['overflow_events'] == 1
+            assert stats['checkouts'] == 1
+        
+        with patch.object(db_manager, 'execute_read', return_value=[(0,)]):
+            perf_stats = db_manager.get_performance_stats()
+        assert 'connection_pool' in perf_stats
+    
+    def test_connection_pool_close_disconnects_idle(self, db_manager):
+        """اختبار إغلاق الاتصالات الخاملة دون إعادتها للـ pool"""
+        from mysql.connector.errors import PoolError
+        
+        pool = db_manager.connection_pool
+        idle = [Mock(), Mock()]
+        pool._pool.get_connection.side_effect = idle + [PoolError("pool exhausted")]
+        
+        assert pool.close() == 2
+        for connection in idle:
+            connection.disconnect.assert_called_once()
+            connection.close.assert_not_called()
+        
+        # بعد الإغلاق يُرفض الطلب فوراً بدلاً من انتظار المهلة
+        start = datetime.now()
+        with pytest.raises(PoolError):
+            pool.get_connection(timeout=5)
+        assert (datetime.now() - start).total_seconds() < 1
+
+class TestSQLiteBackend:
+    """اختبارات تكامل على قاعدة بيانات SQLite حقيقية"""
+    
+    @pytest.fixture
+    def sqlite_db(self, tmp_path):
+        """مدير قاعدة بيانات على ملف SQLite مؤقت"""
+        config = TestConfig.get_test_config()
+        config['database'].update({'engine': 'sqlite',
+                                   'sqlite_path': str(tmp_path / 'deals.db')})
+        db_manager = DatabaseManager(config)
+        yield db_manager
+        db_manager.close()
+    
+    def test_translates_mysql_dialect(self):
+        """اختبار تحويل صيغ MySQL المستخدمة في المشروع"""
+        query = translate_query(
+            "INSERT INTO t (a) VALUES (%(a)s) ON DUPLICATE KEY UPDATE a = VALUES(a), b = NOW()"
+        )
+        assert query == ("INSERT INTO t (a) VALUES (:a) ON CONFLICT DO UPDATE SET "
+                         "a = excluded.a, b = datetime('now', 'localtime')")
+        
+        query = translate_query("DELETE FROM deals WHERE deal_status = %s ORDER BY id LIMIT %s")
+        assert query == ("DELETE FROM deals WHERE id IN (SELECT id FROM deals "
+                         "WHERE deal_status = ? ORDER BY id LIMIT ?)")
+        
+        # تحويل الأنواع محصور في هذا المحرك ولا يغير sqlite3 لبقية العملية
+        import sqlite3
+        from decimal import Decimal
+        assert (Decimal, sqlite3.PrepareProtocol) not in sqlite3.adapters
+    
+    def test_queries_are_instrumented(self, sqlite_db):
+        """اختبار قياس زمن الاستعلامات وعدد السجلات لكل بصمة"""
+        for product_id in (1, 2, 3):
+            sqlite_db.execute_query("SELECT id FROM deals WHERE product_id = %s",
+                                    (product_id,), fetch=True)
+        sqlite_db.expire_deals([1, 2])
+        sqlite_db.expire_deals([3])
+        
+        statements = {entry['statement']: entry for entry in sqlite_db.query_stats.top(50)}
+        select_stats = statements['SELECT id FROM deals WHERE product_id = ?']
+        assert select_stats['calls'] == 3
+        assert sum(select_stats['histogram']) == 3
+        
+        expire_stats = [entry for key, entry in statements.items() if 'IN (?+)' in key]
+        assert len(expire_stats) == 1 and expire_stats[0]['calls'] == 2
+        
+        with pytest.raises(ValueError):
+            sqlite_db.query_stats.top(order_by='unknown')
+    
+    @pytest.mark.asyncio
+    async def test_preferences_read_your_writes(self, sqlite_db):
+        """اختبار قراءة التفضيلات من الخادم الرئيسي بعد تحديثها"""
+        channel_manager = ChannelManager(sqlite_db)
+        sqlite_db.read_pool = Mock()
+        
+        with patch.object(sqlite_db, '_execute', return_value=[('{"min_discount": 30}',)]) as mock_execute:
+            await channel_manager.get_user_preferences(42)
+            assert mock_execute.call_args.kwargs['read_only'] is True
+            
+            await channel_manager.update_user_preferences(42, {'min_discount': 30})
+            preferences = await channel_manager.get_user_preferences(42)
+            assert mock_execute.call_args.kwargs['read_only'] is False
+            assert preferences == {'min_discount': 30}
+            
+            # مستخدم آخر لم تتغير تفضيلاته يُقرأ من نسخة القراءة
+            await channel_manager.get_user_preferences(7)
+            assert mock_execute.call_args.kwargs['read_only'] is True
+    
+    def test_replica_fallback_does_not_wait(self, sqlite_db):
+        """اختبار الرجوع للخادم الرئيسي فوراً عند انشغال نسخة القراءة أو تعطلها"""
+        from mysql.connector.errors import PoolError, InterfaceError
+        
+        sqlite_db.read_pool = Mock()
+        sqlite_db.read_pool.get_connection.side_effect = PoolError("pool exhausted")
+        assert sqlite_db.execute_read("SELECT 1") == [(1,)]
+        assert sqlite_db.read_pool.get_connection.call_args.kwargs['timeout'] == sqlite_db.replica_acquire_timeout
+        
+        # نسخة القراءة معطلة: تُتجاوز حتى retry_seconds
+        sqlite_db.read_pool.get_connection.side_effect = InterfaceError("replica down")
+        assert sqlite_db.execute_read("SELECT 1") == [(1,)]
+        assert sqlite_db.execute_read("SELECT 1") == [(1,)]
+        assert sqlite_db.read_pool.get_connection.call_count == 2
+    
+    def test_product_price_and_deal_roundtrip(self, sqlite_db):
+        """اختبار المسار الكامل: منتج، أسعار، ملخص يومي، عرض، وسجل نشاط"""
+        product = {
+            'asin': 'B08N5WRWNW', 'title': 'منتج', 'title_ar': None, 'description': None,
+            'brand': 'Apple', 'category_id': None, 'image_url': None,
+            'amazon_url': 'https://www.amazon.sa/dp/B08N5WRWNW',
+            'rating': 4.5, 'review_count': 10
+        }
+        product_id = sqlite_db.insert_product(product)
+        # إعادة الإدراج تحدث المنتج وتعيد نفس المعرف
+        assert sqlite_db.insert_product(dict(product, review_count=11)) == product_id
+        
+        for price in (100, 80, 90):
+            assert sqlite_db.insert_price_history({
+                'product_id': product_id, 'price': price, 'currency': 'SAR',
+                'availability_status': 'in_stock', 'seller_name': None, 'is_prime': True
+            })
+        
+        daily = sqlite_db.get_price_daily(product_id)
+        assert len(daily) == 1
+        assert daily[0]['min_price'] == 80
+        assert daily[0]['avg_price'] == 90
+        assert daily[0]['close_price'] == 90
+        assert daily[0]['sample_count'] == 3
+        assert sqlite_db.get_latest_price(product_id)['price'] == 90
+        
+        deal_id = sqlite_db.insert_deal({
+            'product_id': product_id, 'deal_type': 'discount', 'original_price': 100,
+            'deal_price': 90, 'discount_percentage': 10, 'discount_amount': 10,
+            'start_date': datetime.now(), 'end_date': None, 'deal_status': 'active',
+            'max_quantity': None, 'deal_url': None, 'quality_score': 6.5
+        })
+        deals = sqlite_db.get_active_deals(limit=10)
+        assert [deal['id'] for deal in deals] == [deal_id]
+        assert deals[0]['asin'] == 'B08N5WRWNW'
+        assert sqlite_db.get_active_deals(limit=10, after=(6.5, 10, deal_id)) == []
+        
+        sqlite_db.log_activity('deal_found', 'عرض جديد', 'deals', deal_id, {'discount': 10})
+        sqlite_db.activity_logger.flush()
+        stats = sqlite_db.get_performance_stats()
+        assert stats['total_products'] == 1
+        assert stats['active_deals'] == 1
+        
+        assert sqlite_db.expire_deals([deal_id]) == 1
+        assert sqlite_db.cleanup_old_data(days=30)
+        assert sqlite_db.maintain_partitions()['skipped']
+    
+    def test_active_deals_pages_include_unscored(self, sqlite_db):
+        """اختبار ظهور العروض بلا نقاط جودة في صفحات keyset التالية"""
+        product_id = sqlite_db.insert_product({
+            'asin': 'B08N5WRWNW', 'title': 'منتج', 'title_ar': None, 'description': None,
+            'brand': None, 'category_id': None, 'image_url': None, 'amazon_url': None,
+            'rating': None, 'review_count': 0
+        })
+        for score in (7.5, None, 3.0):
+            sqlite_db.insert_deal({
+                'product_id': product_id, 'deal_type': 'discount', 'original_price': 100,
+                'deal_price': 80, 'discount_percentage': 20, 'discount_amount': 20,
+                'start_date': datetime.now(), 'end_date': None, 'deal_status': 'active',
+                'max_quantity': None, 'deal_url': None, 'quality_score': score
+            })
+        
+        scores, after = [], None
+        while True:
+            page = sqlite_db.get_active_deals(limit=1, after=after)
+            if not page:
+                break
+            deal = page[0]
+            scores.append(deal['quality_score'])
+            after = (deal['quality_score'], deal['discount_percentage'], deal['id'])
+        
+        assert scores == [7.5, 3.0, 0]
+    
+    def test_price_archive_roundtrip(self, sqlite_db):
+        """اختبار أرشفة السجلات القديمة كفترات تغير وإعادة بنائها"""
+        sqlite_db.price_archive.enabled = True
+        product_id = sqlite_db.insert_product({
+            'asin': 'B08N5WRWNW', 'title': 'منتج', 'title_ar': None, 'description': None,
+            'brand': None, 'category_id': None, 'image_url': None, 'amazon_url': None,
+            'rating': None, 'review_count': 0
+        })
+        
+        start = datetime(2025, 1, 1, 12, 0)
+        prices = [100, 100, 100, 80, 80, 100]
+        for hour, price in enumerate(prices):
+            sqlite_db.execute_query(
+                "INSERT INTO price_history (product_id, price, availability_status, recorded_at) "
+                "VALUES (%s, %s, %s, %s)",
+                (product_id, price, 'in_stock', start + timedelta(hours=hour))
+            )
+        
+        report = sqlite_db.archive_price_history()
+        assert report['archived'] == 6 and report['completed']
+        assert sqlite_db.execute_query("SELECT COUNT(*) FROM price_history", fetch=True)[0][0] == 0
+        
+        runs = sqlite_db.price_archive.reconstruct(product_id)
+        assert [(run['price'], run['start'], run['end']) for run in runs] == [
+            (100.0, start, start + timedelta(hours=2)),
+            (80.0, start + timedelta(hours=3), start + timedelta(hours=4)),
+            (100.0, start + timedelta(hours=5), start + timedelta(hours=5))
+        ]
+        assert sqlite_db.get_all_time_low(product_id) == 80.0
+        assert sqlite_db.get_latest_price(product_id)['price'] == 100.0
+        
+        # مشاهدة أقدم تصل لاحقاً تُدمج بالترتيب الزمني
+        series = PriceRuns.from_bytes(sqlite_db.price_archive.get_runs(product_id).to_bytes())
+        series.extend([(start - timedelta(hours=1), 100, 'in_stock')])
+        assert len(series) == 3 and series.first_seen() == start - timedelta(hours=1)
+        assert series.price_at(start + timedelta(hours=3, minutes=30)) == 80.0
+    
+    def test_change_detector_skips_unchanged_products(self, sqlite_db):
+        """اختبار تخطي المنتجات غير المتغيرة وتحديث last_seen_at لها دفعة واحدة"""
+        detector = ProductChangeDetector(sqlite_db, {'max_age_hours': 6})
+        products = [{'asin': 'B000000001', 'current_price': 100, 'rating': 4.5},
+                    {'asin': 'B000000002', 'current_price': 50}]
+        
+        changed, unchanged = detector.split([dict(product) for product in products])
+        assert len(changed) == 2 and unchanged == []
+        for product in changed:
+            product['discount_percentage'] = 20  # التحليل يعدل المنتج بعد حساب البصمة
+            detector.record(product)
+        assert detector.flush()['saved'] == 2
+        
+        # بعد إعادة التشغيل تُحمّل البصمات من قاعدة البيانات
+        detector = ProductChangeDetector(sqlite_db, {'max_age_hours': 6})
+        assert detector.load() == 2
+        product_id = sqlite_db.insert_product({
+            'asin': 'B000000001', 'title': 'Kettle', 'title_ar': None, 'description': None,
+            'brand': None, 'category_id': None, 'image_url': None, 'amazon_url': None,
+            'rating': 4.5, 'review_count': 0
+        })
+        deal_id = sqlite_db.insert_deal({
+            'product_id': product_id, 'deal_type': 'daily', 'original_price': 150,
+            'deal_price': 100, 'discount_percentage': 33, 'discount_amount': 50,
+            'start_date': datetime.now(), 'end_date': None, 'deal_status': 'active',
+            'max_quantity': None, 'deal_url': None, 'quality_score': 7
+        })
+        later = datetime.now() + timedelta(minutes=5)
+        changed, unchanged = detector.split([dict(products[0]), dict(products[1], current_price=45)])
+        assert [product['asin'] for product in changed] == ['B000000002']
+        assert [product['asin'] for product in unchanged] == ['B000000001']
+        assert detector.flush(now=later) == {'saved': 0, 'touched': 1}
+        
+        last_seen = sqlite_db.execute_query(
+            "SELECT last_seen_at FROM product_fingerprints WHERE asin = %s", ('B000000001',), fetch=True
+        )[0][0]
+        assert str(last_seen).startswith(later.strftime('%Y-%m-%d %H:%M'))
+        deal_seen = sqlite_db.execute_query(
+            "SELECT last_seen_at FROM deals WHERE id = %s", (deal_id,), fetch=True
+        )[0][0]
+        assert str(deal_seen).startswith(later.strftime('%Y-%m-%d %H:%M'))
+        
+        # البصمة تنتهي بعد max_age فيُعاد التحليل
+        changed, _ = detector.split([dict(products[0])], now=datetime.now() + timedelta(hours=7))
+        assert len(changed) == 1
+    
+    def test_duration_estimator_learns_observed_lifetimes(self, sqlite_db):
+        """اختبار تعلم أعمار العروض لكل فئة ونوع عرض من آخر تأكيد لوجودها"""
+        matcher = KeywordMatcher({'category': {'laptops': ['laptop']}})
+        start = datetime.now() - timedelta(days=5)
+        for index, (title, hours) in enumerate([('Gaming Laptop', 10), ('Office Laptop', 12),
+                                                ('Kettle', 40), ('Toaster', 50)]):
+            product_id = sqlite_db.insert_product({
+                'asin': f'B00000000{index}', 'title': title, 'title_ar': None, 'description': None,
+                'brand': None, 'category_id': None, 'image_url': None, 'amazon_url': None,
+                'rating': None, 'review_count': 0
+            })
+            deal_id = sqlite_db.insert_deal({
+                'product_id': product_id, 'deal_type': 'daily', 'original_price': 100,
+                'deal_price': 60, 'discount_percentage': 40, 'discount_amount': 40,
+                'start_date': start, 'end_date': start + timedelta(days=1), 'deal_status': 'active',
+                'max_quantity': None, 'deal_url': None, 'quality_score': 7
+            })
+            sqlite_db.execute_query("UPDATE deals SET last_seen_at = %s WHERE id = %s",
+                                    (start + timedelta(hours=hours), deal_id))
+            sqlite_db.expire_deals([deal_id])
+        
+        estimator = DealDurationEstimator(sqlite_db, matcher, {'min_samples': 2, 'quantile': 0.5})
+        assert estimator.estimate('daily') == timedelta(days=1)
+        assert estimator.refresh() == 4
+        assert estimator.estimate('daily', 'laptops') == timedelta(hours=12)
+        assert estimator.estimate('daily') == timedelta(hours=40)
+        assert estimator.estimate('lightning', 'laptops') == timedelta(hours=6)
+        
+        # العروض المنتهية عند موعدها المقدر عينات مقطوعة: عاشت على الأقل هذه المدة
+        assert estimator._quantile([(10, False), (12, False), (20, True), (30, True)]) == 30
+        assert estimator._quantile([(5, False), (8, False)]) == 8
+    
+    def test_columnar_export_is_incremental(self, sqlite_db, tmp_path):
+        """اختبار التصدير على دفعات مع الاستئناف من آخر معرف"""
+        pq = pytest.importorskip('pyarrow.parquet')
+        
+        product_id = sqlite_db.insert_product({
+            'asin': 'B08N5WRWNW', 'title': 'منتج', 'title_ar': None, 'description': None,
+            'brand': None, 'category_id': None, 'image_url': None, 'amazon_url': None,
+            'rating': None, 'review_count': 0
+        })
+        
+        def add_prices(count):
+            for price in range(count):
+                sqlite_db.insert_price_history({
+                    'product_id': product_id, 'price': 100 + price, 'currency': 'SAR',
+                    'availability_status': None, 'seller_name': None, 'is_prime': False
+                })
+        
+        exporter = ColumnarExporter(sqlite_db, {'output_dir': str(tmp_path / 'export'),
+                                                'chunk_size': 2})
+        add_prices(3)
+        report = exporter.export(['price_history'])
+        assert report['price_history']['rows'] == 3
+        assert report['price_history']['files'] == 2
+        
+        add_prices(2)
+        report = exporter.export(['price_history'])
+        assert report['price_history']['rows'] == 2
+        
+        table = pq.read_table(str(tmp_path / 'export' / 'price_history'))
+        assert sorted(table.column('id').to_pylist()) == [1, 2, 3, 4, 5]
+        assert table.column('price').to_pylist()[0] == 100.0
+
+class TestCleanupEngine:
+    """اختبارات محرك تنظيف البيانات"""
+    
+    def test_keeps_last_record_per_product_per_day(self):
+        """اختبار الاحتفاظ بآخر سجل لكل منتج يومياً عبر الدفعات"""
+        mock_db = Mock()
+        cleaner = CleanupEngine(mock_db, {'batch_size': 3, 'pause': 0})
+        
+        day1 = datetime(2025, 1, 1).date()
+        day2 = datetime(2025, 1, 2).date()
+        batches = {
+            1: [(1, 10, day1), (2, 11, day1), (3, 10, day1)],
+            4: [(4, 10, day1), (5, 10, day2), (6, 11, day2)],
+            7: [(7, 10, day2)]
+        }
+        deleted_ids = []
+        
+        def fake_query(query, params=None, fetch=False):
+            if 'MIN(id)' in query:
+                return [(1, 7)]
+            if query.strip().startswith('SELECT'):
+                return batches.get(params[0], [])
+            deleted_ids.extend(params)
+            return len(params)
+        
+        mock_db.execute_query.side_effect = fake_query
+        
+        progress = cleaner.cleanup_price_history(datetime.now(), float('inf'))
+        
+        assert progress['completed'] is True
+        assert progress['scanned'] == 7
+        assert sorted(deleted_ids) == [1, 3, 5]
+    
+    def test_resume_after_failed_delete(self):
+        """اختبار عدم تقدم نقطة الاستئناف بعد فشل الحذف واستعادة السجلات المحتفظ بها"""
+        mock_db = Mock()
+        cleaner = CleanupEngine(mock_db, {'batch_size': 3, 'pause': 0})
+        
+        day1 = datetime(2025, 1, 1).date()
+        day2 = datetime(2025, 1, 2).date()
+        batches = {
+            1: [(1, 10, day1), (2, 11, day1), (3, 10, day1)],
+            4: [(4, 10, day1), (5, 10, day2), (6, 11, day2)],
+            7: [(7, 10, day2)]
+        }
+        deleted_ids = []
+        fail_deletes = [True]
+        
+        def fake_query(query, params=None, fetch=False):
+            if 'MIN(id)' in query:
+                return [(1, 7)]
+            if 'ORDER BY id DESC' in query:
+                return [(datetime(2025, 1, 1, 23, 0),)]
+            if 'GROUP BY' in query:
+                # بعد الدفعة الأولى بقي السجلان 2 و 3 من اليوم الأول
+                return [(3, 10, day1), (2, 11, day1)]
+            if query.strip().startswith('SELECT'):
+                return batches.get(params[0], [])
+            if 3 in params and fail_deletes[0]:
+                raise Exception("lock wait timeout")
+            deleted_ids.extend(params)
+            return len(params)
+        
+        mock_db.execute_query.side_effect = fake_query
+        
+        progress = cleaner.cleanup_price_history(datetime.now(), float('inf'))
+        assert progress['completed'] is False
+        assert cleaner._resume_from_id == 4
+        assert deleted_ids == [1]
+        
+        fail_deletes[0] = False
+        deleted_ids.clear()
+        progress = cleaner.cleanup_price_history(datetime.now(), float('inf'))
+        assert progress['completed'] is True
+        assert sorted(deleted_ids) == [3, 5]
+
+class TestPartitionManager:
+    """اختبارات مدير أقسام تاريخ الأسعار"""
+    
+    def test_partition_rotation(self):
+        """اختبار إنشاء الأقسام القادمة وحذف المنتهية"""
+        mock_db = Mock()
+        manager = PartitionManager(mock_db, {'months_ahead': 1, 'retention_months': 12})
+        
+        executed = []
+        
+        def fake_query(query, params=None, fetch=False):
+            if 'information_schema' in query:
+                return [('p_start', datetime(2025, 7, 1)), ('p202509', datetime(2025, 10, 1)),
+                        ('p_future', None)]
+            executed.append(' '.join(query.split()))
+            return 0
+        
+        mock_db.execute_query.side_effect = fake_query
+        
+        from datetime import date
+        report = manager.run_maintenance(today=date(2026, 10, 19))
+        
+        # الأشهر الفائتة منذ آخر حد تحصل على أقسام شهرية بتقسيم واحد لـ p_future
+        assert report['created'][0] == 'p202510'
+        assert report['created'][-1] == 'p202611'
+        assert len(report['created']) == 14
+        assert sum('REORGANIZE PARTITION p_future' in query for query in executed) == 1
+        assert report['dropped'] == ['p_start', 'p202509']
+        assert executed[-1] == 'ALTER TABLE price_history DROP PARTITION p202509'
+    
+    def test_archive_is_idempotent(self):
+        """اختبار عدم تكرار المبادلة إذا كان الجدول المؤرشف يحمل البيانات"""
+        mock_db = Mock()
+        manager = PartitionManager(mock_db, {'archive': True})
+        
+        executed = []
+        
+        def fake_query(query, params=None, fetch=False):
+            if 'information_schema.PARTITIONS' in query and 'DESCRIPTION' in query:
+                return [('p202401', datetime(2024, 2, 1)), ('p_future', None)]
+            if 'information_schema.TABLES' in query:
+                return [(1,)]
+            if 'PARTITION (p202401)' in query:
+                return []
+            if query.startswith('SELECT 1 FROM price_history_archive_202401'):
+                return [(1,)]
+            executed.append(query)
+            return 0
+        
+        mock_db.execute_query.side_effect = fake_query
+        
+        # المبادلة تمت في تشغيل سابق وفشل الحذف
+        assert manager.archive_partition('p202401') is True
+        assert executed == ['ALTER TABLE price_history DROP PARTITION p202401']
+        
+        # القسم حُذف بالفعل
+        executed.clear()
+        assert manager.archive_partition('p202312') is True
+        assert executed == []
 
 class TestAmazonScraper:
     """اختبارات مستخرج البيانات"""
@@ -257,6 +760,33 @@ class TestDealAnalyzer:
         assert isinstance(score, float)
         assert 0 <= score <= 10
     
+    def test_price_lows_from_daily_rollup(self, analyzer):
+        """اختبار حساب أدنى الأسعار من الملخص اليومي"""
+        from datetime import timedelta
+        today = datetime.now().date()
+        price_history = [
+            {'price': 90, 'min_price': 80, 'price_date': today - timedelta(days=60)},
+            {'price': 100, 'min_price': 95, 'price_date': today - timedelta(days=10)},
+            {'price': 98, 'min_price': 97, 'price_date': today}
+        ]
+        
+        lows = analyzer._calculate_price_lows(price_history)
+        
+        assert lows['low_30d'] == 95
+        assert lows['low_90d'] == 80
+        assert analyzer._calculate_price_lows([]) == {'low_30d': None, 'low_90d': None}
+    
+    def test_price_trend_with_short_history(self, analyzer):
+        """اختبار اتجاه السعر مع ثلاثة سجلات يومية فقط"""
+        def history(*prices):
+            return [{'price': price} for price in prices]
+        
+        assert analyzer._analyze_price_trend(history(100, 100, 80)) == 'declining'
+        assert analyzer._analyze_price_trend(history(100, 100, 120)) == 'rising'
+        assert analyzer._analyze_price_trend(history(100, 100, 100)) == 'stable'
+        assert analyzer._analyze_price_trend(history(100, 100, 100, 80, 80, 80)) == 'declining'
+        assert analyzer._analyze_price_trend(history(100)) == 'insufficient_data'
+    
     def test_deal_type_determination(self, analyzer):
         """اختبار تحديد نوع العرض"""
         # عرض خاطف
@@ -270,6 +800,434 @@ class TestDealAnalyzer:
         # عرض عادي
         regular_product = {'discount_percentage': 20}
         assert analyzer._determine_deal_type(regular_product, []) == 'weekly'
+    
+    def test_deal_summary_is_memoized_per_version(self, analyzer):
+        """اختبار إعادة استخدام الملخص حتى تتغير حقول العرض"""
+        deal = {'id': 7, 'deal_type': 'daily', 'discount_percentage': 35, 'original_price': 200,
+                'deal_price': 130, 'quality_score': 8.5}
+        
+        with patch.object(analyzer, '_generate_deal_title', wraps=analyzer._generate_deal_title) as title:
+            first = analyzer.generate_deal_summary(deal)
+            first['title'] = 'modified'
+            assert analyzer.generate_deal_summary(dict(deal))['title'] == '⭐ عرض اليوم - خصم 35%'
+            assert title.call_count == 1
+            
+            changed = analyzer.generate_deal_summary(dict(deal, discount_percentage=50, deal_type='lightning'))
+            assert changed['title'] == '🔥 عرض خاطف - خصم 50%'
+            assert title.call_count == 2
+        
+        # فشل التوليد لا يُخزن
+        failing = dict(deal, id=8)
+        with patch.object(analyzer, '_generate_deal_title', side_effect=ValueError("boom")):
+            assert analyzer.generate_deal_summary(failing) == {}
+        assert analyzer.generate_deal_summary(failing)['title'] == '⭐ عرض اليوم - خصم 35%'
+    
+    def test_keyword_matcher_tags(self):
+        """اختبار مطابقة كل الوسوم في مرور واحد بما فيها الكلمات العربية والمتداخلة"""
+        matcher = KeywordMatcher({
+            'category': {'computers': ['laptop', 'كمبيوتر'], 'gaming': ['gaming laptop']},
+            'audience': {'tech_enthusiasts': ['gaming'], 'homeowners': ['home']}
+        })
+        
+        tags = matcher.match('Dell GAMING Laptop - تصفية نهائية')
+        assert tags['category'] == {'computers', 'gaming'}
+        assert tags['brand'] == {'dell'}
+        assert tags['clearance'] == {'clearance'}
+        assert matcher.first_tag(tags, 'audience') == 'tech_enthusiasts'
+        
+        # توحيد الهمزة والتاء المربوطة
+        assert matcher.match('جوال سامسونج')['brand'] == {'samsung'}
+        assert matcher.match('تصفيه')['clearance'] == {'clearance'}
+        assert matcher.match('') == {} and matcher.match(None) == {}
+    
+    def test_batch_matches_single_product_analysis(self, analyzer):
+        """اختبار تطابق التحليل المتجه مع تحليل كل منتج على حدة"""
+        analyzer.db.get_product_by_asin.return_value = None
+        products = [
+            {'asin': 'B000000001', 'title': 'Gaming Laptop', 'brand': 'Dell', 'current_price': 2500,
+             'original_price': 5000, 'rating': 4.6, 'review_count': 1200, 'is_prime': True,
+             'availability': 'in_stock'},
+            {'asin': 'B000000002', 'title': 'Kitchen clearance set', 'brand': None,
+             'current_price': 150, 'original_price': 200, 'discount_percentage': 25,
+             'rating': 0, 'review_count': 20},
+            {'asin': 'B000000003', 'title': 'Book', 'current_price': 95, 'original_price': 100,
+             'rating': 4.0, 'review_count': 5},
+            {'asin': 'B000000004', 'title': 'Shoes', 'brand': 'Nike', 'current_price': 300,
+             'original_price': 400, 'rating': 3.9, 'review_count': 300, 'is_prime': False}
+        ]
+        
+        expected = [analyzer.analyze_product_for_deals(dict(product)) for product in products]
+        results = analyzer.analyze_batch([dict(product) for product in products], price_histories={})
+        
+        assert [result is None for result in results] == [deal is None for deal in expected]
+        for result, deal in zip(results, expected):
+            if deal is None:
+                continue
+            for key in ('deal_type', 'quality_score', 'discount_percentage', 'is_featured'):
+                assert result[key] == deal[key]
+            for key in ('deal_strength', 'urgency_level', 'target_audience', 'price_lows'):
+                assert result['analysis_metadata'][key] == deal['analysis_metadata'][key]
+        
+        # نقاط أقل بقليل من حد التصنيف تُقرب قبل التصنيف في المسارين
+        import numpy as np
+        product = products[3]
+        with patch.object(analyzer, '_score_products',
+                          side_effect=lambda batch, *args: (np.full(len(batch), 6.996), {})):
+            deal = analyzer.analyze_product_for_deals(dict(product))
+            result = analyzer.analyze_batch([dict(product)], price_histories={})[0]
+        assert deal['quality_score'] == result['quality_score'] == 7.0
+        assert deal['analysis_metadata']['urgency_level'] == 'medium'
+        assert result['analysis_metadata']['urgency_level'] == 'medium'
+
+    def test_scoring_models_shadow_and_hot_swap(self, analyzer, tmp_path):
+        """اختبار تقييم نماذج الظل على نفس الدفعة وتبديل النموذج من ملف النماذج"""
+        product = {'discount_percentage': 35, 'rating': 4.5, 'review_count': 500,
+                   'current_price': 2500, 'is_prime': True, 'availability': 'in_stock'}
+        legacy_score = analyzer._calculate_quality_score(product, [])
+        
+        models_file = tmp_path / 'scoring_models.yaml'
+        models_file.write_text(yaml.safe_dump({
+            'model': 'legacy',
+            'shadow_models': ['discount_only'],
+            'models': {'discount_only': {'features': {'discount': {'points': [[0, 0], [50, 10]]}}}}
+        }))
+        registry = ScoringModelRegistry({**analyzer.quality_config, 'models_file': str(models_file)})
+        analyzer.scoring_models = registry
+        
+        scores, shadow = analyzer._score_products([product, dict(product, discount_percentage=60)])
+        assert round(float(scores[0]), 2) == legacy_score
+        assert list(shadow['discount_only']) == [7.0, 10.0]
+        
+        registry.set_active('discount_only', shadow=['legacy'])
+        assert analyzer._calculate_quality_score(product, []) == 7.0
+        
+        # ملف غير صالح يبقي النماذج الحالية
+        models_file.write_text(yaml.safe_dump({'model': 'missing'}))
+        os.utime(models_file, (0, 1))
+        assert registry.reload_if_changed() is False
+        assert registry.active == 'discount_only'
+    
+    def test_models_file_resolved_from_config_dir(self, tmp_path):
+        """اختبار حل مسار ملف النماذج نسبةً لمجلد ملف الإعدادات"""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(yaml.safe_dump({'deals': {'quality_scoring': {'models_file': 'scoring_models.yaml'}}}))
+        
+        config = DealsEngine.__new__(DealsEngine)._load_config(str(config_file))
+        assert config['deals']['quality_scoring']['models_file'] == str(tmp_path / 'scoring_models.yaml')
+        
+        with pytest.raises(TypeError):
+            ScoringModel('incomplete')
+
+class TestRecords:
+    """اختبارات سجلات المنتجات والعروض"""
+    
+    def test_mapping_semantics_and_deal_product_fallback(self):
+        """اختبار دلالة القاموس للحقول غير المعيّنة وقراءة حقول المنتج من العرض"""
+        product = ScrapedProduct(asin='B000000001', title='Laptop', current_price=900.0,
+                                 deal_type='daily', extra_note='x')
+        assert product.get('original_price', 1000) == 1000 and 'original_price' not in product
+        assert product.current_price == 900.0 and product['extra_note'] == 'x'
+        assert product.setdefault('brand', 'Dell') == 'Dell' and product.brand == 'Dell'
+        
+        candidate = DealCandidate(deal_type='lightning', deal_price=900.0, quality_score=8.0)
+        deal = Deal.from_candidate(candidate, product, deal_id=42)
+        assert deal['deal_type'] == 'lightning'  # حقول العرض لها الأولوية
+        assert deal.get('title') == 'Laptop' and deal.id == 42
+        assert dict(deal)['asin'] == 'B000000001' and 'product' not in dict(deal)
+        
+        ranked = TopKRanker(k=2, top_deals=1)
+        ranked.push(deal)
+        top = ranked.top()[0]
+        assert isinstance(top, Deal) and top.priority_rank == 1 and not hasattr(deal, 'priority_rank')
+
+class TestTopKRanker:
+    """اختبارات الترتيب التدفقي لأفضل العروض"""
+    
+    def test_keeps_best_k_in_rank_order(self):
+        """اختبار الترتيب بالنقاط ثم الخصم مع تقدم الأسبق عند التساوي وإزالة التكرار"""
+        deals = [
+            {'asin': 'A', 'quality_score': 6.5, 'discount_percentage': 30, 'n': 0},
+            {'asin': 'B', 'quality_score': 8.0, 'discount_percentage': 20, 'n': 1},
+            {'asin': 'C', 'quality_score': 5.0, 'discount_percentage': 45, 'n': 2},
+            {'asin': 'A', 'quality_score': 9.5, 'discount_percentage': 60, 'n': 3},  # مكرر: يُتجاهل
+            {'asin': 'D', 'quality_score': 8.0, 'discount_percentage': 45, 'n': 4},
+            {'asin': 'E', 'quality_score': 6.5, 'discount_percentage': 30, 'n': 5},
+            {'asin': 'F', 'quality_score': None, 'discount_percentage': 70, 'n': 6},
+            {'asin': 'G', 'quality_score': 8.0, 'discount_percentage': 20, 'n': 7}
+        ]
+        
+        ranker = TopKRanker(k=5, top_deals=3)
+        for deal in deals:
+            ranker.push(deal)
+        top = ranker.top()
+        
+        assert len(ranker) == 5 and ranker.pushed == 7
+        assert [deal['n'] for deal in top] == [4, 1, 7, 0, 5]
+        assert [deal['is_top_deal'] for deal in top] == [True] * 3 + [False] * 2
+        assert ranker.top(2)[1]['priority_rank'] == 2
+
+class TestRecheckQueue:
+    """اختبارات طابور إعادة فحص العروض"""
+    
+    def test_due_deals_by_quality_within_budget(self):
+        """اختبار سحب العروض المستحقة الأعلى جودة أولاً وتأجيل الباقي"""
+        queue = RecheckQueue(Mock(), {'recheck_at': 0.5, 'budget': 2})
+        now = datetime.now()
+        queue.schedule(1, 'A', now + timedelta(hours=2), 5, now)
+        queue.schedule(2, 'B', now + timedelta(hours=2), 9, now)
+        queue.schedule(3, 'C', now + timedelta(hours=2), 7, now)
+        queue.schedule(4, 'D', now + timedelta(days=30), 10, now)
+        # عرض جديد لنفس المنتج يحل محل السابق
+        queue.schedule(5, 'A', now + timedelta(hours=4), 6, now)
+        
+        assert queue.pop_due(now + timedelta(minutes=30)) == []
+        checked = queue.pop_due(now + timedelta(hours=1))
+        assert [entry['deal_id'] for entry in checked] == [2, 3]
+        assert not queue.is_scheduled('B') and queue.is_scheduled('A')
+        
+        assert [entry['deal_id'] for entry in queue.pop_due(now + timedelta(hours=2))] == [5]
+        assert len(queue) == 1
+
+class TestNearDuplicateDetector:
+    """اختبارات كشف العروض شبه المكررة"""
+    
+    def test_keeps_best_variant_and_remembers_broadcasts(self):
+        """اختبار إبقاء أفضل نسخة واستبعاد نسخ العروض المبثوثة خلال النافذة"""
+        from datetime import timedelta
+        detector = NearDuplicateDetector(duplicates_config={'window_hours': 24})
+        deals = [
+            {'title': 'Nike Air Zoom Pegasus 40 Running Shoes - Black, Size 42', 'brand': 'Nike',
+             'deal_price': 400, 'quality_score': 7.0},
+            {'title': 'Nike Air Zoom Pegasus 40 Running Shoes - White, Size 44', 'brand': 'Nike',
+             'deal_price': 410, 'quality_score': 7.5},
+            {'title': 'Nike Air Zoom Pegasus 40 Running Shoes - Black', 'brand': 'Adidas',
+             'deal_price': 400, 'quality_score': 6.0},
+            {'title': 'Samsung Galaxy S24 Ultra 256GB', 'brand': 'Samsung',
+             'deal_price': 4000, 'quality_score': 8.0}
+        ]
+        
+        kept = detector.filter(deals)
+        assert [deal['quality_score'] for deal in kept] == [7.5, 6.0, 8.0]
+        assert len(detector) == 0
+        
+        now = datetime.now()
+        detector.remember(kept, sent_at=now)
+        variant = {'title': 'Samsung Galaxy S24 Ultra 256GB - Titanium Gray', 'brand': 'Samsung',
+                   'deal_price': 3950, 'quality_score': 9.0}
+        assert detector.filter([variant], now=now) == []
+        
+        # بعد انتهاء النافذة يُسمح ببث النسخة
+        assert detector.filter([variant], now=now + timedelta(hours=25)) == [variant]
+        assert len(detector) == 0
+
+class TestPriceStats:
+    """اختبارات إحصائيات الأسعار التراكمية"""
+    
+    def test_running_statistics(self):
+        """اختبار أدنى سعر والوسيط وأيام السعر الحالي"""
+        from datetime import date, timedelta
+        stats = PriceStats()
+        start = date(2026, 1, 1)
+        
+        for offset, price in enumerate([100, 100, 80, 100, 100, 90, 90]):
+            stats.observe(price, start + timedelta(days=offset))
+        
+        today = start + timedelta(days=8)
+        assert stats.all_time_low == 80
+        assert stats.median_30d(today) == 100
+        assert stats.days_at_current_price(today) == 3
+        assert stats.history_days(today) == 7
+        
+        # الإغلاقات الأقدم من 30 يوماً لا تدخل في الوسيط
+        assert stats.median_30d(start + timedelta(days=40)) is None
+        
+        restored = PriceStats.from_bytes(stats.to_bytes())
+        assert restored.median_30d(today) == 100
+        assert len(stats.to_bytes()) < 200
+    
+    def test_inflated_original_price_rejected(self):
+        """اختبار رفض الخصم المعلن إذا كان السعر التاريخي أقل"""
+        from datetime import date, timedelta
+        config = TestConfig.get_test_config()
+        engine = PriceStatsEngine(Mock())
+        for offset in range(9, -1, -1):
+            engine.observe('B123456789', 80, date.today() - timedelta(days=offset))
+        
+        analyzer = DealAnalyzer(config, Mock(), engine)
+        product = {
+            'asin': 'B123456789',
+            'current_price': 80,
+            'original_price': 160,
+            'discount_percentage': 50
+        }
+        
+        # سعر ثابت مع سعر "قبل الخصم" وهمي: أدنى سعر تاريخي لكنه ليس انخفاضاً حقيقياً
+        assert analyzer._passes_price_history_check(product) is False
+        assert product['price_reference']['historical_discount'] == 0
+        
+        # أدنى سعر جديد أقل من السابق يُقبل
+        product.update(current_price=70, original_price=140)
+        product.pop('price_reference')
+        assert analyzer._passes_price_history_check(product) is True
+        
+        # الدورة التالية في نفس اليوم بعد تسجيل السعر الجديد (انخفاض حديث)
+        engine.observe('B123456789', 70, date.today())
+        product.pop('price_reference')
+        assert analyzer._passes_price_history_check(product) is True
+        
+        engine.observe('B123456789', 60, date.today() - timedelta(days=11))
+        product.update(current_price=80, original_price=160)
+        product.pop('price_reference')
+        assert analyzer._passes_price_history_check(product) is False
+
+class TestDealLifecycle:
+    """اختبارات دورة حياة العروض"""
+    
+    def test_refresh_in_place_and_reopen_on_price_change(self):
+        """اختبار تحديث العرض القائم وفتح عرض جديد عند تغير السعر"""
+        mock_db = Mock()
+        mock_db.get_active_deal_for_product.return_value = None
+        mock_db.insert_deal.side_effect = [101, 102]
+        mock_db.refresh_deal.return_value = True
+        
+        lifecycle = DealLifecycleManager(mock_db, {'price_change_threshold': 2})
+        deal = {'product_id': 1, 'deal_price': 100.0, 'quality_score': 7}
+        
+        assert lifecycle.save(deal) == (101, True)
+        assert lifecycle.save(dict(deal, deal_price=101.0, quality_score=8)) == (101, False)
+        mock_db.refresh_deal.assert_called_once()
+        
+        assert lifecycle.save(dict(deal, deal_price=80.0)) == (102, True)
+        mock_db.expire_deals.assert_called_once_with([101], reason='replaced')
+        assert lifecycle.stats == {'opened': 2, 'refreshed': 1, 'replaced': 1}
+    
+    def test_small_drops_compared_to_opening_price(self):
+        """اختبار عدم تراكم الانخفاضات الصغيرة المتتالية في عرض واحد"""
+        mock_db = Mock()
+        mock_db.get_active_deal_for_product.return_value = {'id': 101, 'opening_price': 100.0}
+        mock_db.insert_deal.return_value = 102
+        mock_db.refresh_deal.return_value = True
+        
+        lifecycle = DealLifecycleManager(mock_db, {'price_change_threshold': 2, 'active_cache_size': 1})
+        deal = {'product_id': 1, 'deal_price': 98.1}
+        
+        assert lifecycle.save(deal) == (101, False)
+        # 1.9% عن آخر سعر لكن 3.8% عن سعر فتح العرض
+        assert lifecycle.save(dict(deal, deal_price=96.2)) == (102, True)
+        mock_db.expire_deals.assert_called_once_with([101], reason='replaced')
+        
+        lifecycle.save(dict(deal, product_id=2))
+        assert lifecycle._active_by_product.get_stats()['entries'] == 1
+
+class TestDealExpirySweeper:
+    """اختبارات منهي العروض"""
+    
+    def test_sweep_expires_due_deals_only(self):
+        """اختبار إنهاء العروض المستحقة فقط مع تجاهل المواعيد القديمة"""
+        from datetime import timedelta
+        mock_db = Mock()
+        mock_db.expire_deals.side_effect = lambda ids, reason: len(ids)
+        sweeper = DealExpirySweeper(mock_db, {'batch_size': 2})
+        
+        now = datetime(2026, 1, 1, 12, 0)
+        sweeper.track(1, now - timedelta(hours=1))
+        sweeper.track(2, now - timedelta(minutes=5))
+        sweeper.track(3, now + timedelta(hours=1))
+        # تمديد العرض 2 بعد تحديثه
+        sweeper.track(2, now + timedelta(days=1))
+        sweeper.track(4, now - timedelta(minutes=1))
+        
+        assert sweeper.sweep(now) == 2
+        expired = [deal_id for call in mock_db.expire_deals.call_args_list for deal_id in call[0][0]]
+        assert sorted(expired) == [1, 4]
+        assert sweeper.next_deadline() == now + timedelta(hours=1)
+    
+    def test_rebuild_keeps_deadlines_tracked_meanwhile(self):
+        """اختبار دمج المواعيد المحملة دون فقد ما سجله track أثناء التحميل"""
+        now = datetime(2026, 1, 1, 12, 0)
+        mock_db = Mock()
+        sweeper = DealExpirySweeper(mock_db, {'batch_size': 10})
+        
+        def load_page(query, params, fetch):
+            # عرض محدث بموعد جديد أثناء التحميل
+            sweeper.track(2, now + timedelta(days=2))
+            return [(1, now + timedelta(hours=1)), (2, now + timedelta(hours=2))]
+        
+        mock_db.execute_query.side_effect = load_page
+        assert sweeper.rebuild() == 2
+        assert sweeper._deadlines == {1: now + timedelta(hours=1), 2: now + timedelta(days=2)}
+        assert sweeper.next_deadline() == now + timedelta(hours=1)
+
+class TestTTLCache:
+    """اختبارات الذاكرة المؤقتة"""
+    
+    def test_read_through_and_invalidation(self):
+        """اختبار القراءة عبر الذاكرة والإبطال عند الكتابة"""
+        cache = TTLCache(ttl=60, max_entries=2)
+        loader = Mock(return_value=[{'id': 1}])
+        
+        assert cache.get_or_load((10, None), loader) == [{'id': 1}]
+        assert cache.get_or_load((10, None), loader) == [{'id': 1}]
+        assert loader.call_count == 1
+        
+        cache.invalidate()
+        cache.get_or_load((10, None), loader)
+        assert loader.call_count == 2
+        
+        # إزالة الأقدم استخداماً عند تجاوز الحد
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get((10, None)) is None
+        assert cache.get_stats()['entries'] == 2
+    
+    def test_expired_entry_is_reloaded(self):
+        """اختبار انتهاء صلاحية العنصر"""
+        cache = TTLCache(ttl=0)
+        loader = Mock(return_value=[])
+        cache.get_or_load('k', loader)
+        cache.get_or_load('k', loader)
+        assert loader.call_count == 2
+
+class TestStatsService:
+    """اختبارات خدمة الإحصائيات"""
+    
+    def test_counters_in_one_cached_query(self):
+        """اختبار حساب العدادات في استعلام واحد وتخزينها مؤقتاً"""
+        mock_db = Mock()
+        mock_db.execute_read.return_value = [(120, 7, 30, None)]
+        service = StatsService(mock_db, {'stats_cache_ttl': 60})
+        
+        stats = service.get_performance_stats(days=7)
+        assert stats == {'total_products': 120, 'active_deals': 7,
+                         'messages_sent': 30, 'errors_count': 0}
+        
+        query, params = mock_db.execute_read.call_args[0]
+        assert query.count('COUNT(*)') == 4
+        assert len(params) == 2
+        
+        service.get_performance_stats(days=7)
+        assert mock_db.execute_read.call_count == 1
+
+class TestActivityLogger:
+    """اختبارات مسجل النشاط المؤجل"""
+    
+    def test_batches_and_drops_under_overload(self):
+        """اختبار الكتابة على دفعات وإهمال السجلات عند امتلاء الطابور"""
+        mock_db = Mock()
+        activity_logger = ActivityLogger(mock_db, {'queue_size': 3, 'batch_size': 2})
+        # بدون خيط خلفي حتى يبقى التفريغ يدوياً
+        activity_logger._ensure_started = Mock()
+        
+        for i in range(5):
+            activity_logger.log('deal_found', f'عرض {i}', 'deals', i, {'discount': 50})
+        
+        assert mock_db.execute_many.call_count == 0
+        assert activity_logger.get_stats()['dropped'] == 2
+        
+        assert activity_logger.flush() == 3
+        assert mock_db.execute_many.call_count == 2
+        first_batch = mock_db.execute_many.call_args_list[0][0][1]
+        assert first_batch[0][:4] == ('deal_found', 'عرض 0', 'deals', 0)
 
 class TestTelegramBot:
     """اختبارات بوت التليجرام"""
@@ -310,6 +1268,20 @@ class TestTelegramBot:
         assert isinstance(message, str)
         assert 'Test Product' in message
         assert '25' in message  # نسبة الخصم
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_reports_only_sent_deals(self, telegram_bot):
+        """اختبار إعادة العروض التي أُرسلت فعلاً فقط لتذكّرها في كشف التكرار"""
+        sent, failed = {'id': 1, 'title': 'A'}, {'id': 2, 'title': 'B'}
+        telegram_bot._get_active_channels = AsyncMock(return_value=[{'telegram_id': 'c1'}, {'telegram_id': 'c2'}])
+        telegram_bot._filter_deals_for_channel = Mock(side_effect=lambda deals, channel: deals)
+        telegram_bot.send_deal_to_channel = AsyncMock(side_effect=lambda channel_id, deal: deal is sent)
+        
+        with patch('telegram_bot.asyncio.sleep', new=AsyncMock()):
+            stats = await telegram_bot.broadcast_deals([sent, failed])
+        
+        assert stats['messages_sent'] == 2 and stats['messages_failed'] == 2
+        assert stats['sent_deals'] == [sent]
 
 class TestChannelManager:
     """اختبارات مدير القنوات"""
@@ -376,6 +1348,112 @@ class TestDealsEngine:
                 
                 mock_terms.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_pipeline_stages_with_bounded_queues(self):
+        """اختبار خط الاستخراج ← التحليل ← الحفظ"""
+        engine = object.__new__(DealsEngine)
+        engine.config = TestConfig.get_test_config()
+        engine.config['performance'] = {
+            'max_concurrent_scrapers': 3,
+            'pipeline': {'product_queue_size': 1, 'write_queue_size': 1,
+                         'analysis_workers': 2, 'writer_batch_size': 5}
+        }
+        engine.logger = Mock()
+        engine.scraper = Mock()
+        engine.scraper.scrape_deals_page.side_effect = Exception("blocked")
+
+        written = []
+
+        def write(analyzed, cycle_stats):
+            written.append(len(analyzed))
+            cycle_stats['deals_processed'] += len(analyzed)
+
+        engine._scrape_search_term = lambda term: [{'asin': f"{term}-{i}"} for i in range(3)]
+        engine._analyze_products = lambda products: ([(product, None) for product in products], 1)
+        engine._write_analyzed = write
+
+        cycle_stats = {'products_scraped': 0, 'products_unchanged': 0,
+                       'deals_found': 0, 'deals_processed': 0, 'errors': 0}
+        await engine._run_pipeline([f"term{i}" for i in range(6)], cycle_stats)
+
+        assert cycle_stats['products_scraped'] == 18
+        assert cycle_stats['deals_processed'] == 18
+        assert cycle_stats['products_unchanged'] == 6
+        assert cycle_stats['errors'] == 1
+        assert 'first_write_seconds' in cycle_stats
+        # الكاتب يدمج الدفعات المنتظرة دون تجاوز الحد بأكثر من دفعة
+        assert all(size <= 5 + 2 for size in written)
+
+        # إلغاء الدورة لا يترك مراحل معلقة على طوابيرها
+        import time
+        engine._scrape_search_term = lambda term: time.sleep(0.2) or [{'asin': term}]
+        pipeline = asyncio.create_task(engine._run_pipeline(['slow'], cycle_stats))
+        await asyncio.sleep(0.05)
+        pipeline.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pipeline
+        assert [task for task in asyncio.all_tasks() if task is not asyncio.current_task()] == []
+
+    @pytest.mark.asyncio
+    async def test_fingerprint_recorded_only_after_successful_write(self):
+        """اختبار عدم تسجيل بصمة منتج فشل حفظ عرضه"""
+        engine = object.__new__(DealsEngine)
+        engine.logger = Mock()
+        engine.deal_ranker = TopKRanker(k=5)
+        engine.recheck_queue = None
+        engine.price_stats = None
+        engine.change_detector = Mock()
+        engine.active_deals_cache = Mock()
+        engine._save_product = Mock(return_value=1)
+        engine._save_deal = Mock(return_value=None)
+        engine._save_price_history = Mock()
+
+        failed = {'asin': 'B1', 'current_price': 50}
+        no_deal = {'asin': 'B2', 'current_price': 80}
+        engine._write_analyzed([(failed, {'quality_score': 7}), (no_deal, None)])
+
+        engine.change_detector.record.assert_called_once_with(no_deal)
+
+    @pytest.mark.asyncio
+    async def test_recheck_expires_only_analyzed_products_without_deal(self):
+        """اختبار إنهاء العرض عند اختفائه فقط وإعادة فحص العرض الذي فشل حفظه"""
+        engine = object.__new__(DealsEngine)
+        engine.config = {'performance': {'max_concurrent_scrapers': 2}}
+        engine.logger = Mock()
+        engine.db_manager = Mock()
+        engine.db_manager.expire_deals.return_value = 1
+        engine.active_deals_cache = Mock()
+        engine.scraper = Mock()
+        engine.scraper.base_url = 'https://www.amazon.sa'
+        import time
+        # الجلب بطيء؛ حلقة الأحداث تبقى متاحة لبقية المهام أثناءه
+        engine.scraper.get_product_details.side_effect = (
+            lambda asin: time.sleep(0.2) or {'asin': asin, 'current_price': 50}
+        )
+        engine.recheck_queue = RecheckQueue(Mock())
+        now = datetime.now()
+        engine.recheck_queue.schedule(1, 'GONE', now, 5, now)
+        engine.recheck_queue.schedule(2, 'WRITE_FAILED', now, 5, now)
+
+        engine._analyze_products = lambda products, force: (
+            [(product, None if product['asin'] == 'GONE' else {'quality_score': 7}) for product in products], 0
+        )
+        engine._write_analyzed = Mock(return_value=0)
+
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.02)
+
+        beating = asyncio.create_task(heartbeat())
+        assert await engine._run_rechecks() == 1
+        beating.cancel()
+        assert len(ticks) > 3
+        engine.db_manager.expire_deals.assert_called_once_with([1])
+        assert engine.recheck_queue.is_scheduled('WRITE_FAILED')
+
 def mock_open_config():
     """محاكاة فتح ملف الإعدادات"""
     config_content = yaml.dump(TestConfig.get_test_config())